@@ -5,7 +5,12 @@ import random
 import springs
 
 
-def benchmark(engine, n=20000, duration=None):
+def benchmark(engine, n=20000, duration=None, controller=True, step_n=None):
+    """Benchmark a starfish on a rough terrain.
+
+    :param controller:  True for a Python sinusoidal controller, 'cpg' for the same controller
+                        run natively by a CPG (cpp engine only), False for none.
+    """
     random.seed(0)  # reproducible results
 
     # creating the physic engine, `Space`.
@@ -27,40 +32,58 @@ def benchmark(engine, n=20000, duration=None):
     arm_dims = 6 * [[(50, 30), (45, 30), (40, 30), (40, 25)] + 2 * [(35, 20)] + [(30, 0)]]
     starfish = springs.creatures.Starfish(space, arm_dims, (720, 500), 40,
                                           muscle_n_groups=4)
-    starfish.create_muscle_interface(n_group=4, muscle_cls=springs.creatures.motors.SectionOneMuscle)
-    space.add_entity(starfish)
+    starfish.create_muscle_interface(n_group=4, muscle_cls=springs.creatures.motors.SectionOneMuscle,
+                                     compile=(engine == 'cpp'))
+    tick_period = round(0.05 / space.dt)  # control period
+    space.add_entity(starfish, period=tick_period)
     # space.add_rect(-10000, 10000, -10000, 100, restitution=0.5)
     for i in range(-500, 500):
         space.add_rect(20*i - 1, 20*(i+1) + 1, 100, random.uniform(170, 190), 0.5)
 
     # controller
-    tick_period = round(0.05 / space.dt)
-
-    speeds = [random.uniform(0.2, 0.6) for _ in range(len(starfish.muscle_interface))]
-    def starfish_controller(starfish, space):
-        if space.ticks % tick_period == 0:
+    if controller == 'cpg':
+        speeds = [random.uniform(0.2, 0.6) for _ in range(len(starfish.muscle_interface))]
+        space.add_cpg(amplitudes=0.1, frequencies=[speed / (2 * math.pi) for speed in speeds],
+                      actuation_map=starfish.muscle_interface.actuation_map, period=tick_period)
+        space.entities.remove(starfish)
+    elif controller:
+        speeds = [random.uniform(0.2, 0.6) for _ in range(len(starfish.muscle_interface))]
+        def starfish_controller(starfish, space):
             current_length = [0.1 * math.sin(speed * space.t) for speed in speeds]
             starfish.muscle_interface.actuate(current_length)
-    starfish.add_controller(starfish_controller)
+        starfish.add_controller(starfish_controller)
+    else:
+        space.entities.remove(starfish)
+
+    return benchmark_space(space, engine, n=n, duration=duration, step_n=step_n)
 
-    return benchmark_space(space, engine, n=n, duration=duration)
 
+def benchmark_space(space, engine, n=20000, duration=None, step_n=None):
+    """Measure the number of steps per second.
+
+    :param step_n:  if not None, steps are run by chunks of `step_n` through `space.step_n()`
+                    rather than one by one through `space.step()`.
+    """
+    def advance():
+        if step_n is None:
+            space.step()
+            return 1
+        space.step_n(step_n)
+        return step_n
 
-def benchmark_space(space, engine, n=20000, duration=None):
     start = time.time()
     count = 0
     if duration is None:
-        for _ in range(n):
-            space.step()
-            count += 1
+        while count < n:
+            count += advance()
     else:
         while time.time() - start < duration:
-            space.step()
-            count += 1
+            count += advance()
     duration = time.time() - start
     perf = count/duration
     speedup = count * space.dt / duration
-    print('{}: {} step/s (averaged over {:.2f} seconds, speedup {:.1f}x)'.format(engine, round(perf), duration, speedup))
+    label = engine if step_n is None else '{} (step_n={})'.format(engine, step_n)
+    print('{}: {} step/s (averaged over {:.2f} seconds, speedup {:.1f}x)'.format(label, round(perf), duration, speedup))
     return perf, duration
 
 
@@ -68,3 +91,7 @@ if __name__ == '__main__':
     benchmark('cpp', duration=5.0)
     benchmark('cython', duration=5.0)
     benchmark('box2d', duration=5.0)
+    # headless: no Python code run during the steps.
+    benchmark('cpp', duration=5.0, controller=False)
+    benchmark('cpp', duration=5.0, controller=False, step_n=1000)
+    benchmark('cpp', duration=5.0, controller='cpg', step_n=1000)
@@ -0,0 +1,45 @@
+"""Compare the serial and colored parallel link solvers on a 100x100 FusedSquares lattice.
+
+All links are contracted at once, and for each number of substeps, the constraint error that
+remains after a fixed number of steps (mean relative deviation of the link lengths from their
+target lengths) measures how well each solver converges per substep.
+"""
+
+import time
+
+import springs
+
+
+def create_space(solver, n_substep, n_threads=0, shape=(100, 100)):
+    space = springs.create_space(dt=0.001, gravity=-100.0, n_substep=n_substep, engine='cpp')
+    space.add_rect(-100000, 100000, -100, 100, restitution=0.5)
+    space.set_solver(solver, n_threads=n_threads)
+
+    square_size      = [[10.0 for j in range(shape[1])] for i in range(shape[0])]
+    square_stiffness = [[1e5 for j in range(shape[1])] for i in range(shape[0])]
+    springs.creatures.FusedSquares(space, square_size, square_stiffness, origin=(0, 100))
+    for link in space.links:
+        link.contract(0.9)
+    return space
+
+
+def constraint_error(space):
+    return sum(abs(link.length() / (link.expand_factor * link.relax_length) - 1)
+               for link in space.links) / len(space.links)
+
+
+def benchmark_solver(solver, n_substep, n_steps=50, n_threads=0):
+    space = create_space(solver, n_substep, n_threads=n_threads)
+    start = time.time()
+    space.step_n(n_steps)
+    duration = time.time() - start
+    error = constraint_error(space)
+    print('{:>8} n_substep={:<3} error {:.3e}   {:7.1f} step/s'.format(
+          solver, n_substep, error, n_steps / duration))
+    return error, n_steps / duration
+
+
+if __name__ == '__main__':
+    for n_substep in [1, 2, 5, 10, 20]:
+        for solver in ['serial', 'colored']:
+            benchmark_solver(solver, n_substep)
@@ -50,7 +50,7 @@ starfish  = creatures.DevStarfish(space, arm_dims, (0, 500), 30, materials=mater
                                   # section_cls=springs.CentralBoneSection,
                                   section_cls=springs.Section,
                                   muscle_n_groups=MUSCLE_N_GROUP, height_dev_factor=BIRTH_SIZE,
-                                  sensor_cfg=sensor_cfg)
+                                  sensor_cfg=sensor_cfg['sensors'])
 min_y = min(node.y for node in starfish.nodes)
 starfish.translate(0, -min_y + 100)
 space.add_entity(starfish)
@@ -75,20 +75,17 @@ print('{} sensors'.format(len(space.sensor_values())))
 print('{} outputs'.format(len(starfish.muscle_interface)))
 nn = Network([len(space.sensor_values()), 20, 20, len(starfish.muscle_interface)])
 
-# speeds = np.array([random.uniform(-1.0, 1.0) for _ in range(len(starfish.muscle_interface))])
-def starfish_controller(starfish, space):
-
-    if GROWTH:
-        dev_size = min(1.0, BIRTH_SIZE + space.t/200)
-        starfish.change_height_dev_factor(dev_size)
+# the network runs natively, at each step, from the sensor buffer to the muscle interface.
+starfish.muscle_interface.compile(space)
+space.add_mlp([(W, B) for W, B in nn.layer_weights], output_scales=0.1,
+              actuation_map=starfish.muscle_interface.actuation_map)
 
-    inputs = np.array(space.sensor_values())
-    inputs = np.expand_dims(inputs, axis=1)
-    current_length = 0.1 * nn.forward(inputs)
-    starfish.muscle_interface.actuate(current_length)
-
-starfish.add_controller(starfish_controller)
+def starfish_controller(starfish, space):
+    dev_size = min(1.0, BIRTH_SIZE + space.t/200)
+    starfish.change_height_dev_factor(dev_size)
 
+if GROWTH:
+    starfish.add_controller(starfish_controller)
 
 if __name__ == '__main__':
 
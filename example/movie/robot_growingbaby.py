@@ -15,7 +15,7 @@ GROWTH = True
 random.seed(1)  # reproducible results
 
 # creating the physic engine, `Space`.
-space = springs.create_space(dt=0.001, gravity=0.0, engine="cython")
+space = springs.create_space(dt=0.001, gravity=0.0, engine="cpp")
 if FLOOR:
     space.add_rect(-10000, 10000, -100, 100, 0.9)
 
@@ -42,14 +42,14 @@ starfish  = creatures.DevStarfish(space, arm_dims, (960, 540), 30,
                                   section_cls=springs.Section, height_dev_factor=BIRTH_SIZE)
 space.add_entity(starfish)
 
+# linear growth from t = 10s to full size, interpolated natively by the engine
+if GROWTH:
+    starfish.compile_growth([10.0, 10.0 + 120 * (1.0 - BIRTH_SIZE)], [BIRTH_SIZE, 1.0])
+
 # controller
 if speeds is None:
     speeds = np.array([random.uniform(0.2, 0.5) for _ in range(len(starfish.muscle_interface))])
 def starfish_controller(starfish, space):
-    if GROWTH:
-        dev_size = min(1.0, BIRTH_SIZE + max(0, space.t-10)/120)
-        starfish.change_height_dev_factor(dev_size)
-
     current_length = 0.1 * np.sin(speeds * space.t)
     starfish.muscle_interface.actuate(current_length)
 
@@ -21,8 +21,8 @@ extensions = [
               extra_compile_args=['-Wno-deprecated']), # avoid tp_print warnings
               # , define_macros=[('CYTHON_TRACE', '1')]),
     Extension('springs.engine.cpp', ['springs/engine/_cpp/cpp.pyx'], language='c++',
-              extra_compile_args=['-std=c++17', '-Wno-deprecated'],
-              extra_link_args=['-std=c++17'])
+              extra_compile_args=['-std=c++17', '-pthread', '-Wno-deprecated'],
+              extra_link_args=['-std=c++17', '-pthread'])
 ]
 
 
@@ -57,5 +57,5 @@ setuptools.setup(
     ext_modules = cythonize(extensions),
 
     # required dependencies
-    install_requires=['numpy', 'cython', 'reproducible', 'setproctitle', 'pyqt6'],
+    install_requires=['numpy', 'cython>=3.1', 'reproducible', 'setproctitle', 'pyqt6'],
 )
@@ -3,7 +3,7 @@ from .starfishes import Starfish
 
 class Centipede(Starfish):
 
-    def _create_center(self, leftbottom_pos, n, base_size=None):
+    def _create_center(self, leftbottom_pos, n, base_size=None, builder=None):
         self.center, bases = [], []
 
         size = self.center_radius
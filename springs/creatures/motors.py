@@ -1,3 +1,8 @@
+# Muscles describe their actuation as a list of `(link, term_a, term_b)`, one per link, where
+# each term is an `(input, offset, coef)` triplet, standing for `offset + coef * m_signal[input]`.
+# The expand factor of the link is the product of the two terms. This is what
+# `MuscleInterface.compile` turns into a native actuation map.
+NO_TERM = (-1, 0.0, 1.0)
 
 
 class DirectMuscles:
@@ -5,23 +10,24 @@ class DirectMuscles:
     def __init__(self, part):
         self.muscles = part.muscles
 
-        def __len__(self):
-            return len(self.muscles)
+    def __len__(self):
+        return len(self.muscles)
+
+    def actuate(self, m_signal):
+        """Change the target lengths of the links to generate movement.
 
-        def actuate(self, m_signal):
-            """Change the target lengths of the links to generate movement.
+        :param m_signal:  motor signal, as one expand factor per muscle.
+        """
+        for muscle, ms_i in zip(self.muscles, m_signal):
+            muscle.contract(ms_i)
 
-            :param m_signal:  motor signal, as two values, α and β. α controls the bend, can be negative
-                              or positive, and its neutral value is 0. β controls the height of the
-                              section, must be positive, and its neutral value is one.
-            """
-            for muscle, ms_i in zip(self.muscles, m_signal):
-                muscle.contract(ms_i)
+    def relax(self):
+        """Return the target lengths of the links of the section to their relax lengths"""
+        for muscle in self.muscles:
+            muscle.relax()
 
-        def relax(self):
-            """Return the target lengths of the links of the section to their relax lengths"""
-            for muscle in self.muscles:
-                muscle.relax()
+    def actuation_terms(self, offset):
+        return [(muscle, (offset + i, 0.0, 1.0), NO_TERM) for i, muscle in enumerate(self.muscles)]
 
 
 class SectionOneMuscle:
@@ -56,6 +62,10 @@ class SectionOneMuscle:
         self.left_muscle .relax()
         self.right_muscle.relax()
 
+    def actuation_terms(self, offset):
+        return [(self.left_muscle,  (offset, 1.0, -1.0), NO_TERM),
+                (self.right_muscle, (offset, 1.0,  1.0), NO_TERM)]
+
 
 class SectionTwoMuscles:
     """Make antagonist external muscles work together in a section.
@@ -88,6 +98,11 @@ class SectionTwoMuscles:
         self.left_muscle .relax()
         self.right_muscle.relax()
 
+    def actuation_terms(self, offset):
+        β = (offset + 1, 0.0, 1.0)
+        return [(self.left_muscle,  (offset, 1.0, -1.0), β),
+                (self.right_muscle, (offset, 1.0,  1.0), β)]
+
 
 class MuscleBroadcast:
     """Broadcast the same motor activation to different muscle classes"""
@@ -111,16 +126,21 @@ class MuscleBroadcast:
         for group in self.groups:
             group.relax()
 
+    def actuation_terms(self, offset):
+        return [term for group in self.groups for term in group.actuation_terms(offset)]
+
 
 class MuscleInterface:
 
     def __init__(self, groups):
         self.groups = list(groups)
         self.length = sum(len(group) for group in self.groups)
+        self.actuation_map = None
 
     def add_group(self, group):
         self.groups.append(group)
         self.length += len(group)
+        self.actuation_map = None
 
     def __len__(self):
         return self.length
@@ -133,6 +153,9 @@ class MuscleInterface:
 
         :param m_signal:  motor signal, as a list of scalar values.
         """
+        if self.actuation_map is not None:
+            self.actuation_map.actuate(m_signal)
+            return
         assert self.length == len(m_signal)
         offset = 0
         for group in self.groups:
@@ -141,5 +164,29 @@ class MuscleInterface:
 
     def relax(self):
         """Return the target lengths of the links of the groups to their relax lengths"""
+        if self.actuation_map is not None:
+            self.actuation_map.relax()
+            return
         for group in self.groups:
             group.relax()
+
+    def actuation_terms(self, offset):
+        terms = []
+        for group in self.groups:
+            terms.extend(group.actuation_terms(offset))
+            offset += len(group)
+        return terms
+
+    def compile(self, space):
+        """Compile the muscle groups into a native actuation map of `space`.
+
+        `actuate` and `relax` then run in a single native call, whatever the number of groups.
+        The groups must not change afterwards; `add_group` discards the compiled map.
+        """
+        terms = self.actuation_terms(0)
+        links   = [link for link, _, _ in terms]
+        inputs  = [(a[0], b[0]) for _, a, b in terms]
+        offsets = [(a[1], b[1]) for _, a, b in terms]
+        coefs   = [(a[2], b[2]) for _, a, b in terms]
+        self.actuation_map = space.add_actuation_map(self.length, links, inputs, offsets, coefs)
+        return self.actuation_map
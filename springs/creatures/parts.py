@@ -1,39 +1,155 @@
+import itertools
 import math
-import copy
 
 from .. import utils
 
 
+class PendingNode:
+    """A node of a `Builder`, not yet added to the space. `index` and `handle` are set when the
+    builder is flushed."""
+    __slots__ = ('x', 'y', 'material', 'index', 'handle')
+
+    def __init__(self, x, y, material):
+        self.x, self.y, self.material = x, y, material
+        self.index, self.handle = None, None
+
+
+class PendingLink:
+    """A link of a `Builder`, not yet added to the space. `handle` is set when the builder is
+    flushed."""
+    __slots__ = ('node_a', 'node_b', 'material', 'handle')
+
+    def __init__(self, node_a, node_b, material):
+        self.node_a, self.node_b, self.material = node_a, node_b, material
+        self.handle = None
+
+    @property
+    def actuated(self):
+        return self.material.get('actuated', False)
+
+
+def _handle(item):
+    return item.handle if isinstance(item, (PendingNode, PendingLink)) else item
+
+
+def _link_kind(link):
+    return link.material.get('type', 'link'), frozenset(link.material)
+
+
+class Builder:
+    """Collect the nodes and links of a creature, to add them all to the space at once: one
+    `add_nodes` and one `add_links` call, as long as the materials have the same parameters.
+    Materials of type 'spring' are added one by one, through `space.add_spring`.
+
+    Parts built with a builder hold `PendingNode` and `PendingLink` placeholders until it is
+    flushed; their `_bind` method then replaces the placeholders by the space's handles.
+    """
+
+    def __init__(self, space):
+        self.space = space
+        self.nodes, self.links = [], []
+
+    def add_node(self, x, y, material):
+        node = PendingNode(x, y, material)
+        self.nodes.append(node)
+        return node
+
+    def add_link(self, node_a, node_b, material):
+        """Link two Nodes or PendingNodes."""
+        link = PendingLink(node_a, node_b, material)
+        self.links.append(link)
+        return link
+
+    def flush(self):
+        """Add the pending nodes, then the pending links, to the space, in order."""
+        for keys, run in itertools.groupby(self.nodes, key=lambda node: frozenset(node.material)):
+            run = list(run)
+            params = {key: [node.material[key] for node in run] for key in keys}
+            indices = self.space.add_nodes([(node.x, node.y) for node in run], **params)
+            for node, index in zip(run, indices):
+                node.index = index
+        node_handles = self.space.nodes
+        for node in self.nodes:
+            node.handle = node_handles[node.index]
+
+        for (kind, keys), run in itertools.groupby(self.links, key=_link_kind):
+            run, keys = list(run), keys - {'type'}
+            if kind == 'spring':
+                for link in run:
+                    params = {key: link.material[key] for key in keys}
+                    link.handle = self.space.add_spring(_handle(link.node_a),
+                                                        _handle(link.node_b), **params)
+                continue
+            params = {key: [link.material[key] for link in run] for key in keys}
+            indices = self.space.add_links([(_handle(link.node_a), _handle(link.node_b))
+                                            for link in run], **params)
+            link_handles = self.space.links
+            for link, position in zip(run, self.space.link_positions(indices)):
+                link.handle = link_handles[position]
+        self.nodes, self.links = [], []
+
+    def handles(self, value):
+        """Replace the flushed placeholders of `value`, a node or link, or a list, tuple or dict
+        of them, by their handles."""
+        if isinstance(value, dict):
+            return {key: _handle(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(_handle(item) for item in value)
+        return _handle(value)
+
+
+def set_body(space, nodes, body):
+    """Assign `nodes`, Nodes or node indices, to `body`, for self-collisions (see
+    `space.set_self_collision`). Does nothing if `body` is None. Only the 'cpp' engine has node
+    bodies."""
+    if body is None:
+        return
+    if not hasattr(space, 'node_bodies'):
+        raise ValueError("node bodies are only available with the 'cpp' engine")
+    space.node_bodies[[getattr(node, 'index', node) for node in nodes]] = body
+
+
 class Tip:
     default_materials = {
         'node_tip': {'mass': 1.0, 'friction': 0.5, 'fixed': False},
         'link_tip': {'stiffness':  500000.0, 'damping_ratio': 1.0, 'actuated': False}}
 
 
-    def __init__(self, space, base, height, materials=None):
+    def __init__(self, space, base, height, materials=None, builder=None):
         self.space, self.base, self._height = space, base, height
         self.materials = materials if materials is not None else self.default_materials
 
         self.nodes, self.links = list(self.base), []
         self.node_map, self.link_map = {'tip': None}, {}
 
-        self._build()
-        self.muscles = [link for link in self.links if link.actuated]
-        self.springs = [link for link in self.links if not link.actuated]
+        bulk = builder if builder is not None else Builder(space)
+        self._build(bulk)
+        if builder is None:
+            bulk.flush()
+            self._bind(bulk)
 
 
-    def _build(self):
+    def _build(self, builder):
         """Create the node and links of the section"""
         x, y = utils.pos_rel(0, self.height, self.base[0], self.base[-1])
-        node = self.space.add_node(x, y, **self.materials['node_tip'])
+        node = builder.add_node(x, y, self.materials['node_tip'])
         self.nodes.append(node)
         self.new_nodes = [node]
         self.node_map['tip'] = node
 
-        for i, base_node in enumerate(self.base):
-            link = self.space.add_link(base_node, node, **self.materials['link_tip'])
-            self.links.append(link)
+        for base_node in self.base:
+            self.links.append(builder.add_link(base_node, node, self.materials['link_tip']))
+
+    def _bind(self, builder):
+        """Replace the pending nodes and links by their handles, once `builder` is flushed."""
+        self.base, self.nodes = builder.handles(self.base), builder.handles(self.nodes)
+        self.new_nodes = builder.handles(self.new_nodes)
+        self.node_map = builder.handles(self.node_map)
+        self.links = [link.handle for link in self.links]
+        for i, link in enumerate(self.links):
             self.link_map['tiplink_{}'.format(i)] = link
+        self.muscles = [link for link in self.links if link.actuated]
+        self.springs = [link for link in self.links if not link.actuated]
 
     # Height and width
     @property
@@ -78,7 +194,7 @@ class Section:
         'link_sec_width'   : {'stiffness':   12000.0, 'damping_ratio': 1.0, 'actuated': False},
         'link_sec_side'    : {'stiffness':    3000.0, 'damping_ratio': 1.0, 'actuated':  True}}
 
-    def __init__(self, space, base, height, width, materials=None):
+    def __init__(self, space, base, height, width, materials=None, builder=None):
         self.space, self._base     = space, base
         self._height, self._width = height, width
         self.materials = materials if materials is not None else self.default_materials
@@ -86,6 +202,7 @@ class Section:
         self.nodes, self.links = [base[0], base[1]], []
         self.new_nodes = []
         self.muscles, self.springs = [], []
+        self._pending_links = []  # (link, material_name, name), until the builder is flushed
 
         self.node_map = {'base_left': base[0], 'base_right': base[-1],
                           'top_left': None,     'top_right': None}
@@ -93,7 +210,11 @@ class Section:
                            #'diag_LR': None, 'diag_RL': None}
         self.link_by_mat = {name: [] for name in self.materials.keys() if name.startswith('link_')}
 
-        self._build()
+        bulk = builder if builder is not None else Builder(space)
+        self._build(bulk)
+        if builder is None:
+            bulk.flush()
+            self._bind(bulk)
 
 
     ## Read-only properties
@@ -168,15 +289,22 @@ class Section:
         for link in self.muscles:
             link.relax()
 
-    def _make_link(self, node_a, node_b, material_name, name=None):
-        materials = copy.deepcopy(self.materials[material_name])
-        link_type = materials.pop('type', 'link')
-        add_link_map = {'link': self.space.add_link}
-        if hasattr(self.space, 'add_spring'):
-            add_link_map['spring'] = self.space.add_spring
-
-        link = add_link_map[link_type](node_a, node_b, **materials)
+    def _bind(self, builder):
+        """Replace the pending nodes by their handles and register the links, once `builder` is
+        flushed."""
+        self._base, self.nodes = builder.handles(self._base), builder.handles(self.nodes)
+        self.new_nodes = builder.handles(self.new_nodes)
+        self.node_map = builder.handles(self.node_map)
+        for link, material_name, name in self._pending_links:
+            self._register_link(link.handle, material_name, name)
+        self._pending_links = []
+
+    def _make_link(self, builder, node_a, node_b, material_name, name=None):
+        link = builder.add_link(node_a, node_b, self.materials[material_name])
+        self._pending_links.append((link, material_name, name))
+        return link
 
+    def _register_link(self, link, material_name, name=None):
         self.links.append(link)
         self.link_by_mat[material_name].append(link)
         if name is not None:
@@ -190,7 +318,7 @@ class Section:
         return link
 
     # Creating the section
-    def _build(self):
+    def _build(self, builder):
         """Create the node and links of the section"""
         base_d = utils.distance(self.base[0], self.base[-1])
         assert base_d > 0
@@ -201,8 +329,8 @@ class Section:
 
         x_left,  y_left  = utils.pos_rel(-self.width/2, y, self.base[0], self.base[-1])
         x_right, y_right = utils.pos_rel( self.width/2, y, self.base[0], self.base[-1])
-        n_left  = self.space.add_node(x_left,  y_left,  **self.materials['node_section'])
-        n_right = self.space.add_node(x_right, y_right, **self.materials['node_section'])
+        n_left  = builder.add_node(x_left,  y_left,  self.materials['node_section'])
+        n_right = builder.add_node(x_right, y_right, self.materials['node_section'])
         self.nodes.extend([n_left, n_right])
         self.new_nodes = [n_left, n_right]
 
@@ -210,13 +338,13 @@ class Section:
         self.node_map['top_right'] = n_right
 
         # diagonal "X" links
-        self._make_link(self.base[ 0], n_right, 'link_sec_diag',  name='diag_LR')
-        self._make_link(self.base[-1],  n_left, 'link_sec_diag',  name='diag_RL')
+        self._make_link(builder, self.base[ 0], n_right, 'link_sec_diag',  'diag_LR')
+        self._make_link(builder, self.base[-1],  n_left, 'link_sec_diag',  'diag_RL')
         # height (side) links
-        self._make_link(self.base[ 0],  n_left, 'link_sec_side',  name='left')
-        self._make_link(self.base[-1], n_right, 'link_sec_side',  name='right')
+        self._make_link(builder, self.base[ 0],  n_left, 'link_sec_side',  'left')
+        self._make_link(builder, self.base[-1], n_right, 'link_sec_side',  'right')
         # width (internal) link
-        self._make_link(n_left,       n_right, 'link_sec_width', name='width')
+        self._make_link(builder, n_left,        n_right, 'link_sec_width', 'width')
 
 
 class CentralBoneSection(Section):
@@ -237,7 +365,7 @@ class CentralBoneSection(Section):
                 self.node_map['top_right'])
 
     # Creating the section
-    def _build(self):
+    def _build(self, builder):
         """Create the node and links of the section"""
         b_left, b_middle, b_right = self.base
         base_d = utils.distance(b_left, b_right)
@@ -250,9 +378,9 @@ class CentralBoneSection(Section):
         x_right , y_right  = utils.pos_rel( self.width/2, y, self.base[0], self.base[-1])
         x_middle, y_middle = utils.pos_rel(  0, self.height, self.base[0], self.base[-1])
 
-        n_left   = self.space.add_node(x_left,   y_left,   **self.materials['node_section'])
-        n_right  = self.space.add_node(x_right,  y_right,  **self.materials['node_section'])
-        n_middle = self.space.add_node(x_middle, y_middle, **self.materials['node_section'])
+        n_left   = builder.add_node(x_left,   y_left,   self.materials['node_section'])
+        n_right  = builder.add_node(x_right,  y_right,  self.materials['node_section'])
+        n_middle = builder.add_node(x_middle, y_middle, self.materials['node_section'])
         self.nodes.extend([n_left, n_middle, n_right])
         self.new_nodes = [n_left, n_middle, n_right]
 
@@ -261,23 +389,20 @@ class CentralBoneSection(Section):
         self.node_map['top_middle'] = n_middle
 
         # diagonal "X" links
-        self._make_link(self.base[0], n_middle, 'link_sec_diag',     name='diag_LM')
-        self._make_link(self.base[1], n_left,   'link_sec_diag',     name='diag_ML')
-        self._make_link(self.base[1], n_right,  'link_sec_diag',     name='diag_MR')
-        self._make_link(self.base[2], n_middle, 'link_sec_diag',     name='diag_RM')
-
+        self._make_link(builder, self.base[0], n_middle, 'link_sec_diag',     'diag_LM')
+        self._make_link(builder, self.base[1], n_left,   'link_sec_diag',     'diag_ML')
+        self._make_link(builder, self.base[1], n_right,  'link_sec_diag',     'diag_MR')
+        self._make_link(builder, self.base[2], n_middle, 'link_sec_diag',     'diag_RM')
         #
-        self._make_link(self.base[0], n_right,  'link_sec_big_diag', name='diag_LR')
-        self._make_link(self.base[2], n_left,   'link_sec_big_diag', name='diag_RL')
-
+        self._make_link(builder, self.base[0], n_right,  'link_sec_big_diag', 'diag_LR')
+        self._make_link(builder, self.base[2], n_left,   'link_sec_big_diag', 'diag_RL')
         # height (side) links
-        self._make_link(self.base[0], n_left,   'link_sec_side',     name='left')
-        self._make_link(self.base[1], n_middle, 'link_sec_center',   name='middle')
-        self._make_link(self.base[2], n_right,  'link_sec_side',     name='right')
-
+        self._make_link(builder, self.base[0], n_left,   'link_sec_side',     'left')
+        self._make_link(builder, self.base[1], n_middle, 'link_sec_center',   'middle')
+        self._make_link(builder, self.base[2], n_right,  'link_sec_side',     'right')
         # width (internal) link
-        self._make_link(n_left,       n_middle, 'link_sec_width',    name='widthL')
-        self._make_link(n_middle,     n_right,  'link_sec_width',    name='widthR')
+        self._make_link(builder, n_left,       n_middle, 'link_sec_width',    'widthL')
+        self._make_link(builder, n_middle,     n_right,  'link_sec_width',    'widthR')
 
     # Height and width  # necessary to redefine?
     @property
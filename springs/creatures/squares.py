@@ -1,14 +1,17 @@
 import math
 import numpy as np
 
+from . import parts
+
 
 
 class SideLink:
 
     def __init__(self, space, nodeA, nodeB, frequency, damping=1.0, actuated=True,
-                       min_amp=0.5, max_amp=1.5):
-        self.link = space.add_link(nodeA, nodeB, frequency, damping_ratio=1.0,
-                                   actuated=actuated)
+                       min_amp=0.5, max_amp=1.5, link=None):
+        if link is None:
+            link = space.add_link(nodeA, nodeB, frequency, damping_ratio=1.0, actuated=actuated)
+        self.link = link
         self.min_amp, self.max_amp = min_amp, max_amp
         self.squares = []
 
@@ -33,7 +36,8 @@ class SideLink:
 class Square:
 
     def __init__(self, space, size, stiffness, neighbors, center, start_size,
-                       amp_limit=0.5, amp_factor=0.5, α_freq=20.0, β_freq=10.0, γ_stif=4, friction=0.5):
+                       amp_limit=0.5, amp_factor=0.5, α_freq=20.0, β_freq=10.0, γ_stif=4, friction=0.5,
+                       prebuilt=None):
         self.space = space
         self.nodeBL, self.nodeBR, self.nodeUL, self.nodeUR = None, None, None, None
         self.linkU,  self.linkB,  self.linkL,  self.linkR  = None, None, None, None
@@ -46,9 +50,12 @@ class Square:
         self.friction = friction
 
         self.m_signal = 0
-        self._create(center, start_size)
+        self._create(center, start_size, prebuilt)
 
-    def _create(self, center, start_size):
+    def _create(self, center, start_size, prebuilt=None):
+        """`prebuilt`, if not None, is a pair of iterators over nodes and links already added to
+        the space, from which the missing nodes and links are taken instead of being added, in
+        the order in which they would be added."""
         # populating the square with existing nodes and links
         if self.neighborU is not None:
             self.nodeUL, self.nodeUR = self.neighborU.nodeBL, self.neighborU.nodeBR
@@ -65,35 +72,49 @@ class Square:
 
         # creating missing nodes
         if self.nodeBL is None:
-            self.nodeBL = self.space.add_node(center[0] - start_size/2, center[1] - start_size/2, friction=self.friction)
+            self.nodeBL = self._add_node(center[0] - start_size/2, center[1] - start_size/2, prebuilt)
         if self.nodeBR is None:
-            self.nodeBR = self.space.add_node(center[0] + start_size/2, center[1] - start_size/2, friction=self.friction)
+            self.nodeBR = self._add_node(center[0] + start_size/2, center[1] - start_size/2, prebuilt)
         if self.nodeUL is None:
-            self.nodeUL = self.space.add_node(center[0] - start_size/2, center[1] + start_size/2, friction=self.friction)
+            self.nodeUL = self._add_node(center[0] - start_size/2, center[1] + start_size/2, prebuilt)
         if self.nodeUR is None:
-            self.nodeUR = self.space.add_node(center[0] + start_size/2, center[1] + start_size/2, friction=self.friction)
+            self.nodeUR = self._add_node(center[0] + start_size/2, center[1] + start_size/2, prebuilt)
 
         # creating missing side links
         if self.linkU is None:
             self.linkU = SideLink(self.space, self.nodeUL, self.nodeUR, self.freq, actuated=True,
-                                  min_amp=self.min_amp, max_amp=self.max_amp)
+                                  min_amp=self.min_amp, max_amp=self.max_amp,
+                                  link=self._add_link(self.nodeUL, self.nodeUR, prebuilt))
         self.linkU.squares.append(self)
         if self.linkB is None:
             self.linkB = SideLink(self.space, self.nodeBL, self.nodeBR, self.freq, actuated=True,
-                                  min_amp=self.min_amp, max_amp=self.max_amp)
+                                  min_amp=self.min_amp, max_amp=self.max_amp,
+                                  link=self._add_link(self.nodeBL, self.nodeBR, prebuilt))
         self.linkB.squares.append(self)
         if self.linkL is None:
             self.linkL = SideLink(self.space, self.nodeUL, self.nodeBL, self.freq, actuated=True,
-                                  min_amp=self.min_amp, max_amp=self.max_amp)
+                                  min_amp=self.min_amp, max_amp=self.max_amp,
+                                  link=self._add_link(self.nodeUL, self.nodeBL, prebuilt))
         self.linkL.squares.append(self)
         if self.linkR is None:
             self.linkR = SideLink(self.space, self.nodeUR, self.nodeBR, self.freq, actuated=True,
-                                  min_amp=self.min_amp, max_amp=self.max_amp)
+                                  min_amp=self.min_amp, max_amp=self.max_amp,
+                                  link=self._add_link(self.nodeUR, self.nodeBR, prebuilt))
         self.linkR.squares.append(self)
 
         # creating diagonal links
-        self.diagA = self.space.add_link(self.nodeUL, self.nodeBR, self.freq, actuated=True)
-        self.diagB = self.space.add_link(self.nodeUR, self.nodeBL, self.freq, actuated=True)
+        self.diagA = self._add_link(self.nodeUL, self.nodeBR, prebuilt)
+        self.diagB = self._add_link(self.nodeUR, self.nodeBL, prebuilt)
+
+    def _add_node(self, x, y, prebuilt):
+        if prebuilt is not None:
+            return next(prebuilt[0])
+        return self.space.add_node(x, y, friction=self.friction)
+
+    def _add_link(self, node_a, node_b, prebuilt):
+        if prebuilt is not None:
+            return next(prebuilt[1])
+        return self.space.add_link(node_a, node_b, self.freq, actuated=True)
 
     def actuate(self, m_signal):
         self.m_signal = self.amp_factor * m_signal
@@ -105,8 +126,9 @@ class FusedSquares:
 
     def __init__(self, space, square_size, square_stiffness,
                        damping=1.0, period=1.0, growth_factor=1.0, origin=(0, 0),
-                       amp_limit=0.4, α_freq=20.0, β_freq=10.0, γ_stif=4, **kwargs):
+                       amp_limit=0.4, α_freq=20.0, β_freq=10.0, γ_stif=4, body=None, **kwargs):
         self.space       = space
+        self.body        = body
         self.shape       = (len(square_size), len(square_size[0]))
         self.square_size = square_size
         self.square_stif = square_stiffness
@@ -120,6 +142,7 @@ class FusedSquares:
 
     def _create(self, origin):
         avg_size = self.growth_factor * np.mean(self.square_size)
+        prebuilt = self._build(origin, avg_size)
         temp_side_map = {}
         n, m = self.shape
 
@@ -136,7 +159,8 @@ class FusedSquares:
                     neighborU = self.square_matrix[i][j+1]
                 square = Square(self.space, self.square_size[i][j], self.square_stif[i][j],
                                 (neighborU, neighborB, neighborL, neighborR),
-                                (origin[0] + avg_size*(0.5 + i), origin[1] + avg_size*(0.5 + j)), avg_size)
+                                (origin[0] + avg_size*(0.5 + i), origin[1] + avg_size*(0.5 + j)), avg_size,
+                                prebuilt=prebuilt)
                 self.square_matrix[i][j] = square
                 for sidelink in [square.linkU, square.linkB, square.linkL, square.linkR]:
                     temp_side_map[id(sidelink)] = sidelink
@@ -145,6 +169,43 @@ class FusedSquares:
         for sidelink in self.sidelinks:
             sidelink.relax()
 
+    def _build(self, origin, avg_size, α_freq=20.0, β_freq=10.0):
+        """Add the nodes and links of all the squares with one `add_nodes` and one `add_links`
+        call, in the order in which the squares would add them, and return iterators over them."""
+        n, m = self.shape
+        avg_size = float(avg_size)
+        x_c = [origin[0] + avg_size*(0.5 + i) for i in range(n)]
+        y_c = [origin[1] + avg_size*(0.5 + j) for j in range(m)]
+        # lattice points are created as the upper right corner of a square, or, along the bottom
+        # and left edges, as the lower or left corner of the first square.
+        xs = [x_c[0] - avg_size/2] + [x + avg_size/2 for x in x_c]
+        ys = [y_c[0] - avg_size/2] + [y + avg_size/2 for y in y_c]
+        # the first column of squares creates the lattice columns 0 and 1, then one per square column.
+        order = ([(a, b) for b in range(m + 1) for a in (0, 1)] +
+                 [(a, b) for a in range(2, n + 1) for b in range(m + 1)])
+        first = len(self.space.nodes)
+        index = [[None] * (m + 1) for a in range(n + 1)]
+        for k, (a, b) in enumerate(order):
+            index[a][b] = first + k
+
+        pairs, stiffness = [], []
+        for i in range(n):
+            for j in range(m):
+                BL, BR, UL, UR = index[i][j], index[i+1][j], index[i][j+1], index[i+1][j+1]
+                pairs.append((UL, UR))
+                if j == 0:  # otherwise shared with the square below
+                    pairs.append((BL, BR))
+                if i == 0:  # otherwise shared with the square on the left
+                    pairs.append((UL, BL))
+                pairs += [(UR, BR), (UL, BR), (UR, BL)]
+                stiffness += (len(pairs) - len(stiffness)) * [α_freq * self.square_stif[i][j] + β_freq]
+
+        self.space.add_nodes([(xs[a], ys[b]) for a, b in order], friction=0.5)
+        parts.set_body(self.space, range(first, first + len(order)), self.body)
+        self.space.add_links(pairs, stiffness=stiffness, damping_ratio=1.0, actuated=True)
+        return (iter(self.space.nodes[first:]),
+                iter(self.space.links[len(self.space.links) - len(pairs):]))
+
 
     def actuate(self, m_signal):
         for i in range(self.shape[0]):
@@ -1,8 +1,10 @@
 from .. import utils
 from .tentacles import Tentacle, DevTentacle
 from .parts import Section
+from . import parts
 from . import motors
 import statistics
+import numpy as np
 
 
 class Starfish:
@@ -22,7 +24,7 @@ class Starfish:
     def __init__(self, space, arm_dimensions, center_pos, center_radius,
                        materials=None, tentacle_cls=Tentacle, section_cls=Section,
                        muscle_n_groups=None, muscle_cls=motors.SectionOneMuscle,
-                       sensor_cfg=None,
+                       sensor_cfg=None, body=None,
                        **kwargs):
         self.space = space
         self.center_radius = center_radius
@@ -38,15 +40,22 @@ class Starfish:
 
         self.links, self.springs, self.muscles = [], [], []
 
+        # the center and all the tentacles are added to the space at once.
+        builder = parts.Builder(space)
         self.tentacles = []
-        bases = self._create_center(center_pos, len(arm_dimensions), section_cls.base_size)
+        bases = self._create_center(center_pos, len(arm_dimensions), section_cls.base_size,
+                                    builder=builder)
         for arm_dim, base in zip(arm_dimensions, bases):
             heights, widths = zip(*arm_dim)
             if widths[-1] == 0:  # FIXME: 0?
                 widths = widths[:-1]
             tentacle = tentacle_cls(self.space, base, heights, widths, materials=self.materials,
-                                    section_cls=section_cls, **kwargs)
+                                    section_cls=section_cls, builder=builder, **kwargs)
             self.tentacles.append(tentacle)
+        builder.flush()
+        self.center = builder.handles(self.center)
+        for tentacle in self.tentacles:
+            tentacle._bind(builder)
 
         # FIXME: add center
         self.nodes = self.center[:]
@@ -57,6 +66,7 @@ class Starfish:
             self.springs.extend(tentacle.springs)
             self.muscles.extend(tentacle.muscles)
         self.new_nodes = self.nodes
+        parts.set_body(space, self.nodes, body)
 
         if muscle_n_groups is not None:
             self.create_muscle_interface(n_group=muscle_n_groups, muscle_cls=muscle_cls)
@@ -79,59 +89,67 @@ class Starfish:
         """
         self._controllers.append((fun, args, kwargs))
 
-    def _make_link(self, node_a, node_b, material_name):
-        link = self.space.add_link(node_a, node_b, **self.materials[material_name])
-        self.links.append(link)
+    def _make_links(self, builder, pairs, material_name):
+        for node_a, node_b in pairs:
+            self.links.append(builder.add_link(node_a, node_b, self.materials[material_name]))
 
-    def _create_center(self, center_pos, n_base, base_size=2):
+    def _create_center(self, center_pos, n_base, base_size=2, builder=None):
         """
         :param n_base:     number of bases
         :param base_size:  number of nodes per base
+        :param builder:    the nodes and links are added to this `parts.Builder`.
         """
         c_x, c_y = center_pos
         assert base_size > 1
         n = n_base * (base_size - 1)
         if n_base == 1:
             x, y = c_x + self.center_radius, c_y
-            self.center = [self.space.add_node(x, y, **self.materials['node_center'])]
+            self.center = [builder.add_node(x, y, self.materials['node_center'])]
             return [n_node*(self.center[0],)]
 
         nodes = utils.polygon(n, c_x, c_y, self.center_radius)
-        self.center = [self.space.add_node(x, y, **self.materials['node_center']) for x, y in nodes]
+        self.center = [builder.add_node(x, y, self.materials['node_center']) for x, y in nodes]
 
         if n_base == 2:
+            pairs = []
             for i in range(base_size-1):
-                self._make_link(self.center[i], self.center[i+1], 'link_center')
-                self._make_link(self.center[i+1], self.center[i], 'link_center')
+                pairs.append((self.center[i], self.center[i+1]))
+                pairs.append((self.center[i+1], self.center[i]))
+            self._make_links(builder, pairs, 'link_center')
             bases = []
             bases.append(tuple(self.center[i] for i in range(base_size)))
             bases.append(reversed(tuple(self.center[i] for i in range(base_size))))
             return bases
         else:
+            pairs = []
             for i, node in enumerate(self.center):
                 j1 = (i+1) % len(self.center)
                 j2 = (i+2) % len(self.center)
                 j3 = (i+len(self.center)//3) % len(self.center)
 
-                self._make_link(self.center[j1], node, 'link_center')
-                self._make_link(self.center[j2], node, 'link_center')
-                self._make_link(self.center[j3], node, 'link_center')
+                pairs.append((self.center[j1], node))
+                pairs.append((self.center[j2], node))
+                pairs.append((self.center[j3], node))
+            self._make_links(builder, pairs, 'link_center')
 
             return [tuple(self.center[(base_size-1)*j-i]
                     for i in range(base_size)) for j in range(n_base)]
 
-    def create_muscle_interface(self, n_group=2, muscle_cls=motors.SectionOneMuscle):
+    def create_muscle_interface(self, n_group=2, muscle_cls=motors.SectionOneMuscle, compile=False):
         """Create the muscle interface for the starfish. Look at the Tentacle class for details.
 
         :param n_group:     number of muscle groups. Each member of a group receive the same
                             activation.
         :param muscle_cls:  class of muscle interface for an individual section of a tentacle.
+        :param compile:     if True, compile the muscle interface into a native actuation map.
         """
         groups = []
         for tentacle in self.tentacles:
             tentacle.muscles_proximodistal(n_group, muscle_cls=muscle_cls)
             groups.append(tentacle.muscle_interface)
         self.muscle_interface = motors.MuscleInterface(groups)
+        if compile:
+            self.muscle_interface.compile(self.space)
         return self.muscle_interface
 
 
@@ -249,6 +267,18 @@ class DevStarfish(Starfish):
         for tentacle in self.tentacles:
             tentacle.width_dev_factor = factor
 
+    def compile_growth(self, times, height_dev_factors, width_dev_factors=None, period=1):
+        """Compile the development of all tentacles into a single native growth schedule,
+        restricted to the links whose relax length changes. See `DevTentacle.compile_growth`."""
+        links, keyframes = [], []
+        for tentacle in self.tentacles:
+            links.extend(tentacle.links)
+            keyframes.append(tentacle.growth_keyframes(height_dev_factors, width_dev_factors))
+        keyframes = np.concatenate(keyframes, axis=1)
+        growing = np.flatnonzero(np.any(keyframes != keyframes[:1], axis=0))
+        return self.space.add_growth_schedule([links[i] for i in growing], times,
+                                              keyframes[:, growing], period=period)
+
     def change_mass(self, new_mass):
         for node in self.nodes:
             node.mass = new_mass
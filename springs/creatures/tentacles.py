@@ -2,6 +2,7 @@ import copy
 
 from .. import utils
 from . import motors
+from . import parts
 from .parts import Section, Tip
 
 
@@ -41,28 +42,44 @@ class Tentacle:
         'link_sec_side'    : {'stiffness':    3000.0, 'damping_ratio': 1.0, 'actuated':  True},
         'link_tip'         : {'stiffness':  500000.0, 'damping_ratio': 1.0, 'actuated': False}}
 
-    def __init__(self, space, base, heights, widths, section_cls=Section, materials=None, **kwargs):
+    def __init__(self, space, base, heights, widths, section_cls=Section, materials=None,
+                 body=None, builder=None, **kwargs):
+        """If `builder` is given, the nodes and links are only added to it: the tentacle is
+        usable once the builder is flushed and `_bind` called. `body` is then ignored."""
         self.space, self._base = space, base
         self.materials = materials if materials is not None else self.default_materials
 
         self.size = len(widths)
         assert len(heights) in (self.size, self.size+1)
 
+        bulk = builder if builder is not None else parts.Builder(space)
         self.sections = []
         for i in range(self.size):
-            s = section_cls(space, base, heights[i], widths[i], materials=self.materials)
+            s = section_cls(space, base, heights[i], widths[i], materials=self.materials,
+                            builder=bulk)
             self.sections.append(s)
             base = s.forward_base
 
         self.tip = None
         if len(heights) == len(widths) + 1:
             tip_base = self.sections[-1].forward_base
-            self.tip = Tip(space, tip_base, heights[-1], materials=self.materials)
+            self.tip = Tip(space, tip_base, heights[-1], materials=self.materials, builder=bulk)
 
+        if builder is None:
+            bulk.flush()
+            self._bind(bulk)
+            parts.set_body(space, self.new_nodes, body)
+
+    def _bind(self, builder):
+        """Replace the pending nodes and links by their handles, once `builder` is flushed, and
+        gather those of the sections."""
+        self._base = builder.handles(self._base)
         self.nodes, self.links, self.springs, self.muscles = list(self.base), [], [], []
         for section in self.sections:
+            section._bind(builder)
             self._populate(section)
         if self.tip is not None:
+            self.tip._bind(builder)
             self._populate(self.tip)
         self.new_nodes = self.nodes[2:]  # excluding the base
 
@@ -111,7 +128,7 @@ class Tentacle:
         for section, v_i in zip(self.sections, value):
             section.change_damping(material_name, v_i)
 
-    def muscles_proximodistal(self, n_group=2, muscle_cls=motors.SectionOneMuscle):
+    def muscles_proximodistal(self, n_group=2, muscle_cls=motors.SectionOneMuscle, compile=False):
         """Create groups of muscles to be actuated together along the tentacle.
 
         The group are formed of the same type of muscles (e.g. witdh muscles, or left-height
@@ -123,6 +140,7 @@ class Tentacle:
         :param n_group:     number of muscle groups. Each member of a group receive the same
                             activation.
         :param muscle_cls:  class of muscle interface for an individual section.
+        :param compile:     if True, compile the muscle interface into a native actuation map.
         """
         groups = []
         self.section_groups = _even_divide(self.sections, n_group)
@@ -130,6 +148,8 @@ class Tentacle:
             mb = motors.MuscleBroadcast([muscle_cls(section) for section in group])
             groups.append(mb)
         self.muscle_interface = motors.MuscleInterface(groups)
+        if compile:
+            self.muscle_interface.compile(self.space)
 
 
 
@@ -171,3 +191,44 @@ class DevTentacle(Tentacle):
         for i, v_i in enumerate(value):
             self.sections[i].width = v_i * self.widths_one[i]
         self._width_dev_factor = value
+
+    def growth_keyframes(self, height_dev_factors, width_dev_factors=None):
+        """Relax lengths of the tentacle's links for a sequence of development factors, one row
+        per keyframe. The tentacle is left at its current development factors.
+
+        :param height_dev_factors:  height development factor of each keyframe, a scalar or a
+                                    per-section list, as for `height_dev_factor`.
+        :param width_dev_factors:   idem for the width. If None, the width is not changed.
+        """
+        if width_dev_factors is None:
+            width_dev_factors = [self.width_dev_factor] * len(height_dev_factors)
+        assert len(width_dev_factors) == len(height_dev_factors)
+
+        pieces = self.sections + ([self.tip] if self.tip is not None else [])
+        dev_factors = self._height_dev_factor, self._width_dev_factor
+        dimensions = [(piece._height, getattr(piece, '_width', None)) for piece in pieces]
+        relax_lengths = [link.relax_length for link in self.links]
+        keyframes = []
+        for height_factor, width_factor in zip(height_dev_factors, width_dev_factors):
+            self.height_dev_factor, self.width_dev_factor = height_factor, width_factor
+            keyframes.append([link.relax_length for link in self.links])
+
+        # restored as is: going through the setters again may round differently.
+        self._height_dev_factor, self._width_dev_factor = dev_factors
+        for piece, (height, width) in zip(pieces, dimensions):
+            piece._height = height
+            if width is not None:
+                piece._width = width
+        for link, relax_length in zip(self.links, relax_lengths):
+            link.relax_length = relax_length
+        return keyframes
+
+    def compile_growth(self, times, height_dev_factors, width_dev_factors=None, period=1):
+        """Compile the development of the tentacle into a native growth schedule: at time
+        `times[k]`, the tentacle has the development factors of keyframe k, and the engine
+        interpolates the relax lengths in between. Only available with the 'cpp' engine.
+
+        The `height_dev_factor` and `width_dev_factor` properties are not updated by the schedule.
+        """
+        keyframes = self.growth_keyframes(height_dev_factors, width_dev_factors)
+        return self.space.add_growth_schedule(self.links, times, keyframes, period=period)
@@ -0,0 +1,33 @@
+"""Helpers shared by the engines: hook periods and the arguments of the bulk `add_nodes` and
+`add_links`."""
+
+
+def hook_periods(hooks, registered):
+    """Periods of `hooks`, from their registrations `registered`, a list of (hook, period) pairs.
+    The public hook lists may be edited directly: registrations of hooks no longer in the list are
+    dropped, and hooks appended to it directly run at every step."""
+    if len(hooks) == len(registered) and all(hook is hook_k for hook, (hook_k, _) in zip(hooks, registered)):
+        return [period for _, period in registered]
+    remaining, periods = list(registered), []
+    for hook in hooks:
+        for k, (hook_k, period) in enumerate(remaining):
+            if hook_k is hook:
+                periods.append(period)
+                del remaining[k]
+                break
+        else:
+            periods.append(1)
+    registered[:] = zip(hooks, periods)
+    return periods
+
+
+def broadcast(value, n):
+    """A sequence of `n` values, from a scalar or from a sequence."""
+    return list(value) if hasattr(value, '__len__') else n * [value]
+
+
+def check_pairs(values, what):
+    """Reject an array that is not (n, 2): its rows would not be (x, y) or (a, b) pairs."""
+    shape = getattr(values, 'shape', None)
+    if shape is not None and (len(shape) != 2 or shape[1] != 2):
+        raise ValueError('expected an (n, 2) array of {}, got shape {}'.format(what, shape))
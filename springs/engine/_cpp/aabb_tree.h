@@ -0,0 +1,239 @@
+#ifndef AABB_TREE_H
+#define AABB_TREE_H
+
+#include <vector>
+#include <cmath>
+#include <sys/types.h>
+
+
+using namespace std;
+
+namespace springs {
+
+  // Axis-aligned bounding box.
+  class AABB {
+    public:
+      double x_min, x_max, y_min, y_max;
+
+      AABB() : x_min(0), x_max(0), y_min(0), y_max(0) {}
+      AABB(double x_min, double x_max, double y_min, double y_max)
+        : x_min(x_min), x_max(x_max), y_min(y_min), y_max(y_max) {}
+
+      bool contains(double x, double y) const {
+        return x_min <= x && x <= x_max && y_min <= y && y <= y_max;
+      }
+      double perimeter() const {
+        return 2 * ((x_max - x_min) + (y_max - y_min));
+      }
+      AABB merge(const AABB &other) const {
+        return AABB(fmin(x_min, other.x_min), fmax(x_max, other.x_max),
+                    fmin(y_min, other.y_min), fmax(y_max, other.y_max));
+      }
+  };
+
+
+  /*  Dynamic bounding volume tree: a balanced binary tree of AABBs, whose leaves hold the
+   *  obstacles. Insertion, removal and move are O(log n), and so are point queries.
+   *
+   *  Leaves are designated by a proxy id, returned by `insert()`, and stable until `remove()`.
+   *  Insertion picks the sibling that least increases the perimeters of the tree, and the tree
+   *  is rebalanced by rotations on the way back up.
+   */
+  template <typename T>
+  class AABBTree {
+    public:
+      AABBTree() : _root(NONE), _free(NONE), _size(0) {}
+
+      size_t size() { return _size; }
+      int height() { return _root == NONE ? 0 : _nodes[_root].height; }
+
+      int insert(const AABB &box, const T &data) {
+        int leaf = _allocate();
+        _nodes[leaf].box = box;
+        _nodes[leaf].data = data;
+        _insert_leaf(leaf);
+        _size++;
+        return leaf;
+      }
+
+      void remove(int proxy) {
+        _remove_leaf(proxy);
+        _release(proxy);
+        _size--;
+      }
+
+      void move(int proxy, const AABB &box) {
+        _remove_leaf(proxy);
+        _nodes[proxy].box = box;
+        _insert_leaf(proxy);
+      }
+
+      T& data(int proxy) { return _nodes[proxy].data; }
+
+      // call `callback(T& data)` for each leaf whose box contains (x, y).
+      template <typename F>
+      void query(double x, double y, F callback) {
+        if (_root == NONE) { return; }
+        _stack.clear();
+        _stack.push_back(_root);
+        while (!_stack.empty()) {
+          int i = _stack.back();
+          _stack.pop_back();
+          if (!_nodes[i].box.contains(x, y)) { continue; }
+          if (_nodes[i].leaf()) { callback(_nodes[i].data); }
+          else {
+            _stack.push_back(_nodes[i].left);
+            _stack.push_back(_nodes[i].right);
+          }
+        }
+      }
+
+    private:
+      static const int NONE = -1;
+
+      struct TreeNode {
+        AABB box;
+        T data;
+        int parent;  // next free node, when in the free list.
+        int left, right;
+        int height;  // 0 for leaves.
+        bool leaf() const { return left == NONE; }
+      };
+
+      vector<TreeNode> _nodes;
+      vector<int> _stack;  // reused by queries.
+      int _root, _free;
+      size_t _size;
+
+      int _allocate() {
+        int i;
+        if (_free == NONE) {
+          i = _nodes.size();
+          _nodes.emplace_back();
+        } else {
+          i = _free;
+          _free = _nodes[i].parent;
+        }
+        _nodes[i].parent = _nodes[i].left = _nodes[i].right = NONE;
+        _nodes[i].height = 0;
+        return i;
+      }
+
+      void _release(int i) {
+        _nodes[i].parent = _free;
+        _nodes[i].height = -1;
+        _free = i;
+      }
+
+      void _replace_child(int parent, int old_child, int new_child) {
+        if (parent == NONE)                     { _root = new_child; }
+        else if (_nodes[parent].left == old_child) { _nodes[parent].left  = new_child; }
+        else                                    { _nodes[parent].right = new_child; }
+      }
+
+      // refit boxes and heights from `i` up to the root, rebalancing on the way.
+      void _refit(int i) {
+        while (i != NONE) {
+          i = _balance(i);
+          int left = _nodes[i].left, right = _nodes[i].right;
+          _nodes[i].height = 1 + max(_nodes[left].height, _nodes[right].height);
+          _nodes[i].box = _nodes[left].box.merge(_nodes[right].box);
+          i = _nodes[i].parent;
+        }
+      }
+
+      void _insert_leaf(int leaf) {
+        if (_root == NONE) {
+          _root = leaf;
+          _nodes[leaf].parent = NONE;
+          return;
+        }
+
+        // find the best sibling
+        const AABB box = _nodes[leaf].box;
+        int i = _root;
+        while (!_nodes[i].leaf()) {
+          const double combined = _nodes[i].box.merge(box).perimeter();
+          const double cost = 2 * combined;  // cost of a new parent for `i` and the leaf
+          const double inheritance = 2 * (combined - _nodes[i].box.perimeter());
+
+          double child_costs[2];
+          int children[2] = {_nodes[i].left, _nodes[i].right};
+          for (int k = 0; k < 2; k++) {
+            const TreeNode &child = _nodes[children[k]];
+            child_costs[k] = child.box.merge(box).perimeter() + inheritance;
+            if (!child.leaf()) { child_costs[k] -= child.box.perimeter(); }
+          }
+          if (cost < child_costs[0] && cost < child_costs[1]) { break; }
+          i = child_costs[0] < child_costs[1] ? children[0] : children[1];
+        }
+
+        // new parent for the sibling and the leaf
+        const int sibling = i;
+        const int old_parent = _nodes[sibling].parent;
+        const int new_parent = _allocate();
+        _nodes[new_parent].parent = old_parent;
+        _nodes[new_parent].box    = box.merge(_nodes[sibling].box);
+        _nodes[new_parent].height = _nodes[sibling].height + 1;
+        _nodes[new_parent].left   = sibling;
+        _nodes[new_parent].right  = leaf;
+        _replace_child(old_parent, sibling, new_parent);
+        _nodes[sibling].parent = new_parent;
+        _nodes[leaf].parent    = new_parent;
+
+        _refit(new_parent);
+      }
+
+      void _remove_leaf(int leaf) {
+        if (leaf == _root) {
+          _root = NONE;
+          return;
+        }
+        const int parent = _nodes[leaf].parent;
+        const int grand_parent = _nodes[parent].parent;
+        const int sibling = _nodes[parent].left == leaf ? _nodes[parent].right : _nodes[parent].left;
+
+        _replace_child(grand_parent, parent, sibling);
+        _nodes[sibling].parent = grand_parent;
+        _release(parent);
+        _refit(grand_parent);
+      }
+
+      // if `a` is unbalanced, rotate its higher child up. Return the root of the subtree.
+      int _balance(int a) {
+        if (_nodes[a].leaf() || _nodes[a].height < 2) { return a; }
+
+        const int b = _nodes[a].left, c = _nodes[a].right;
+        const int balance = _nodes[c].height - _nodes[b].height;
+        if (balance > 1)  { return _rotate(a, c, false); }
+        if (balance < -1) { return _rotate(a, b, true); }
+        return a;
+      }
+
+      // rotate `up`, a child of `a`, in place of `a`. `a` keeps the lowest child of `up`.
+      int _rotate(int a, int up, bool up_is_left) {
+        const int other = up_is_left ? _nodes[a].right : _nodes[a].left;
+        const int f = _nodes[up].left, g = _nodes[up].right;
+
+        _nodes[up].left = a;
+        _nodes[up].parent = _nodes[a].parent;
+        _nodes[a].parent = up;
+        _replace_child(_nodes[up].parent, a, up);
+
+        const int high = _nodes[f].height > _nodes[g].height ? f : g;
+        const int low  = high == f ? g : f;
+        _nodes[up].right = high;
+        if (up_is_left) { _nodes[a].left  = low; }
+        else            { _nodes[a].right = low; }
+        _nodes[low].parent = a;
+
+        _nodes[a].box     = _nodes[other].box.merge(_nodes[low].box);
+        _nodes[a].height  = 1 + max(_nodes[other].height, _nodes[low].height);
+        _nodes[up].box    = _nodes[a].box.merge(_nodes[high].box);
+        _nodes[up].height = 1 + max(_nodes[a].height, _nodes[high].height);
+        return up;
+      }
+  };
+}
+
+#endif
@@ -0,0 +1,48 @@
+#include <cmath>
+
+#include "activation.h"
+#include "space.h"
+
+
+namespace springs {
+
+  ActivationDynamics::ActivationDynamics(vector<uint> links, const double* expand_factor)
+    : links(links), time_constants(links.size(), 0.0), rate_limits(links.size(), INFINITY),
+      targets(links.size(), 1.0), states(links.size(), 1.0), _written(links.size(), 1.0) {
+    reset(expand_factor);
+  }
+
+  size_t ActivationDynamics::size() {
+    return links.size();
+  }
+
+  void ActivationDynamics::reset(const double* expand_factor) {
+    for (size_t i = 0; i < size(); i++) {
+      targets[i] = states[i] = _written[i] = expand_factor[links[i]];
+    }
+  }
+
+  void ActivationDynamics::update(Space& space) {
+    double* expand_factor = space.links.expand_factor;
+    const double dt = space.dt();
+    const size_t n = size();
+    for (size_t i = 0; i < n; i++) {
+      double &factor = expand_factor[links[i]];
+      if (factor != _written[i]) { targets[i] = factor; }  // written since the last step
+
+      double change = targets[i] - states[i];
+      if (time_constants[i] > 0) { change *= -expm1(-dt / time_constants[i]); }
+      const double max_change = rate_limits[i] * dt;
+      change = fmax(-max_change, fmin(change, max_change));
+
+      states[i] += change;
+      factor = states[i];
+    }
+  }
+
+  void ActivationDynamics::finish(Space& space) {
+    double* expand_factor = space.links.expand_factor;
+    const size_t n = size();
+    for (size_t i = 0; i < n; i++) { expand_factor[links[i]] = _written[i] = targets[i]; }
+  }
+}
@@ -0,0 +1,49 @@
+#ifndef ACTIVATION_H
+#define ACTIVATION_H
+
+#include <vector>
+#include <sys/types.h>
+
+
+using namespace std;
+
+namespace springs {
+
+  class Space;
+
+  /*  First-order activation dynamics of muscle links. The last expand factor written to a link,
+   *  by any controller, is its target; the state, the expand factor used by the physics, then
+   *  follows it each step, as
+   *
+   *      d state / dt = (target - state) / time_constant
+   *
+   *  integrated exactly over the step, its change being bounded by `rate_limit * dt`. A time
+   *  constant of zero follows the target instantly, and an infinite rate limit does not bound
+   *  it. A link should belong to a single ActivationDynamics.
+   *
+   *  The states are only in the expand factors during the physics of the step: the targets are
+   *  written back afterwards, so that any later write, even of the current state, is detected
+   *  as a new target.
+   */
+  class ActivationDynamics {
+    public:
+      ActivationDynamics(vector<uint> links, const double* expand_factor);
+
+      vector<uint> links;
+      vector<double> time_constants, rate_limits;
+      vector<double> targets, states;
+
+      size_t size();
+      // the current expand factors become the targets, and are reached instantly.
+      void reset(const double* expand_factor);
+      // before the physics: new targets, and states in the expand factors.
+      void update(Space& space);
+      // after the physics: targets back in the expand factors.
+      void finish(Space& space);
+
+    protected:
+      vector<double> _written;  // targets written back at the end of the last step.
+  };
+}
+
+#endif
@@ -0,0 +1,74 @@
+#include "actuation.h"
+#include "space.h"
+
+
+namespace springs {
+
+  Actuator::Actuator() : period(1) {}
+  Actuator::~Actuator() = default;
+
+  ActuationMap::ActuationMap(LinkArrays* links, size_t n_inputs)
+    : links(links), n_inputs(n_inputs) {}
+
+  size_t ActuationMap::size() {
+    return _links.size();
+  }
+
+  void ActuationMap::add(uint link, int input_a, double offset_a, double coef_a,
+                                    int input_b, double offset_b, double coef_b) {
+    _links.push_back(link);
+    _input_a.push_back(input_a);
+    _offset_a.push_back(offset_a);
+    _coef_a.push_back(coef_a);
+    _input_b.push_back(input_b);
+    _offset_b.push_back(offset_b);
+    _coef_b.push_back(coef_b);
+  }
+
+  void ActuationMap::actuate(const double* signal) {
+    double* expand_factor = links->expand_factor;
+    const size_t n = size();
+    for (size_t k = 0; k < n; k++) {
+      double factor = 1.0;
+      if (_input_a[k] >= 0) { factor = _offset_a[k] + _coef_a[k] * signal[_input_a[k]]; }
+      if (_input_b[k] >= 0) { factor *= _offset_b[k] + _coef_b[k] * signal[_input_b[k]]; }
+      expand_factor[_links[k]] = factor;
+    }
+  }
+
+  void ActuationMap::relax() {
+    for (auto& link: _links) { links->expand_factor[link] = 1.0; }
+  }
+
+  OutputActuator::OutputActuator(size_t n_outputs, vector<uint> links,
+                                 ActuationMap* actuation_map)
+    : links(links), actuation_map(actuation_map), outputs(n_outputs, 0.0) {}
+
+  void OutputActuator::_apply_outputs(Space& space) {
+    if (actuation_map) { actuation_map->actuate(outputs.data()); }
+    else {
+      const size_t n = links.size();
+      for (size_t i = 0; i < n; i++) { space.links.expand_factor[links[i]] = outputs[i]; }
+    }
+  }
+
+  Controller::Controller(ControllerFunction function, void* user_data,
+                         ActuationMap* actuation_map)
+    : function(function), user_data(user_data), actuation_map(actuation_map) {
+    if (actuation_map) { _outputs.resize(actuation_map->n_inputs); }
+  }
+
+  void Controller::actuate(Space& space) {
+    NodeArrays &nodes = space.nodes;
+    const vector<double> &sensors = space.sensors->values;
+    if (actuation_map) {
+      function(space.t, nodes.size(), nodes.x, nodes.y, nodes.v_x, nodes.v_y,
+               sensors.size(), sensors.data(), _outputs.size(), _outputs.data(), user_data);
+      actuation_map->actuate(_outputs.data());
+    } else {
+      function(space.t, nodes.size(), nodes.x, nodes.y, nodes.v_x, nodes.v_y,
+               sensors.size(), sensors.data(), space.links.size(), space.links.expand_factor,
+               user_data);
+    }
+  }
+}
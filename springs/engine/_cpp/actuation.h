@@ -0,0 +1,100 @@
+#ifndef ACTUATION_H
+#define ACTUATION_H
+
+#include <vector>
+#include <sys/types.h>
+
+#include "link.h"
+
+
+using namespace std;
+
+namespace springs {
+
+  class Space;
+
+  /*  Actuators run natively at the start of each step, every `period` steps, before the
+   *  physics, and act on the space through `actuate()`.
+   */
+  class Actuator {
+    public:
+      Actuator();
+      virtual ~Actuator();
+
+      uint period;
+
+      virtual void actuate(Space& space) = 0;
+  };
+
+  /*  Actuation map: a fixed mapping from a motor signal vector to the expand factors of links.
+   *
+   *  The expand factor of each mapped link is the product of up to two affine terms of the
+   *  signal, `(offset + coef * signal[input])`. A term whose input is negative is skipped. This
+   *  covers the 1 ± α (one input) and (1 ± α)·β (two inputs) muscle pairs, and direct mappings.
+   */
+  class ActuationMap {
+    public:
+      ActuationMap(LinkArrays* links, size_t n_inputs);
+
+      LinkArrays* links;
+      size_t n_inputs;
+
+      size_t size();  // number of mapped links.
+      void add(uint link, int input_a, double offset_a, double coef_a,
+                          int input_b, double offset_b, double coef_b);
+
+      // set the expand factors of the mapped links from `signal`, of size `n_inputs`.
+      void actuate(const double* signal);
+      void relax();
+
+    protected:
+      vector<uint> _links;
+      vector<int> _input_a, _input_b;
+      vector<double> _offset_a, _coef_a, _offset_b, _coef_b;
+  };
+
+
+  /*  Actuator producing one output per link of `links`, written to their expand factors, or,
+   *  with an actuation map, one output per input of the map, used as its motor signal.
+   */
+  class OutputActuator : public Actuator {
+    public:
+      OutputActuator(size_t n_outputs, vector<uint> links, ActuationMap* actuation_map);
+
+      vector<uint> links;
+      ActuationMap* actuation_map;  // NULL to write the expand factors of `links`.
+      vector<double> outputs;
+
+    protected:
+      void _apply_outputs(Space& space);
+  };
+
+
+  // Native control law: reads the time, the node state and the sensor values, and writes
+  // `n_outputs` values in `outputs`.
+  typedef void (*ControllerFunction)(double t, size_t n_nodes,
+                                     const double* x, const double* y,
+                                     const double* v_x, const double* v_y,
+                                     size_t n_sensors, const double* sensors,
+                                     size_t n_outputs, double* outputs, void* user_data);
+
+  /*  Actuator calling a compiled control function. Without actuation map, the outputs are the
+   *  expand factors of all the links, written in place. With one, the outputs are its motor
+   *  signal.
+   */
+  class Controller : public Actuator {
+    public:
+      Controller(ControllerFunction function, void* user_data, ActuationMap* actuation_map);
+
+      ControllerFunction function;
+      void* user_data;
+      ActuationMap* actuation_map;  // NULL to write the expand factors directly.
+
+      void actuate(Space& space);
+
+    protected:
+      vector<double> _outputs;
+  };
+}
+
+#endif
@@ -0,0 +1,41 @@
+#include <exception>
+#include <mutex>
+
+#include "batch.h"
+
+
+namespace springs {
+
+  SpaceBatch::SpaceBatch(uint n_threads) : _pool(n_threads) {}
+
+  uint SpaceBatch::n_threads() {
+    return _pool.size();
+  }
+
+  void SpaceBatch::add_space(Space* space) {
+    spaces.push_back(space);
+  }
+
+  void SpaceBatch::step() {
+    _for_each_space([](Space* space) { space->step(); });
+  }
+
+  void SpaceBatch::step_n(uint n) {
+    _for_each_space([n](Space* space) { space->step_n(n); });
+  }
+
+  void SpaceBatch::_for_each_space(const function<void(Space*)> &task) {
+    // an exception escaping a worker thread would terminate the process: the first one is
+    // rethrown on the calling thread, once all the spaces are done.
+    exception_ptr error;
+    mutex error_mutex;
+    _pool.parallel_for(spaces.size(), [&](size_t i) {
+      try { task(spaces[i]); }
+      catch (...) {
+        lock_guard<mutex> lock(error_mutex);
+        if (!error) { error = current_exception(); }
+      }
+    });
+    if (error) { rethrow_exception(error); }
+  }
+}
@@ -0,0 +1,42 @@
+#ifndef BATCH_H
+#define BATCH_H
+
+#include <functional>
+#include <vector>
+#include <sys/types.h>
+
+#include "space.h"
+#include "threads.h"
+
+
+using namespace std;
+
+namespace springs {
+
+  /*  A set of independent spaces, stepped in parallel by a thread pool.
+   *
+   *  The batch does not own the spaces: they are owned by their Python wrappers.
+   */
+  class SpaceBatch {
+    public:
+      SpaceBatch(uint n_threads);
+
+      vector<Space*> spaces;
+
+      uint n_threads();
+      void add_space(Space* space);
+
+      // one step of every space.
+      void step();
+      // `n` steps of every space; each thread runs whole spaces, without synchronization.
+      void step_n(uint n);
+
+    protected:
+      ThreadPool _pool;
+
+      // run `task` on every space in parallel, and rethrow the first exception it raised.
+      void _for_each_space(const function<void(Space*)> &task);
+  };
+}
+
+#endif
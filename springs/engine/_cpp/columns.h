@@ -0,0 +1,58 @@
+#ifndef COLUMNS_H
+#define COLUMNS_H
+
+#include <vector>
+#include <memory>
+#include <cstddef>
+
+
+using namespace std;
+
+namespace springs {
+
+  /*  A table of `n_columns` arrays of equal length, stored column after column in a single
+   *  allocation. Each column is contiguous, and consecutive columns are exactly `capacity()`
+   *  elements apart, so that two adjacent columns (e.g. x and y) can be seen as a strided
+   *  (size, 2) array.
+   *
+   *  Pointers returned by `column()` are invalidated when the table grows. The storage is shared
+   *  with `storage()`: NumPy views hold it, so that a view taken before the table grew still
+   *  points to allocated memory.
+   */
+  template <typename T>
+  class Columns {
+    public:
+      Columns(size_t n_columns)
+        : _n_columns(n_columns), _size(0), _capacity(0), _data(make_shared<vector<T>>()) {}
+
+      size_t size()     const { return _size; }
+      size_t capacity() const { return _capacity; }
+
+      T* column(size_t k) { return _data->data() + k * _capacity; }
+      shared_ptr<void> storage() const { return _data; }
+
+      void reserve(size_t capacity) {
+        if (capacity <= _capacity) { return; }
+        auto data = make_shared<vector<T>>(_n_columns * capacity, T());
+        for (size_t k = 0; k < _n_columns; k++) {
+          for (size_t i = 0; i < _size; i++) {
+            (*data)[k * capacity + i] = (*_data)[k * _capacity + i];
+          }
+        }
+        _data = data;
+        _capacity = capacity;
+      }
+
+      // Append a row of default values and return its index.
+      size_t push_back() {
+        if (_size == _capacity) { reserve(_capacity == 0 ? 16 : 2 * _capacity); }
+        return _size++;
+      }
+
+    private:
+      size_t _n_columns, _size, _capacity;
+      shared_ptr<vector<T>> _data;
+  };
+}
+
+#endif
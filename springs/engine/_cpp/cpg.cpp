@@ -0,0 +1,44 @@
+#include <cmath>
+
+#include "cpg.h"
+#include "space.h"
+
+
+namespace springs {
+
+  const double TWO_PI = 6.283185307179586;
+
+  CPG::CPG(size_t n, vector<uint> links, ActuationMap* actuation_map)
+    : OutputActuator(n, links, actuation_map),
+      amplitudes(n, 0.0), frequencies(n, 0.0), offsets(n, 0.0), phase_offsets(n, 0.0),
+      weights(n * n, 0.0), phase_biases(n * n, 0.0), phases(n, 0.0), _d_phases(n, 0.0) {}
+
+  size_t CPG::size() {
+    return phases.size();
+  }
+
+  void CPG::reset() {
+    phases = phase_offsets;
+  }
+
+  void CPG::actuate(Space& space) {
+    const size_t n = size();
+    for (size_t i = 0; i < n; i++) { outputs[i] = offsets[i] + amplitudes[i] * sin(phases[i]); }
+    _apply_outputs(space);
+
+    // advance the phases to the next actuation; kept in [0, 2π) against precision loss.
+    const double h = period * space.dt();
+    for (size_t i = 0; i < n; i++) {
+      double d_phase = TWO_PI * frequencies[i];
+      for (size_t j = 0; j < n; j++) {
+        const double w = weights[i * n + j];
+        if (w != 0.0) { d_phase += w * sin(phases[j] - phases[i] - phase_biases[i * n + j]); }
+      }
+      _d_phases[i] = d_phase;
+    }
+    for (size_t i = 0; i < n; i++) {
+      phases[i] = fmod(phases[i] + h * _d_phases[i], TWO_PI);
+      if (phases[i] < 0) { phases[i] += TWO_PI; }
+    }
+  }
+}
@@ -0,0 +1,47 @@
+#ifndef CPG_H
+#define CPG_H
+
+#include <vector>
+#include <sys/types.h>
+
+#include "actuation.h"
+
+
+using namespace std;
+
+namespace springs {
+
+  /*  Central pattern generator: coupled phase oscillators, each producing
+   *
+   *      output_i = offset_i + amplitude_i * sin(phase_i)
+   *
+   *  and integrated as
+   *
+   *      d phase_i / dt = 2π frequency_i + Σ_j weight_ij sin(phase_j - phase_i - phase_bias_ij)
+   *
+   *  with explicit Euler steps of `period * dt`. Without coupling, phase_i = 2π frequency_i t
+   *  + phase_offset_i. The outputs are written to the expand factors of `links` (one link per
+   *  oscillator) or, with an actuation map, are its motor signal.
+   *
+   *  The parameters are plain arrays, that can be rewritten at any time: weights and phase
+   *  biases are n × n matrices, in row-major order.
+   */
+  class CPG : public OutputActuator {
+    public:
+      CPG(size_t n, vector<uint> links, ActuationMap* actuation_map);
+
+      vector<double> amplitudes, frequencies, offsets, phase_offsets;
+      vector<double> weights, phase_biases;
+      vector<double> phases;
+
+      size_t size();
+      // reset the phases to the phase offsets.
+      void reset();
+      void actuate(Space& space);
+
+    protected:
+      vector<double> _d_phases;
+  };
+}
+
+#endif
@@ -1,21 +1,157 @@
 # cython: language_level=3, boundscheck=False
 # distutils: language = c++
 # cython: infer_types=True
+# cython: freethreading_compatible=True
 
 from libcpp cimport bool
 from libcpp.vector cimport vector
+from libcpp.memory cimport shared_ptr
+from cpython.buffer cimport PyBuffer_FillInfo
+
+import ctypes
+
+import numpy as np
+
+from springs.engine._common import hook_periods
 
 
 # objects
-from space cimport Node   as CppNode
-from space cimport Link   as CppLink
-from space cimport Spring as CppSpring
 from space cimport Space  as CppSpace
+from space cimport SpaceBatch as CppSpaceBatch
+# obstacles
+from space cimport Rect     as CppRect
+from space cimport Triangle as CppTriangle
 # sensors
 from space cimport Sensor                as CppSensor
 from space cimport AngleSensor           as CppAngleSensor
 from space cimport AngularVelocitySensor as CppAngularVelocitySensor
 from space cimport TouchSensor           as CppTouchSensor
+# actuation
+from space cimport ActuationMap as CppActuationMap
+from space cimport Controller   as CppController
+from space cimport ControllerFunction
+from space cimport CPG          as CppCPG
+from space cimport MLP          as CppMLP
+from space cimport GrowthSchedule as CppGrowthSchedule
+from space cimport Playback     as CppPlayback
+from space cimport LINEAR, CUBIC
+from space cimport ActivationDynamics as CppActivationDynamics
+from space cimport Drag           as CppDrag
+from space cimport PointAttractor as CppPointAttractor
+from space cimport NodeForces     as CppNodeForces
+
+
+cdef class _SpaceOwner:
+    """Owner of a native space. The Space, its handles and its NumPy views all hold it, so that
+    the native space is deleted after the last of them."""
+
+    cdef CppSpace *c_space
+
+    def __dealloc__(self):
+        del self.c_space
+
+
+cdef class _Buffer:
+    """Native memory exported to a NumPy view, its base. It keeps the native space alive, and the
+    `storage` of the arrays it is in, which the space may since have reallocated."""
+
+    cdef void *data
+    cdef Py_ssize_t n_bytes
+    cdef _SpaceOwner owner
+    cdef vector[shared_ptr[void]] storage
+
+    def __getbuffer__(self, Py_buffer *buffer, int flags):
+        PyBuffer_FillInfo(buffer, self, self.data, self.n_bytes, 0, flags)
+
+    def __releasebuffer__(self, Py_buffer *buffer):
+        pass
+
+
+cdef object _column_view(_SpaceOwner owner, vector[shared_ptr[void]] storage, void *data,
+                         size_t n, size_t n_columns, size_t column_stride, object dtype,
+                         bint writeable):
+    """NumPy view on `n_columns` adjacent columns of a native table (see columns.h), of shape
+    (n,) for one column, or (n, n_columns). `column_stride` is the distance between two
+    columns, in elements."""
+    dtype = np.dtype(dtype)
+    shape = (n,) if n_columns == 1 else (n, <object> n_columns)
+    cdef _Buffer buffer
+    if n == 0:
+        view = np.empty(shape, dtype=dtype)
+    else:
+        buffer = _Buffer.__new__(_Buffer)
+        buffer.owner, buffer.storage, buffer.data = owner, storage, data
+        buffer.n_bytes = ((n_columns - 1) * column_stride + n) * dtype.itemsize
+        view = np.ndarray(shape, dtype=dtype, buffer=buffer,
+                          strides=(dtype.itemsize, column_stride * dtype.itemsize)[:n_columns])
+    view.flags.writeable = writeable
+    return view
+
+
+cdef vector[double] _double_vector(values, size_t n) except *:
+    """`n` values, from a scalar, a sequence or an array of size n."""
+    cdef vector[double] vector_
+    cdef const double[:] view
+    if isinstance(values, np.ndarray) and values.ndim > 0:
+        if values.shape != (n,):
+            raise ValueError('expected {} values, got shape {}'.format(n, values.shape))
+        view = np.ascontiguousarray(values, dtype=np.float64)
+        if n > 0:
+            vector_.assign(&view[0], &view[0] + n)
+        return vector_
+    if not hasattr(values, '__len__'):
+        vector_.assign(n, values)
+        return vector_
+    if <size_t> len(values) != n:
+        raise ValueError('expected {} values, got {}'.format(n, len(values)))
+    for value in values:
+        vector_.push_back(value)
+    return vector_
+
+
+cdef vector[char] _bool_vector(values, size_t n) except *:
+    cdef vector[char] vector_
+    for value in _double_vector(values, n):
+        vector_.push_back(value != 0)
+    return vector_
+
+
+cdef vector[unsigned int] _uint_vector(values, size_t n) except *:
+    cdef vector[unsigned int] vector_
+    cdef double value
+    for value in _double_vector(values, n):
+        if not 0 <= value < 4294967296.0 or value != <double> <unsigned int> value:
+            raise ValueError('expected non-negative integers, got {}'.format(value))
+        vector_.push_back(<unsigned int> value)
+    return vector_
+
+
+cdef Node _new_node(_SpaceOwner owner, unsigned int index):
+    cdef Node node = Node.__new__(Node)
+    node.c_space, node._owner = owner.c_space, owner
+    node.index = index
+    return node
+
+
+cdef Link _new_link(_SpaceOwner owner, unsigned int index, Node node_a, Node node_b):
+    cdef Link link = Link.__new__(Link, node_a, node_b)
+    link.c_space, link._owner = owner.c_space, owner
+    link.index = index
+    return link
+
+
+cdef object _node_index(node):
+    if isinstance(node, Node):
+        return (<Node> node).index
+    return node
+
+
+cdef object _link_index(link):
+    if isinstance(link, Spring):
+        raise TypeError('springs are not part of the link table')
+    if isinstance(link, Link):
+        return (<Link> link).index
+    return link
 
 
 # cdef extern from "math.h":
@@ -27,70 +163,84 @@ from space cimport TouchSensor           as CppTouchSensor
 
 
 cdef class Node:
-    """Just wrapping. The Node is constructed through Space.add_node"""
+    """Index view on the node arrays of a space. The Node is constructed through Space.add_node"""
 
-    cdef CppNode *c_node
+    cdef CppSpace *c_space
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef readonly unsigned int index
 
     @property
     def x(self):
-        return self.c_node.x
+        return self.c_space.nodes.x[self.index]
 
     @property
     def y(self):
-        return self.c_node.y
+        return self.c_space.nodes.y[self.index]
 
     @property
     def v_x(self):
-        return self.c_node.v_x
+        return self.c_space.nodes.v_x[self.index]
 
     @v_x.setter
     def v_x(self, double value):
-        self.c_node.v_x = value
+        self.c_space.nodes.v_x[self.index] = value
 
     @property
     def v_y(self):
-        return self.c_node.v_y
+        return self.c_space.nodes.v_y[self.index]
 
     @v_y.setter
     def v_y(self, double value):
-        self.c_node.v_y = value
+        self.c_space.nodes.v_y[self.index] = value
 
     @property
     def position(self):
-        return self.c_node.x, self.c_node.y
+        return self.c_space.nodes.x[self.index], self.c_space.nodes.y[self.index]
 
     @property
     def mass(self):
-        return self.c_node.mass()
+        return self.c_space.nodes.mass[self.index]
 
     @mass.setter
     def mass(self, double value):
-        self.c_node.set_mass(value)
+        self.c_space.set_node_mass(self.index, value)
 
     @property
     def friction(self):
-        return self.c_node.friction
+        return self.c_space.nodes.friction[self.index]
 
     @friction.setter
     def friction(self, double value):
-        self.c_node.friction = value
+        self.c_space.nodes.friction[self.index] = value
 
     @property
     def fixed(self):
-        return self.c_node.fixed()
+        return <bool>self.c_space.nodes.fixed[self.index]
 
     @fixed.setter
     def fixed(self, bool value):
-        self.c_node.set_fixed(value)
+        self.c_space.set_node_fixed(self.index, value)
+
+    @property
+    def body(self):
+        """Body id, used to filter self-collisions. 0 by default."""
+        return self.c_space.nodes.body[self.index]
+
+    @body.setter
+    def body(self, unsigned int value):
+        self.c_space.nodes.body[self.index] = value
 
     cpdef translate(self, double dx, double dy):
-        self.c_node.translate(dx, dy)
+        self.c_space.nodes.translate(self.index, dx, dy)
 
 
 
 cdef class Link:
+    """Index handle on the link table of a space. The Link is constructed through Space.add_link"""
 
-    cdef CppLink *c_link
+    cdef CppSpace *c_space
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef readonly unsigned int index
     cdef readonly Node node_a, node_b
 
     def __cinit__(self, Node node_a, Node node_b):
@@ -98,78 +248,81 @@ cdef class Link:
         self.node_b = node_b
 
     def length(self):
-        return self.c_link.length()
+        return self.c_space.links.length(self.index)
 
     # motor behavior
 
     @property
     def actuated(self):
-        return self.c_link.actuated
+        return <bool>self.c_space.links.actuated[self.index]
 
     @actuated.setter
     def actuated(self, bool value):
-        self.c_link.actuated = value
+        self.c_space.links.actuated[self.index] = value
 
     @property
     def relax_length(self):
-        return self.c_link.relax_length
+        return self.c_space.links.relax_length[self.index]
 
     @relax_length.setter
-    def relax_length(self, value):
-        self.c_link.relax_length = value
+    def relax_length(self, double value):
+        self.c_space.links.relax_length[self.index] = value
 
     @property
     def expand_factor(self):
-        return self.c_link.expand_factor
+        return self.c_space.links.expand_factor[self.index]
 
-    def contract(self, value):
-        self.c_link.contract(value)
+    def contract(self, double value):
+        self.c_space.links.contract(self.index, value)
 
     def relax(self):
-        self.c_link.relax()
+        self.c_space.links.relax(self.index)
 
     # spring behavior
 
     @property
     def stiffness(self):
-        return self.c_link.stiffness()
+        return self.c_space.links.stiffness[self.index]
 
     @stiffness.setter
-    def stiffness(self, value):
-        self.c_link.set_stiffness(value)
+    def stiffness(self, double value):
+        self.c_space.links.set_stiffness(self.index, value)
 
     @property
     def frequency(self):
-        return self.c_link.frequency()
+        return self.c_space.links.frequency(self.index)
 
     @frequency.setter
-    def frequency(self, value):
-        self.c_link.set_frequency(value)
+    def frequency(self, double value):
+        self.c_space.links.set_frequency(self.index, value)
 
     @property
     def damping_ratio(self):
-        return self.c_link.damping_ratio()
+        return self.c_space.links.damping_ratio[self.index]
 
     @damping_ratio.setter
-    def damping_ratio(self, value):
-        self.c_link.set_damping_ratio(value)
+    def damping_ratio(self, double value):
+        self.c_space.links.set_damping_ratio(self.index, value)
 
     @property
     def max_impulse(self):
-        return self.c_link.max_impulse
+        return self.c_space.links.max_impulse[self.index]
 
     @property
     def max_length(self):
-        return self.c_link.max_length
+        return self.c_space.links.max_length[self.index]
 
     @property
     def force(self):
-        return self.c_link.force()
+        return self.c_space.links.force(self.index)
 
 
 cdef class Spring:
+    """Index handle on the spring table of a space. Constructed through Space.add_spring"""
 
-    cdef CppSpring *c_spring
+    cdef CppSpace *c_space
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef readonly unsigned int index
     cdef readonly Node node_a, node_b
 
     def __cinit__(self, Node node_a, Node node_b):
@@ -177,75 +330,81 @@ cdef class Spring:
         self.node_b = node_b
 
     def length(self):
-        return self.c_spring.length()
+        return self.c_space.springs.length(self.index)
 
     # motor behavior
 
     @property
     def actuated(self):
-        return self.c_spring.actuated
+        return <bool>self.c_space.springs.actuated[self.index]
 
     @actuated.setter
     def actuated(self, bool value):
-        self.c_spring.actuated = value
+        self.c_space.springs.actuated[self.index] = value
 
     @property
     def relax_length(self):
-        return self.c_spring.relax_length
+        return self.c_space.springs.relax_length[self.index]
 
     @relax_length.setter
-    def relax_length(self, value):
-        self.c_spring.relax_length = value
+    def relax_length(self, double value):
+        self.c_space.springs.relax_length[self.index] = value
 
     @property
     def expand_factor(self):
-        return self.c_spring.expand_factor
+        return self.c_space.springs.expand_factor[self.index]
 
-    def contract(self, value):
-        self.c_spring.contract(value)
+    def contract(self, double value):
+        self.c_space.springs.contract(self.index, value)
 
     def relax(self):
-        self.c_spring.relax()
+        self.c_space.springs.relax(self.index)
 
     # spring behavior
 
     @property
     def stiffness(self):
-        return self.c_spring.stiffness()
+        return self.c_space.springs.stiffness[self.index]
 
     @stiffness.setter
-    def stiffness(self, value):
-        self.c_spring.set_stiffness(value)
+    def stiffness(self, double value):
+        self.c_space.springs.set_stiffness(self.index, value)
 
     @property
     def frequency(self):
-        return self.c_spring.frequency()
+        return self.c_space.springs.frequency(self.index)
 
     @frequency.setter
-    def frequency(self, value):
-        self.c_spring.set_frequency(value)
+    def frequency(self, double value):
+        self.c_space.springs.set_frequency(self.index, value)
 
     @property
     def damping_ratio(self):
-        return self.c_spring.damping_ratio()
+        return self.c_space.springs.damping_ratio[self.index]
 
     @damping_ratio.setter
-    def damping_ratio(self, value):
-        self.c_spring.set_damping_ratio(value)
+    def damping_ratio(self, double value):
+        self.c_space.springs.set_damping_ratio(self.index, value)
 
     @property
     def max_impulse(self):
-        return self.c_spring.max_impulse
+        return self.c_space.springs.max_impulse[self.index]
 
     @property
     def max_length(self):
-        return self.c_spring.max_length
+        return self.c_space.springs.max_length[self.index]
 
 
 
 cdef class Rect:
-    """Hollow class for drawing purposes"""
+    """Obstacle handle. The Rect is constructed through Space.add_rect.
+
+    Coordinates are kept in Python for drawing purposes, and updated by `translate()`.
+    """
 
+    cdef CppSpace *c_space
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef CppRect *c_rect
     cdef readonly xL, xR, yB, yT, width, height, restitution
 
     def __cinit__(self, double xL, double xR, double yB, double yT, double restitution):
@@ -253,10 +412,25 @@ cdef class Rect:
         self.width, self.height = self.xR - self.xL, self.yT - self.yB
         self.restitution = restitution
 
+    cpdef translate(self, double dx, double dy):
+        """Move the rect. Moving rects are tracked by a dynamic AABB tree, without rebuilding
+        the collision grid."""
+        if self.c_rect == NULL:
+            raise ValueError('the rect was removed from its space')
+        self.c_space.translate_rect(self.c_rect, dx, dy)
+        self.xL, self.xR = self.c_rect.xL, self.c_rect.xR
+        self.yB, self.yT = self.c_rect.yB, self.c_rect.yT
+
 
 cdef class Triangle:
-    """Hollow class for drawing purposes"""
+    """Obstacle handle. The Triangle is constructed through Space.add_triangle.
 
+    Coordinates are kept in Python for drawing purposes, and updated by `translate()`.
+    """
+
+    cdef CppSpace *c_space
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef CppTriangle *c_triangle
     cdef readonly xA, yA, xB, yB, xC, yC, restitution
 
     def __cinit__(self, double xA, double yA, double xB, double yB, double xC, double yC,
@@ -264,9 +438,20 @@ cdef class Triangle:
         self.xA, self.yA, self.xB, self.yB, self.xC, self.yC = xA, yA, xB, yB, xC, yC
         self.restitution = restitution
 
+    cpdef translate(self, double dx, double dy):
+        """Move the triangle. Moving triangles are tracked by a dynamic AABB tree, without
+        rebuilding the collision grid."""
+        if self.c_triangle == NULL:
+            raise ValueError('the triangle was removed from its space')
+        self.c_space.translate_triangle(self.c_triangle, dx, dy)
+        self.xA, self.yA = self.c_triangle.xA, self.c_triangle.yA
+        self.xB, self.yB = self.c_triangle.xB, self.c_triangle.yB
+        self.xC, self.yC = self.c_triangle.xC, self.c_triangle.yC
+
 
 cdef class AngleSensor:
     cdef CppAngleSensor *c_sensor
+    cdef _SpaceOwner _owner  # keeps the native space alive
     cdef readonly Node origin, satellite
     cdef readonly AngleSensor ref_sensor
 
@@ -285,6 +470,7 @@ cdef class AngleSensor:
 
 cdef class AngularVelocitySensor:
     cdef CppAngularVelocitySensor *c_sensor
+    cdef _SpaceOwner _owner  # keeps the native space alive
     cdef readonly AngleSensor angle_sensor
 
     def __init__(self, AngleSensor angle_sensor):
@@ -300,6 +486,7 @@ cdef class AngularVelocitySensor:
 
 cdef class TouchSensor:
     cdef CppTouchSensor *c_sensor
+    cdef _SpaceOwner _owner  # keeps the native space alive
     cdef readonly list nodes
 
     def __init__(self, list nodes):
@@ -313,16 +500,420 @@ cdef class TouchSensor:
         return self.c_sensor.update()
 
 
+cdef class ActuationMap:
+    """Native map from a motor signal to the expand factors of links. Constructed through
+    Space.add_actuation_map"""
+
+    cdef CppActuationMap *c_map
+    cdef _SpaceOwner _owner  # keeps the native space alive
+
+    def __len__(self):
+        return self.c_map.n_inputs
+
+    @property
+    def n_links(self):
+        return self.c_map.size()
+
+    def actuate(self, m_signal):
+        """Set the expand factors of the mapped links from a motor signal of `len(self)` values."""
+        cdef const double[::1] signal = np.ascontiguousarray(m_signal, dtype=np.float64).reshape(-1)
+        if <size_t> signal.shape[0] != self.c_map.n_inputs:
+            raise ValueError('expected a signal of size {}, got {}'.format(
+                             self.c_map.n_inputs, signal.shape[0]))
+        if signal.shape[0] > 0:
+            self.c_map.actuate(&signal[0])
+
+    def relax(self):
+        """Reset the expand factors of the mapped links to 1.0."""
+        self.c_map.relax()
+
+
+# ctypes prototype of native controllers, e.g. `CONTROLLER_FUNCTYPE(python_function)`:
+#   void controller(double t, size_t n_nodes, const double* x, const double* y,
+#                   const double* v_x, const double* v_y, size_t n_sensors, const double* sensors,
+#                   size_t n_outputs, double* outputs, void* user_data)
+_double_p = ctypes.POINTER(ctypes.c_double)
+CONTROLLER_FUNCTYPE = ctypes.CFUNCTYPE(None, ctypes.c_double, ctypes.c_size_t,
+                                       _double_p, _double_p, _double_p, _double_p,
+                                       ctypes.c_size_t, _double_p,
+                                       ctypes.c_size_t, _double_p, ctypes.c_void_p)
+
+
+cdef size_t _function_address(function) except 0:
+    """Address of a compiled function: an integer address (e.g. of a Cython cdef function), a
+    Numba cfunc, or a ctypes function pointer."""
+    if isinstance(function, ctypes._CFuncPtr):
+        address = ctypes.cast(function, ctypes.c_void_p).value
+    else:
+        address = getattr(function, 'address', function)
+    if not isinstance(address, int):
+        raise TypeError('expected a function address, a Numba cfunc or a ctypes function pointer')
+    if address == 0:
+        raise ValueError('null function pointer')
+    return address
+
+
+cdef class Controller:
+    """Handle on a native controller. The Controller is constructed through Space.add_controller"""
+
+    cdef CppController *c_controller
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef readonly object function, user_data, actuation_map
+
+    @property
+    def period(self):
+        return self.c_controller.period
+
+    @period.setter
+    def period(self, unsigned int value):
+        self.c_controller.period = max(value, 1)
+
+
+cdef object _vector_view(_SpaceOwner owner, vector[double] &values, shape):
+    """Writeable NumPy view on a native vector of the space of `owner`, which must not be resized
+    afterwards."""
+    cdef vector[shared_ptr[void]] storage
+    return _column_view(owner, storage, values.data(), values.size(), 1, 0, np.float64,
+                        True).reshape(shape)
+
+
+cdef class CPG:
+    """Handle on a native central pattern generator. The CPG is constructed through Space.add_cpg
+
+    The parameters and the phases are writeable NumPy views on the native arrays: writing to
+    them takes effect at the next actuation, at no per-step cost.
+    """
+
+    cdef CppCPG *c_cpg
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef readonly object actuation_map
+    cdef readonly object amplitudes, frequencies, offsets, phase_offsets, weights, phase_biases
+    cdef readonly object phases, outputs
+
+    cdef _bind(self):
+        n = self.c_cpg.size()
+        self.amplitudes    = _vector_view(self._owner, self.c_cpg.amplitudes, (n,))
+        self.frequencies   = _vector_view(self._owner, self.c_cpg.frequencies, (n,))
+        self.offsets       = _vector_view(self._owner, self.c_cpg.offsets, (n,))
+        self.phase_offsets = _vector_view(self._owner, self.c_cpg.phase_offsets, (n,))
+        self.weights       = _vector_view(self._owner, self.c_cpg.weights, (n, n))
+        self.phase_biases  = _vector_view(self._owner, self.c_cpg.phase_biases, (n, n))
+        self.phases        = _vector_view(self._owner, self.c_cpg.phases, (n,))
+        self.outputs       = _vector_view(self._owner, self.c_cpg.outputs, (n,))
+        self.outputs.flags.writeable = False
+
+    def __len__(self):
+        return self.c_cpg.size()
+
+    @property
+    def period(self):
+        return self.c_cpg.period
+
+    @period.setter
+    def period(self, unsigned int value):
+        self.c_cpg.period = max(value, 1)
+
+    def reset(self):
+        """Reset the phases to the phase offsets, e.g. between episodes."""
+        self.c_cpg.reset()
+
+
+cdef class MLP:
+    """Handle on a native multi-layer perceptron controller. The MLP is constructed through
+    Space.add_mlp
+
+    `parameters` is a writeable flat view on all the weights and biases, layer after layer, e.g.
+    to load a genome in one assignment. `weights` and `biases` are per-layer views on it.
+    """
+
+    cdef CppMLP *c_mlp
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef readonly object actuation_map, dims
+    cdef readonly object parameters, weights, biases, output_scales, output_offsets, outputs
+
+    cdef _bind(self):
+        self.dims = tuple(self.c_mlp.dims)
+        self.parameters     = _vector_view(self._owner, self.c_mlp.parameters, (self.c_mlp.parameters.size(),))
+        self.output_scales  = _vector_view(self._owner, self.c_mlp.output_scales, (self.dims[-1],))
+        self.output_offsets = _vector_view(self._owner, self.c_mlp.output_offsets, (self.dims[-1],))
+        self.outputs        = _vector_view(self._owner, self.c_mlp.outputs, (self.dims[-1],))
+        self.outputs.flags.writeable = False
+
+        self.weights, self.biases = [], []
+        offset = 0
+        for n_in, n_out in zip(self.dims[:-1], self.dims[1:]):
+            self.weights.append(self.parameters[offset:offset + n_in * n_out].reshape(n_out, n_in))
+            offset += n_in * n_out
+            self.biases.append(self.parameters[offset:offset + n_out])
+            offset += n_out
+
+    @property
+    def period(self):
+        return self.c_mlp.period
+
+    @period.setter
+    def period(self, unsigned int value):
+        self.c_mlp.period = max(value, 1)
+
+
+cdef class GrowthSchedule:
+    """Handle on a native growth schedule. The schedule is constructed through
+    Space.add_growth_schedule
+
+    `links` holds the indices of the grown links. `times` and `relax_lengths` are writeable
+    views on the keyframes. After rewriting them,
+    `reset()` restarts a finished schedule.
+    """
+
+    cdef CppGrowthSchedule *c_schedule
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef readonly object links, times, relax_lengths
+
+    cdef _bind(self, size_t n_links):
+        n_keyframes = self.c_schedule.n_keyframes()
+        self.times         = _vector_view(self._owner, self.c_schedule.times, (n_keyframes,))
+        self.relax_lengths = _vector_view(self._owner, self.c_schedule.relax_lengths, (n_keyframes, n_links))
+
+    def __len__(self):
+        return self.c_schedule.n_keyframes()
+
+    @property
+    def finished(self):
+        return self.c_schedule.finished()
+
+    @property
+    def period(self):
+        return self.c_schedule.period
+
+    @period.setter
+    def period(self, unsigned int value):
+        self.c_schedule.period = max(value, 1)
+
+    def reset(self):
+        self.c_schedule.reset()
+
+
+_INTERPOLATIONS = {'linear': LINEAR, 'cubic': CUBIC}
+
+
+cdef class Playback:
+    """Handle on a native actuation playback. The playback is constructed through
+    Space.add_playback
+
+    `table` is a writeable (n_samples, n_outputs) view on the played values: a new gait can be
+    uploaded in one assignment, and `reset()` rewinds it.
+    """
+
+    cdef CppPlayback *c_playback
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef readonly object actuation_map, table, outputs
+
+    cdef _bind(self):
+        n_outputs = self.c_playback.outputs.size()
+        self.table   = _vector_view(self._owner, self.c_playback.table, (self.c_playback.n_samples(), n_outputs))
+        self.outputs = _vector_view(self._owner, self.c_playback.outputs, (n_outputs,))
+        self.outputs.flags.writeable = False
+
+    def __len__(self):
+        return self.c_playback.n_samples()
+
+    @property
+    def sample_dt(self):
+        return self.c_playback.sample_dt
+
+    @sample_dt.setter
+    def sample_dt(self, double value):
+        if value <= 0:
+            raise ValueError('sample_dt must be positive')
+        self.c_playback.sample_dt = value
+
+    @property
+    def rate(self):
+        """Playback speed: 1.0 plays the table in real time, 2.0 twice faster."""
+        return self.c_playback.rate
+
+    @rate.setter
+    def rate(self, double value):
+        self.c_playback.rate = value
+
+    @property
+    def position(self):
+        """Playback position, in samples."""
+        return self.c_playback.position
+
+    @position.setter
+    def position(self, double value):
+        self.c_playback.position = value
+
+    @property
+    def loop(self):
+        return self.c_playback.loop
+
+    @loop.setter
+    def loop(self, bool value):
+        self.c_playback.loop = value
+
+    @property
+    def interpolation(self):
+        return 'cubic' if self.c_playback.interpolation == CUBIC else 'linear'
+
+    @interpolation.setter
+    def interpolation(self, value):
+        try:
+            self.c_playback.interpolation = _INTERPOLATIONS[value]
+        except KeyError:
+            raise ValueError("interpolation must be 'linear' or 'cubic', not {!r}".format(value)) from None
+
+    @property
+    def finished(self):
+        return self.c_playback.finished()
+
+    @property
+    def period(self):
+        return self.c_playback.period
+
+    @period.setter
+    def period(self, unsigned int value):
+        self.c_playback.period = max(value, 1)
+
+    def reset(self):
+        self.c_playback.reset()
+
+
+cdef class ActivationDynamics:
+    """Handle on the native activation dynamics of a set of links. Constructed through
+    Space.add_activation_dynamics
+
+    `time_constants`, `rate_limits` and `targets` are writeable views. `targets` holds the last
+    expand factors written by the controllers: writing to it sets new targets, too. `states`, a
+    read-only view, holds the expand factors used by the physics at the last step. Between
+    steps, the expand factors of the links read the targets.
+    """
+
+    cdef CppActivationDynamics *c_activation
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef Space space
+    cdef readonly object links, time_constants, rate_limits, targets, states
+
+    cdef _bind(self):
+        n = self.c_activation.size()
+        self.time_constants = _vector_view(self._owner, self.c_activation.time_constants, (n,))
+        self.rate_limits    = _vector_view(self._owner, self.c_activation.rate_limits, (n,))
+        self.targets        = _vector_view(self._owner, self.c_activation.targets, (n,))
+        self.states         = _vector_view(self._owner, self.c_activation.states, (n,))
+        self.states.flags.writeable = False
+
+    def __len__(self):
+        return self.c_activation.size()
+
+    def reset(self):
+        """Make the current expand factors the targets, e.g. between episodes."""
+        self.c_activation.reset(self.space.c_space.links.expand_factor)
+
+
+cdef class Drag:
+    """Handle on a native fluid drag force field. Constructed through Space.add_drag"""
+
+    cdef CppDrag *c_drag
+    cdef _SpaceOwner _owner  # keeps the native space alive
+
+    @property
+    def linear(self):
+        return self.c_drag.linear
+
+    @linear.setter
+    def linear(self, double value):
+        self.c_drag.linear = value
+
+    @property
+    def quadratic(self):
+        return self.c_drag.quadratic
+
+    @quadratic.setter
+    def quadratic(self, double value):
+        self.c_drag.quadratic = value
+
+    @property
+    def flow(self):
+        """Velocity (v_x, v_y) of the fluid."""
+        return self.c_drag.flow_x, self.c_drag.flow_y
+
+    @flow.setter
+    def flow(self, value):
+        self.c_drag.flow_x, self.c_drag.flow_y = value
+
+
+cdef class PointAttractor:
+    """Handle on a native point attractor. Constructed through Space.add_point_attractor"""
+
+    cdef CppPointAttractor *c_attractor
+    cdef _SpaceOwner _owner  # keeps the native space alive
+
+    @property
+    def position(self):
+        return self.c_attractor.x, self.c_attractor.y
+
+    @position.setter
+    def position(self, value):
+        self.c_attractor.x, self.c_attractor.y = value
+
+    @property
+    def strength(self):
+        return self.c_attractor.strength
+
+    @strength.setter
+    def strength(self, double value):
+        self.c_attractor.strength = value
+
+    @property
+    def softening(self):
+        return self.c_attractor.softening
+
+    @softening.setter
+    def softening(self, double value):
+        self.c_attractor.softening = value
+
+
+cdef class NodeForces:
+    """Handle on native per-node forces. Constructed through Space.add_node_forces
+
+    `forces` is a writeable (n_nodes, 2) view, applied at each step until rewritten.
+    """
+
+    cdef CppNodeForces *c_forces
+    cdef _SpaceOwner _owner  # keeps the native space alive
+    cdef readonly object forces
+
+    def __len__(self):
+        return self.c_forces.size()
+
+
 cdef class Space:
 
     cdef CppSpace *c_space
-    cdef readonly object nodes, links, springs, rects, triangles, entities, update_functions
+    cdef _SpaceOwner _owner
+    cdef list _nodes, _links  # handles, created lazily for the nodes and links added in bulk.
+    cdef size_t _n_link_handles  # links of the link table with a handle in `_links`.
+    cdef vector[unsigned int] _link_positions  # position in `links` of each link of the table.
+    cdef readonly object springs, rects, triangles, entities, update_functions
     cdef readonly list sensors
+    cdef readonly list controllers  # native controllers, CPGs, MLPs, growth schedules and
+                                    # playbacks, in order of execution.
+    cdef readonly list activations
+    cdef readonly list force_fields
+    cdef object _sensor_buffer
+    cdef dict _views
+    cdef dict _link_groups
+    cdef list _update_hooks, _entity_hooks  # (hook, period) registrations.
 
     def __cinit__(self, double dt, int n_substep=5, gravity=0.0, restitution_threshold=1.0):
-        self.nodes, self.links, self.rects, self.triangles = [], [], [], []
+        self._nodes, self._links, self.rects, self.triangles = [], [], [], []
+        self._n_link_handles = 0
         self.entities, self.update_functions = [], []
-        self.sensors = []
+        self.sensors, self.controllers, self.activations = [], [], []
+        self.force_fields = []
+        self._views, self._link_groups = {}, {}
+        self._update_hooks, self._entity_hooks = [], []
 
         try:
             gravity_x, gravity_y = gravity
@@ -330,6 +921,30 @@ cdef class Space:
             gravity_x, gravity_y = 0, gravity
 
         self.c_space = new CppSpace(dt, n_substep, gravity_x, gravity_y, restitution_threshold)
+        self._owner = _SpaceOwner.__new__(_SpaceOwner)
+        self._owner.c_space = self.c_space
+
+    @property
+    def nodes(self):
+        """Node handles, in order of index."""
+        self._create_handles()
+        return self._nodes
+
+    @property
+    def links(self):
+        """Link and spring handles, in order of creation."""
+        self._create_handles()
+        return self._links
+
+    cdef _create_handles(self):
+        # the nodes and links added in bulk, without handles yet, are the last ones.
+        cdef size_t k
+        for k in range(len(self._nodes), self.c_space.nodes.size()):
+            self._nodes.append(_new_node(self._owner, k))
+        for k in range(self._n_link_handles, self.c_space.links.size()):
+            self._links.append(_new_link(self._owner, k, self._nodes[self.c_space.links.node_a[k]],
+                                                         self._nodes[self.c_space.links.node_b[k]]))
+        self._n_link_handles = self.c_space.links.size()
 
     @property
     def ticks(self):
@@ -366,90 +981,900 @@ cdef class Space:
     def restitution_threshold(self, double value):
         self.c_space.restitution_threshold = value
 
+    @property
+    def solver(self):
+        """Link solver: 'serial' or 'colored'"""
+        return 'colored' if self.c_space.colored_solver() else 'serial'
+
+    def set_solver(self, str solver, unsigned int n_threads=0):
+        """Set the link solver.
+
+        'serial' solves the links one after another, in order of creation. 'colored' colors the
+        links so that no two links of the same color share a node, and solves each color on
+        `n_threads` threads (0 for one per core). Springs are always solved serially.
+        """
+        if solver not in ('serial', 'colored'):
+            raise ValueError('unknown solver "{}"'.format(solver))
+        self.c_space.set_colored_solver(solver == 'colored', n_threads)
+
     cpdef Node add_node(self, double x, double y, double mass=1.0, double friction=0.5,
                               double fixed=False):
-        c_node = self.c_space.add_node(x, y, mass, friction, fixed)
-        node = Node()
-        node.c_node = c_node
-        self.nodes.append(node)
+        self._create_handles()
+        node = _new_node(self._owner, self.c_space.add_node(x, y, mass, friction, fixed))
+        self._nodes.append(node)
+        self._invalidate_views()
         return node
 
     cpdef Link add_link(self, Node node_a, Node node_b, double stiffness=10000.0,
                               double damping_ratio=1.0, bool actuated=False, double max_impulse=100):
-        c_link = self.c_space.add_link(node_a.c_node, node_b.c_node,
-                                       stiffness, damping_ratio, actuated, max_impulse)
-        link = Link(node_a, node_b)
-        link.c_link = c_link
-        self.links.append(link)
+        self._create_handles()
+        self._link_positions.push_back(len(self._links))
+        link = _new_link(self._owner, self.c_space.add_link(node_a.index, node_b.index, stiffness,
+                                                             damping_ratio, actuated, max_impulse),
+                         node_a, node_b)
+        self._links.append(link)
+        self._n_link_handles += 1
+        self._invalidate_views()
         return link
 
+    def add_nodes(self, xy, mass=1.0, friction=0.5, fixed=False, body=0):
+        """Add nodes in bulk, from an (n, 2) array or a sequence of positions. `mass`,
+        `friction`, `fixed` and `body` (see `Node.body`) are scalars or arrays of size n. Return
+        the range of indices of the new nodes, which are also their positions in `nodes`.
+
+        Unlike `add_node`, no handle is created: those of `nodes` are created when accessed."""
+        cdef vector[double] x, y
+        cdef const double[:, :] xy_view
+        cdef size_t k
+        if isinstance(xy, np.ndarray):
+            if xy.ndim != 2 or xy.shape[1] != 2:
+                raise ValueError('expected an (n, 2) array of positions, got shape {}'.format(xy.shape))
+            xy_view = np.ascontiguousarray(xy, dtype=np.float64)
+            for k in range(<size_t> xy_view.shape[0]):
+                x.push_back(xy_view[k, 0])
+                y.push_back(xy_view[k, 1])
+        else:
+            for x_k, y_k in xy:
+                x.push_back(x_k)
+                y.push_back(y_k)
+        cdef size_t n = x.size()
+        cdef vector[double] masses = _double_vector(mass, n)
+        cdef vector[double] frictions = _double_vector(friction, n)
+        cdef vector[char] fixeds = _bool_vector(fixed, n)
+        cdef vector[unsigned int] bodies = _uint_vector(body, n)
+
+        cdef unsigned int first = self.c_space.nodes.size()
+        if n > 0:
+            self.c_space.add_nodes(n, x.data(), y.data(), masses.data(), frictions.data(),
+                                   fixeds.data())
+            for k in range(n):
+                self.c_space.nodes.body[first + k] = bodies[k]
+        self._invalidate_views()
+        return range(first, first + n)
+
+    def add_links(self, pairs, stiffness=10000.0, damping_ratio=1.0, actuated=False,
+                  max_impulse=100):
+        """Add links in bulk, between the node pairs of `pairs`: an (n, 2) array of node
+        indices, or a sequence of pairs of node indices or Node handles. The other parameters
+        are scalars or arrays of size n. Return the range of indices of the new links in the
+        link table: their `Link.index`, as used by `contract_links` and the `link_*` views. As
+        `links` also holds the springs, `link_positions` gives their positions in it.
+
+        Unlike `add_link`, no handle is created: those of `links` are created when accessed."""
+        cdef vector[unsigned int] node_a, node_b
+        cdef long long a, b, n_nodes = self.c_space.nodes.size()
+        cdef const long long[:, :] pairs_view
+        cdef size_t k
+        if isinstance(pairs, np.ndarray):
+            if pairs.ndim != 2 or pairs.shape[1] != 2:
+                raise ValueError('expected an (n, 2) array of node indices, got shape {}'.format(
+                                 pairs.shape))
+            if pairs.size > 0 and pairs.dtype.kind not in 'iu':
+                raise TypeError('expected node indices')
+            pairs_view = np.ascontiguousarray(pairs, dtype=np.int64)
+            for k in range(<size_t> pairs_view.shape[0]):
+                a, b = pairs_view[k, 0], pairs_view[k, 1]
+                if not (0 <= a < n_nodes and 0 <= b < n_nodes):
+                    raise IndexError('node index out of range')
+                node_a.push_back(a)
+                node_b.push_back(b)
+        else:
+            for node_a_k, node_b_k in pairs:
+                a, b = _node_index(node_a_k), _node_index(node_b_k)
+                if not (0 <= a < n_nodes and 0 <= b < n_nodes):
+                    raise IndexError('node index out of range')
+                node_a.push_back(a)
+                node_b.push_back(b)
+        cdef size_t n = node_a.size()
+        cdef vector[double] stiffnesses = _double_vector(stiffness, n)
+        cdef vector[double] damping_ratios = _double_vector(damping_ratio, n)
+        cdef vector[char] actuateds = _bool_vector(actuated, n)
+        cdef vector[double] max_impulses = _double_vector(max_impulse, n)
+
+        # positions in `links`, after the handles still to be created.
+        cdef size_t position = len(self._links) + self.c_space.links.size() - self._n_link_handles
+        for k in range(n):
+            self._link_positions.push_back(position + k)
+        cdef unsigned int first = self.c_space.links.size()
+        if n > 0:
+            self.c_space.add_links(n, node_a.data(), node_b.data(), stiffnesses.data(),
+                                   damping_ratios.data(), actuateds.data(), max_impulses.data())
+        self._invalidate_views()
+        return range(first, first + n)
+
+    def link_positions(self, indices):
+        """Positions in `links` of the links of link table `indices`, e.g. of the range returned
+        by `add_links`. They differ from the indices once springs have been added."""
+        positions = []
+        for i in indices:
+            if not 0 <= i < <long long> self._link_positions.size():
+                raise IndexError('link index out of range')
+            positions.append(self._link_positions[i])
+        return positions
+
     cpdef Spring add_spring(self, Node node_a, Node node_b, double stiffness=10000.0,
                                  double damping_ratio=1.0, bool actuated=False, double max_impulse=100):
-        c_link = self.c_space.add_spring(node_a.c_node, node_b.c_node,
-                                         stiffness, damping_ratio, actuated, max_impulse)
+        self._create_handles()
         link = Spring(node_a, node_b)
-        link.c_spring = c_link
-        self.links.append(link)
+        link.c_space, link._owner = self.c_space, self._owner
+        link.index = self.c_space.add_spring(node_a.index, node_b.index,
+                                             stiffness, damping_ratio, actuated, max_impulse)
+        self._links.append(link)
+        self._invalidate_views()
         return link
 
     cpdef Rect add_rect(self, double xL, double xR, double yB, double yT, double restitution):
-        self.c_space.add_rect(xL, xR, yB, yT, restitution)
         rect = Rect(xL, xR, yB, yT, restitution)
+        rect.c_space, rect._owner = self.c_space, self._owner
+        rect.c_rect = self.c_space.add_rect(xL, xR, yB, yT, restitution)
         self.rects.append(rect)
         return rect
 
     cpdef Triangle add_triangle(self, double xA, double yA, double xB, double yB,
                                       double xC, double yC, double restitution):
-        self.c_space.add_triangle(xA, yA, xB, yB, xC, yC, restitution)
         triangle = Triangle(xA, yA, xB, yB, xC, yC, restitution)
+        triangle.c_space, triangle._owner = self.c_space, self._owner
+        triangle.c_triangle = self.c_space.add_triangle(xA, yA, xB, yB, xC, yC, restitution)
         self.triangles.append(triangle)
         return triangle
 
+    cpdef remove_rect(self, Rect rect):
+        self.rects.remove(rect)
+        self.c_space.remove_rect(rect.c_rect)
+        rect.c_rect = NULL
+
+    cpdef remove_triangle(self, Triangle triangle):
+        self.triangles.remove(triangle)
+        self.c_space.remove_triangle(triangle.c_triangle)
+        triangle.c_triangle = NULL
+
+    # zero-copy views on the node arrays and the link table
+
+    cdef object _view(self, str name):
+        view = self._views.get(name)
+        if view is not None:
+            return view
+        cdef size_t n_nodes = self.c_space.nodes.size(), n_links = self.c_space.links.size()
+        cdef size_t node_stride = self.c_space.nodes.y - self.c_space.nodes.x
+        cdef size_t link_stride = self.c_space.links.node_b - self.c_space.links.node_a
+        cdef vector[shared_ptr[void]] node_storage = self.c_space.nodes.storage()
+        cdef vector[shared_ptr[void]] link_storage = self.c_space.links.storage()
+        if name == 'positions':
+            view = _column_view(self._owner, node_storage, self.c_space.nodes.x, n_nodes, 2, node_stride, np.float64, False)
+        elif name == 'velocities':
+            view = _column_view(self._owner, node_storage, self.c_space.nodes.v_x, n_nodes, 2, node_stride, np.float64, True)
+        elif name == 'node_bodies':
+            view = _column_view(self._owner, node_storage, self.c_space.nodes.body, n_nodes, 1, 0, np.uint32, True)
+        elif name == 'link_nodes':
+            view = _column_view(self._owner, link_storage, self.c_space.links.node_a, n_links, 2, link_stride, np.uint32, False)
+        elif name == 'link_expand_factors':
+            view = _column_view(self._owner, link_storage, self.c_space.links.expand_factor, n_links, 1, 0, np.float64, True)
+        elif name == 'link_relax_lengths':
+            view = _column_view(self._owner, link_storage, self.c_space.links.relax_length, n_links, 1, 0, np.float64, True)
+        elif name == 'link_lengths':
+            view = _column_view(self._owner, link_storage, self.c_space.links.measured_length, n_links, 1, 0, np.float64, False)
+        elif name == 'link_forces':
+            view = _column_view(self._owner, link_storage, self.c_space.links.measured_force, n_links, 1, 0, np.float64, False)
+        self._views[name] = view
+        return view
+
+    cdef _invalidate_views(self):
+        """Make the views handed out so far read-only, after nodes or links were added: the arrays
+        may have been reallocated, and the views would then no longer be updated. Their memory is
+        kept alive as long as they are."""
+        for view in self._views.values():
+            view.flags.writeable = False
+        self._views.clear()
+
+    @property
+    def positions(self):
+        """Node positions, as a read-only (n_nodes, 2) NumPy view on the node arrays.
+
+        Like all the views below, it aliases engine memory: it is updated in place at each
+        step, without copy. Adding nodes or links invalidates the views: they become read-only,
+        and may no longer be updated. Get them again.
+        """
+        return self._view('positions')
+
+    @property
+    def velocities(self):
+        """Node velocities, as a writeable (n_nodes, 2) NumPy view on the node arrays."""
+        return self._view('velocities')
+
+    @property
+    def node_bodies(self):
+        """Body ids of the nodes (see `Node.body`), as a writeable (n_nodes,) uint32 view."""
+        return self._view('node_bodies')
+
+    @property
+    def link_nodes(self):
+        """Node indices of the links, as a read-only (n_links, 2) uint32 view.
+
+        The link views cover the links of the space, not its springs, and are in order of
+        creation of the links.
+        """
+        return self._view('link_nodes')
+
+    @property
+    def link_expand_factors(self):
+        """Expand factors of the links, as a writeable view: writing to it contracts them."""
+        return self._view('link_expand_factors')
+
+    @property
+    def link_relax_lengths(self):
+        """Relax lengths of the links, as a writeable view."""
+        return self._view('link_relax_lengths')
+
+    @property
+    def link_lengths(self):
+        """Current lengths of the links, as a read-only view, refreshed at each access."""
+        self.c_space.links.measure()
+        return self._view('link_lengths')
+
+    @property
+    def link_forces(self):
+        """Current forces of the links, as a read-only view, refreshed at each access."""
+        self.c_space.links.measure()
+        return self._view('link_forces')
+
+    # bulk actuation
+
+    cdef object _link_indices(self, links):
+        """Link indices, as a contiguous uint32 array, from a group name or from a sequence of
+        link indices or Link handles."""
+        if isinstance(links, str):
+            try:
+                return self._link_groups[links]
+            except KeyError:
+                raise KeyError('unknown link group "{}"'.format(links)) from None
+        if not isinstance(links, np.ndarray):
+            links = [_link_index(link) for link in links]
+        indices = np.asarray(links)
+        if indices.ndim != 1 or (indices.size > 0 and indices.dtype.kind not in 'iu'):
+            raise TypeError('expected a sequence of link indices')
+        cdef size_t n_links = self.c_space.links.size()
+        cdef const unsigned int[::1] view
+        cdef const long long[::1] view64
+        if indices.dtype == np.uint32:
+            indices = np.ascontiguousarray(indices)
+            view = indices
+            for k in range(view.shape[0]):
+                if view[k] >= n_links:
+                    raise IndexError('link index out of range')
+        else:
+            view64 = np.ascontiguousarray(indices, dtype=np.int64)
+            for k in range(view64.shape[0]):
+                if view64[k] < 0 or view64[k] >= <long long> n_links:
+                    raise IndexError('link index out of range')
+            indices = np.asarray(view64).astype(np.uint32)
+        return indices
+
+    def add_link_group(self, str name, links):
+        """Register a persistent named group of links, to be actuated with `contract_links`.
+
+        :param links:  link indices (e.g. a NumPy array), or Link handles.
+        """
+        indices = np.array(self._link_indices(links))
+        indices.flags.writeable = False
+        self._link_groups[name] = indices
+
+    @property
+    def link_groups(self):
+        """Named link groups, as a dictionary of read-only arrays of link indices."""
+        return dict(self._link_groups)
+
+    def contract_links(self, links, factors):
+        """Set the expand factors of many links in one native call.
+
+        :param links:    a group name, or link indices (e.g. a NumPy array), or Link handles.
+        :param factors:  one expand factor per link, or a single one for all of them.
+        """
+        cdef const unsigned int[::1] indices = self._link_indices(links)
+        cdef const double[::1] values = np.ascontiguousarray(factors, dtype=np.float64).reshape(-1)
+        cdef bint broadcast = np.ndim(factors) == 0
+        if not broadcast and values.shape[0] != indices.shape[0]:
+            raise ValueError('expected {} factors, got {}'.format(indices.shape[0], values.shape[0]))
+        if indices.shape[0] > 0:
+            self.c_space.links.contract(&indices[0], indices.shape[0], &values[0], broadcast)
+
+    def relax_links(self, links):
+        """Reset the expand factors of many links to 1.0. See `contract_links`."""
+        self.contract_links(links, 1.0)
+
+    def add_actuation_map(self, unsigned int n_inputs, links, inputs, offsets, coefs):
+        """Create a native map from a motor signal of `n_inputs` values to expand factors.
+
+        The expand factor of `links[k]` is the product, over the two columns j, of
+        `offsets[k, j] + coefs[k, j] * signal[inputs[k, j]]`; terms whose input is -1 are skipped.
+
+        :param links:    link indices (e.g. a NumPy array), or Link handles.
+        :param inputs:   (n_links, 2) signal indices, or -1.
+        :param offsets:  (n_links, 2) offsets.
+        :param coefs:    (n_links, 2) coefficients.
+        """
+        cdef const unsigned int[::1] indices = self._link_indices(links)
+        cdef const long long[:, :] inputs_ = np.asarray(inputs, dtype=np.int64).reshape(-1, 2)
+        cdef const double[:, :] offsets_ = np.asarray(offsets, dtype=np.float64).reshape(-1, 2)
+        cdef const double[:, :] coefs_ = np.asarray(coefs, dtype=np.float64).reshape(-1, 2)
+        n = indices.shape[0]
+        if not inputs_.shape[0] == offsets_.shape[0] == coefs_.shape[0] == n:
+            raise ValueError('expected {} inputs, offsets and coefficients'.format(n))
+        for k in range(n):
+            for j in range(2):
+                if not -1 <= inputs_[k, j] < <long long> n_inputs:
+                    raise IndexError('signal index out of range')
+
+        actuation_map = ActuationMap()
+        actuation_map._owner = self._owner
+        actuation_map.c_map = self.c_space.add_actuation_map(n_inputs)
+        for k in range(n):
+            actuation_map.c_map.add(indices[k], inputs_[k, 0], offsets_[k, 0], coefs_[k, 0],
+                                                inputs_[k, 1], offsets_[k, 1], coefs_[k, 1])
+        return actuation_map
+
+    def add_controller(self, function, ActuationMap actuation_map=None, user_data=None,
+                       unsigned int period=1):
+        """Register a compiled controller, called natively at the start of every `period`-th
+        step, before the physics, without going through Python.
+
+        The function has the C signature of `CONTROLLER_FUNCTYPE`. It receives the time, the
+        node arrays (x, y, v_x, v_y) and the sensor buffer, and writes `n_outputs` values in
+        `outputs`. Without `actuation_map`, the outputs are the expand factors of all the links,
+        in place. Else, they are the motor signal of the actuation map.
+
+        :param function:   an integer address (e.g. of a Cython cdef function), a Numba cfunc,
+                           or a ctypes function pointer.
+        :param user_data:  passed to the function as `void*`: an integer address, or a NumPy
+                           array, whose data pointer is passed. Kept alive by the controller.
+        """
+        cdef size_t address = _function_address(function)
+        cdef size_t user_data_address = 0
+        cdef CppActuationMap *c_map = NULL
+        if actuation_map is not None:
+            c_map = actuation_map.c_map
+        if isinstance(user_data, np.ndarray):
+            user_data_address = user_data.ctypes.data
+        elif user_data is not None:
+            user_data_address = user_data
+
+        controller = Controller()
+        controller._owner = self._owner
+        controller.function, controller.user_data = function, user_data
+        controller.actuation_map = actuation_map
+        controller.c_controller = self.c_space.add_controller(
+            <ControllerFunction> address, <void*> user_data_address, c_map, period)
+        self.controllers.append(controller)
+        return controller
+
+    def add_cpg(self, amplitudes, frequencies, links=None, ActuationMap actuation_map=None,
+                phase_offsets=0.0, offsets=None, weights=0.0, phase_biases=0.0,
+                unsigned int period=1):
+        """Add a central pattern generator: coupled phase oscillators, run natively at the start
+        of every `period`-th step. Oscillator i outputs `offsets[i] + amplitudes[i] *
+        sin(phases[i])`, and its phase advances at `2π frequencies[i]` (in Hz), plus the
+        coupling `Σ_j weights[i, j] sin(phases[j] - phases[i] - phase_biases[i, j])`, which
+        pulls `phases[j] - phases[i]` towards `phase_biases[i, j]`.
+
+        Either `links` is given, and the outputs are the expand factors of the links, one per
+        oscillator, or `actuation_map` is, and the outputs are its motor signal. Each parameter
+        is a scalar or an array (n × n for `weights` and `phase_biases`).
+
+        :param offsets:  1.0 by default with `links`, 0.0 with `actuation_map`.
+        """
+        if (links is None) == (actuation_map is None):
+            raise ValueError('expected either links or an actuation map')
+        cdef vector[unsigned int] indices
+        cdef CppActuationMap *c_map = NULL
+        if links is not None:
+            indices = self._link_indices(links)
+            n = indices.size()
+        else:
+            c_map = actuation_map.c_map
+            n = len(actuation_map)
+
+        if offsets is None:
+            offsets = 1.0 if links is not None else 0.0
+        # checked before creating the CPG, so that a bad parameter does not leave it half-set.
+        vectors = [np.broadcast_to(np.asarray(value, dtype=np.float64), shape)
+                   for value, shape in [(amplitudes, (n,)), (frequencies, (n,)),
+                                        (phase_offsets, (n,)), (offsets, (n,)),
+                                        (weights, (n, n)), (phase_biases, (n, n))]]
+
+        cpg = CPG()
+        cpg._owner = self._owner
+        cpg.actuation_map = actuation_map
+        cpg.c_cpg = self.c_space.add_cpg(n, indices, c_map, period)
+        cpg._bind()
+        for view, values in zip([cpg.amplitudes, cpg.frequencies, cpg.phase_offsets, cpg.offsets,
+                                 cpg.weights, cpg.phase_biases], vectors):
+            view[:] = values
+        self.controllers.append(cpg)
+        cpg.reset()
+        return cpg
+
+    def add_mlp(self, layers, links=None, ActuationMap actuation_map=None, output_scales=1.0,
+                output_offsets=None, unsigned int period=1):
+        """Add a dense tanh multi-layer perceptron controller, fed with the sensor buffer and run
+        natively at the start of every `period`-th step.
+
+        Each layer computes `tanh(W @ h + b)`. The outputs, `output_offsets + output_scales * h`,
+        are the expand factors of `links`, one per output, or the motor signal of
+        `actuation_map`. The number of sensors must match the input size of the first layer, and
+        no sensor can be added afterwards.
+
+        :param layers:          list of (W, b) pairs, W of shape (n_out, n_in), b of size n_out.
+        :param output_offsets:  1.0 by default with `links`, 0.0 with `actuation_map`.
+        """
+        if (links is None) == (actuation_map is None):
+            raise ValueError('expected either links or an actuation map')
+        layers = [(np.asarray(W, dtype=np.float64), np.asarray(b, dtype=np.float64).reshape(-1))
+                  for W, b in layers]
+        if len(layers) == 0:
+            raise ValueError('expected at least one layer')
+        dims = [layers[0][0].shape[1]] + [W.shape[0] for W, _ in layers]
+        for k, (W, b) in enumerate(layers):
+            if W.shape != (dims[k + 1], dims[k]) or b.shape != (dims[k + 1],):
+                raise ValueError('inconsistent shapes in layer {}'.format(k))
+        if dims[0] != self.c_space.sensors.values.size():
+            raise ValueError('the first layer expects {} inputs, but the space has {} sensors'.format(
+                             dims[0], self.c_space.sensors.values.size()))
+
+        cdef vector[unsigned int] indices
+        cdef CppActuationMap *c_map = NULL
+        if links is not None:
+            indices = self._link_indices(links)
+            n_outputs = indices.size()
+        else:
+            c_map = actuation_map.c_map
+            n_outputs = len(actuation_map)
+        if dims[-1] != n_outputs:
+            raise ValueError('the last layer has {} outputs, expected {}'.format(dims[-1], n_outputs))
+        if output_offsets is None:
+            output_offsets = 1.0 if links is not None else 0.0
+        output_scales = np.broadcast_to(np.asarray(output_scales, dtype=np.float64), (n_outputs,))
+        output_offsets = np.broadcast_to(np.asarray(output_offsets, dtype=np.float64), (n_outputs,))
+
+        mlp = MLP()
+        mlp._owner = self._owner
+        mlp.actuation_map = actuation_map
+        mlp.c_mlp = self.c_space.add_mlp(dims, indices, c_map, period)
+        mlp._bind()
+        for k, (W, b) in enumerate(layers):
+            mlp.weights[k][:], mlp.biases[k][:] = W, b
+        mlp.output_scales[:], mlp.output_offsets[:] = output_scales, output_offsets
+        self.controllers.append(mlp)
+        return mlp
+
+    def add_growth_schedule(self, links, times, relax_lengths, unsigned int period=1):
+        """Grow links natively: at the start of every `period`-th step, the relax lengths of
+        `links` are interpolated linearly between keyframes, from the current time. Before the
+        first keyframe, they are left untouched; after the last one, they keep its values.
+
+        :param times:          increasing keyframe times, of size K.
+        :param relax_lengths:  K × len(links) relax lengths, one row per keyframe.
+        """
+        cdef vector[unsigned int] indices = self._link_indices(links)
+        times = np.asarray(times, dtype=np.float64).reshape(-1)
+        relax_lengths = np.broadcast_to(np.asarray(relax_lengths, dtype=np.float64),
+                                        (times.shape[0], indices.size()))
+        if np.any(np.diff(times) <= 0):
+            raise ValueError('keyframe times must be strictly increasing')
+
+        schedule = GrowthSchedule()
+        schedule._owner = self._owner
+        schedule.links = np.array(indices, dtype=np.uint32)
+        schedule.links.flags.writeable = False
+        schedule.c_schedule = self.c_space.add_growth_schedule(indices, times.shape[0], period)
+        schedule._bind(indices.size())
+        schedule.times[:], schedule.relax_lengths[:] = times, relax_lengths
+        self.controllers.append(schedule)
+        return schedule
+
+    def add_playback(self, table, links=None, ActuationMap actuation_map=None, sample_dt=None,
+                     double rate=1.0, bool loop=True, interpolation='linear',
+                     unsigned int period=1):
+        """Play a precomputed actuation natively, at the start of every `period`-th step.
+
+        `table` holds one row of outputs per sample, sampled every `sample_dt` seconds (the
+        time step of the space by default) and played `rate` times faster than real time.
+        Between samples, the table is interpolated linearly, or with a Catmull-Rom spline if
+        `interpolation` is 'cubic'. A looping table wraps around from its last row to its first
+        one; else, the playback holds its last row.
+
+        Either `links` is given, and the outputs are the expand factors of the links, one per
+        column, or `actuation_map` is, and the outputs are its motor signal.
+
+        :param table:  (n_samples, n_outputs) array.
+        """
+        if (links is None) == (actuation_map is None):
+            raise ValueError('expected either links or an actuation map')
+        cdef vector[unsigned int] indices
+        cdef CppActuationMap *c_map = NULL
+        if links is not None:
+            indices = self._link_indices(links)
+            n_outputs = indices.size()
+        else:
+            c_map = actuation_map.c_map
+            n_outputs = len(actuation_map)
+        table = np.asarray(table, dtype=np.float64)
+        if table.ndim != 2 or table.shape[1] != n_outputs or table.shape[0] == 0:
+            raise ValueError('expected a table of shape (n_samples, {}), got {}'.format(
+                             n_outputs, table.shape))
+        sample_dt = self.dt if sample_dt is None else sample_dt
+        if sample_dt <= 0:
+            raise ValueError('sample_dt must be positive')
+        if interpolation not in _INTERPOLATIONS:
+            raise ValueError("interpolation must be 'linear' or 'cubic', not {!r}".format(interpolation))
+
+        playback = Playback()
+        playback._owner = self._owner
+        playback.actuation_map = actuation_map
+        playback.c_playback = self.c_space.add_playback(table.shape[0], indices, c_map, period)
+        playback._bind()
+        playback.table[:] = table
+        playback.sample_dt, playback.rate = sample_dt, rate
+        playback.loop, playback.interpolation = loop, interpolation
+        self.controllers.append(playback)
+        return playback
+
+    def add_activation_dynamics(self, links, time_constants, rate_limits=np.inf):
+        """Smooth the actuation of `links` with first-order activation dynamics, integrated
+        natively at each step, after the controllers.
+
+        The expand factor last written to a link, by `Link.contract`, an actuation map or a
+        native controller, becomes its target: the expand factor seen by the physics then
+        converges to it exponentially, with a time constant of `time_constants` seconds, and
+        changes by at most `rate_limits` per second. Controllers can thus run at a low rate, and
+        muscles still move smoothly. A link should belong to a single activation dynamics.
+        Between steps, the expand factors of the links read their targets, and the `states` of
+        the returned handle the smoothed values.
+
+        :param time_constants:  scalar or per-link array; 0.0 follows the target instantly.
+        :param rate_limits:     scalar or per-link array; `np.inf` (the default) for no limit.
+        """
+        cdef vector[unsigned int] indices = self._link_indices(links)
+        n = indices.size()
+        time_constants = np.broadcast_to(np.asarray(time_constants, dtype=np.float64), (n,))
+        rate_limits = np.broadcast_to(np.asarray(rate_limits, dtype=np.float64), (n,))
+        if np.any(time_constants < 0) or np.any(rate_limits < 0):
+            raise ValueError('time constants and rate limits must be non-negative')
+
+        activation = ActivationDynamics()
+        activation._owner = self._owner
+        activation.space = self
+        activation.links = np.array(indices, dtype=np.uint32)
+        activation.links.flags.writeable = False
+        activation.c_activation = self.c_space.add_activation_dynamics(indices)
+        activation._bind()
+        activation.time_constants[:], activation.rate_limits[:] = time_constants, rate_limits
+        self.activations.append(activation)
+        return activation
+
+    # force fields: applied natively to the nodes at each step, after gravity, and listed in
+    # `force_fields`. A field can be turned off by zeroing its parameters.
+
+    def add_drag(self, double linear=0.0, double quadratic=0.0, flow=(0.0, 0.0)):
+        """Add a fluid drag, `F = -(linear + quadratic * |v - flow|) (v - flow)`, relative to a
+        uniform `flow` velocity, e.g. a water current. Integrated semi-implicitly: a strong drag
+        never reverses the relative velocity of a node."""
+        cdef double flow_x, flow_y
+        flow_x, flow_y = flow
+        drag = Drag()
+        drag._owner = self._owner
+        drag.c_drag = new CppDrag(linear, quadratic, flow_x, flow_y)
+        self.c_space.add_force_field(drag.c_drag)
+        self.force_fields.append(drag)
+        return drag
+
+    def add_point_attractor(self, double x, double y, double strength, double softening=1.0):
+        """Add a point attractor at (x, y): an acceleration towards it of magnitude
+        `strength / d²` at distance d, softened by `softening` near the point. A negative
+        strength repels."""
+        attractor = PointAttractor()
+        attractor._owner = self._owner
+        attractor.c_attractor = new CppPointAttractor(x, y, strength, softening)
+        self.c_space.add_force_field(attractor.c_attractor)
+        self.force_fields.append(attractor)
+        return attractor
+
+    def add_node_forces(self, forces=0.0):
+        """Add arbitrary per-node forces, applied at each step: `forces` is broadcast to
+        (n_nodes, 2), and can be rewritten through the `forces` view of the returned handle.
+        Nodes added afterwards receive no force."""
+        n = self.c_space.nodes.size()
+        forces = np.broadcast_to(np.asarray(forces, dtype=np.float64), (n, 2))
+        node_forces = NodeForces()
+        node_forces._owner = self._owner
+        node_forces.c_forces = new CppNodeForces(n)
+        self.c_space.add_force_field(node_forces.c_forces)
+        node_forces.forces = _vector_view(self._owner, node_forces.c_forces.forces, (n, 2))
+        node_forces.forces[:] = forces
+        self.force_fields.append(node_forces)
+        return node_forces
+
+    def set_self_collision(self, bool enabled=True, double radius=1.0, bool same_body=False):
+        """Enable or disable collisions between nodes and links.
+
+        A node cannot come closer than `radius` to a link, unless the node and one of the nodes
+        of the link belong to the same body (see `Node.body`). If `same_body` is True, nodes and
+        links of the same body collide too, except for the link's own nodes. Candidate pairs
+        are found through a spatial hash of the node positions, rebuilt each step.
+        """
+        self.c_space.set_self_collision(enabled, radius, same_body)
+
+    def collision_stats(self):
+        """Occupancy of the collision grids of rects and triangles.
+
+        For each, a dictionary with the cell size (`size_x`, `size_y`), the number of obstacles
+        in the grid (`n_items`) and in the AABB tree (`n_tree`), the number of non-empty cells
+        (`n_cells`), the total number of cell entries (`n_entries`) and the mean and max number
+        of obstacles per non-empty cell (`mean_occupancy`, `max_occupancy`). The grids are built
+        at the first step: before, they are empty.
+        """
+        return {'rects': self.c_space.rect_stats(), 'triangles': self.c_space.triangle_stats()}
+
     cpdef AngleSensor add_angle_sensor(self, Node origin, Node satellite, AngleSensor ref_sensor=None):
+        self._check_sensor_inputs()
         if ref_sensor is None:
-            c_sensor = self.c_space.add_angle_sensor(origin.c_node, satellite.c_node)
+            c_sensor = self.c_space.add_angle_sensor(origin.index, satellite.index)
         else:
-            c_sensor = self.c_space.add_relative_angle_sensor(origin.c_node, satellite.c_node, ref_sensor.c_sensor)
+            c_sensor = self.c_space.add_relative_angle_sensor(origin.index, satellite.index, ref_sensor.c_sensor)
         sensor = AngleSensor(origin, satellite, ref_sensor)
+        sensor._owner = self._owner
         sensor.c_sensor = c_sensor
-        self.sensors.append(sensor)
+        self._add_sensor(sensor)
         return sensor
 
     cpdef TouchSensor add_touch_sensor(self, list nodes):
-        cdef vector[CppNode*] cpp_nodes # = new vector[CppNode*]()
+        cdef vector[unsigned int] cpp_nodes
+        self._check_sensor_inputs()
         for node in nodes:
-            cpp_nodes.push_back((<Node> node).c_node)
+            cpp_nodes.push_back((<Node> node).index)
         c_sensor = self.c_space.add_touch_sensor(cpp_nodes)
         sensor = TouchSensor(nodes)
+        sensor._owner = self._owner
         sensor.c_sensor = c_sensor
-        self.sensors.append(sensor)
+        self._add_sensor(sensor)
         return sensor
 
     cpdef AngularVelocitySensor add_angular_velocity_sensor(self, AngleSensor angle_sensor):
+        self._check_sensor_inputs()
         c_sensor = self.c_space.add_angular_velocity_sensor(angle_sensor.c_sensor)
         sensor = AngularVelocitySensor(angle_sensor)
+        sensor._owner = self._owner
         sensor.c_sensor = c_sensor
-        self.sensors.append(sensor)
+        self._add_sensor(sensor)
         return sensor
 
+    cdef _check_sensor_inputs(self):
+        # the input size of an MLP is fixed to the number of sensors when it is added.
+        for controller in self.controllers:
+            if isinstance(controller, MLP):
+                raise ValueError('sensors must be added before the MLP controllers they feed')
+
+    cdef _add_sensor(self, sensor):
+        self.sensors.append(sensor)
+        self._sensor_buffer = None  # the native buffer may have been reallocated.
+
+    @property
+    def sensor_buffer(self):
+        """Sensor values, as a read-only NumPy view on the native buffer of the space.
+
+        The view is updated in place at each step, without copy. Adding a sensor invalidates it:
+        the previous buffer stays readable, but is no longer updated. Get the attribute again.
+        """
+        cdef vector[shared_ptr[void]] storage  # outgrown buffers are kept by the sensor hub.
+        if self._sensor_buffer is None:
+            self._sensor_buffer = _column_view(self._owner, storage, self.c_space.sensors.values.data(),
+                                               self.c_space.sensors.values.size(), 1, 0, np.float64,
+                                               False)
+        return self._sensor_buffer
+
     cpdef list[double] sensor_values(self):
-        return [sensor.value for sensor in self.sensors]
+        return self.sensor_buffer.tolist()
+
+    cdef bint _has_hooks(self):
+        return self.update_functions or self.entities
+
+    cdef void _pre_step(self) except *:
+        cdef int ticks = self.c_space.ticks
+        for update_function, period in zip(list(self.update_functions),
+                                           hook_periods(self.update_functions, self._update_hooks)):
+            if ticks % period == 0:
+                update_function(self)
+
+    cdef void _post_step(self) except *:
+        cdef int ticks = self.c_space.ticks
+        for entity, period in zip(list(self.entities), hook_periods(self.entities, self._entity_hooks)):
+            if ticks % period == 0:
+                entity.update(self.t)
+
+    cdef unsigned int _steps_to_hook(self, unsigned int n) except *:
+        """Number of steps, at most `n`, until the next tick at which a hook runs."""
+        cdef unsigned int period, steps = n
+        cdef int ticks = self.c_space.ticks
+        for period in (hook_periods(self.update_functions, self._update_hooks) +
+                       hook_periods(self.entities, self._entity_hooks)):
+            steps = min(steps, period - ticks % period)
+        return steps
+
+    cpdef void step(self) except *:
+        """Run one step. The native part of the step runs without the GIL, so that spaces can
+        be stepped concurrently from several Python threads. A space must not be stepped by two
+        threads at the same time."""
+        self._pre_step()
+        with nogil:
+            self.c_space.step()
+        self._post_step()
+
+    def step_n(self, unsigned int n):
+        """Run `n` steps.
+
+        The steps run in C++, without the GIL; sensors are updated natively at the end of each
+        step. The loop only returns to Python at the ticks where an update function or an entity
+        is due, e.g. every `period` steps if they all share the same period.
+        """
+        cdef unsigned int steps
+        if not self._has_hooks():
+            with nogil:
+                self.c_space.step_n(n)
+            return
+        while n > 0:
+            self._pre_step()
+            steps = self._steps_to_hook(n)
+            with nogil:
+                self.c_space.step_n(steps)
+            self._post_step()
+            n -= steps
+
+    def run(self, double until_t):
+        """Step until the time of the space reaches `until_t`. Return the number of steps run."""
+        n = max(0, int(round((until_t - self.t) / self.dt)))
+        self.step_n(n)
+        return n
+
+    cpdef add_entity(self, entity, unsigned int period=1):
+        """Add an entity, whose `update(t)` method is run after every `period`-th step."""
+        self._entity_hooks.append((entity, max(period, 1)))
+        self.entities.append(entity)
 
-    cpdef void step(self) except +:
-        for update_function in self.update_functions:
-            update_function(self)
+    cpdef add_update_function(self, update_function, unsigned int period=1):
+        """Add a function to be run before every `period`-th step, starting with the first
+        one. Take the space as argument."""
+        self._update_hooks.append((update_function, max(period, 1)))
+        self.update_functions.append(update_function)
 
-        self.c_space.step()
 
-        for sensor in self.sensors:
-            sensor.update()
+cdef class SpaceBatch:
+    """Step a set of independent spaces in parallel, in native threads, without the GIL.
 
-        for entity in self.entities:
-            entity.update(self.t)
+    The spaces must have been created with the cpp engine. They are stepped in a pool of
+    `n_threads` threads (0 for one per core). Node and sensor states can be gathered in NumPy
+    arrays stacked along the first axis, one row per space.
+    """
 
-    cpdef add_entity(self, entity):
-        self.entities.append(entity)
+    cdef CppSpaceBatch *c_batch
+    cdef readonly list spaces
 
-    cpdef add_update_function(self, update_function):
-        """Add a function to be run each step. Take the space as argument."""
-        self.update_functions.append(update_function)
+    def __cinit__(self, spaces, unsigned int n_threads=0):
+        self.spaces = []
+        self.c_batch = new CppSpaceBatch(n_threads)
+        for space in spaces:
+            self.add_space(space)
+
+    def __dealloc__(self):
+        del self.c_batch
+
+    def __len__(self):
+        return len(self.spaces)
+
+    @property
+    def n_threads(self):
+        return self.c_batch.n_threads()
+
+    cpdef add_space(self, Space space):
+        if space in self.spaces:
+            raise ValueError('space already in the batch: it would be stepped by two threads')
+        self.c_batch.add_space(space.c_space)
+        self.spaces.append(space)
+
+    cdef bint _has_hooks(self):
+        for space in self.spaces:
+            if (<Space>space)._has_hooks():
+                return True
+        return False
+
+    def step(self):
+        """Run one step of every space."""
+        self.step_n(1)
+
+    def step_n(self, unsigned int n):
+        """Run `n` steps of every space.
+
+        Each thread runs whole spaces for several steps in one go, and the loop only returns to
+        Python at the ticks where an update function or an entity of some space is due: their
+        hooks are then run before and after the parallel steps.
+        """
+        cdef unsigned int steps
+        if not self._has_hooks():
+            with nogil:
+                self.c_batch.step_n(n)
+            return
+        while n > 0:
+            steps = n
+            for space in self.spaces:
+                (<Space>space)._pre_step()
+                steps = min(steps, (<Space>space)._steps_to_hook(n))
+            with nogil:
+                self.c_batch.step_n(steps)
+            for space in self.spaces:
+                (<Space>space)._post_step()
+            n -= steps
+
+    cdef size_t _common_size(self, str name, sizes) except? 0:
+        sizes = set(sizes)
+        if len(sizes) > 1:
+            raise ValueError('spaces have different numbers of {}: {}'.format(name, sorted(sizes)))
+        return sizes.pop() if sizes else 0
+
+    cdef _gather_nodes(self, bint velocities):
+        cdef CppSpace *c_space
+        cdef double *a
+        cdef double *b
+        cdef size_t i, k
+        cdef size_t n = self._common_size('nodes', [(<Space>space).c_space.nodes.size()
+                                                   for space in self.spaces])
+        out = np.empty((len(self.spaces), n, 2), dtype=np.float64)
+        cdef double[:, :, ::1] view = out
+        for i in range(self.c_batch.spaces.size()):
+            c_space = self.c_batch.spaces[i]
+            if velocities:
+                a, b = c_space.nodes.v_x, c_space.nodes.v_y
+            else:
+                a, b = c_space.nodes.x, c_space.nodes.y
+            for k in range(n):
+                view[i, k, 0] = a[k]
+                view[i, k, 1] = b[k]
+        return out
+
+    def positions(self):
+        """Node positions, as an array of shape (n_spaces, n_nodes, 2)"""
+        return self._gather_nodes(False)
+
+    def velocities(self):
+        """Node velocities, as an array of shape (n_spaces, n_nodes, 2)"""
+        return self._gather_nodes(True)
+
+    def sensor_values(self):
+        """Sensor values, as an array of shape (n_spaces, n_sensors)"""
+        cdef CppSpace *c_space
+        cdef size_t i, k
+        cdef size_t n = self._common_size('sensors', [(<Space>space).c_space.sensors.sensors.size()
+                                                     for space in self.spaces])
+        out = np.empty((len(self.spaces), n), dtype=np.float64)
+        cdef double[:, ::1] view = out
+        for i in range(self.c_batch.spaces.size()):
+            c_space = self.c_batch.spaces[i]
+            for k in range(n):
+                view[i, k] = c_space.sensors.values[k]
+        return out
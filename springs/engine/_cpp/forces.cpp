@@ -0,0 +1,59 @@
+#include <cmath>
+
+#include "forces.h"
+#include "space.h"
+
+
+namespace springs {
+
+  Drag::Drag(double linear, double quadratic, double flow_x, double flow_y)
+    : linear(linear), quadratic(quadratic), flow_x(flow_x), flow_y(flow_y) {}
+
+  void Drag::apply(Space& space) {
+    NodeArrays &nodes = space.nodes;
+    const double dt = space.dt();
+    const size_t n = nodes.size();
+    for (size_t i = 0; i < n; i++) {
+      const double u_x = nodes.v_x[i] - flow_x, u_y = nodes.v_y[i] - flow_y;
+      const double c = linear + quadratic * sqrt(u_x * u_x + u_y * u_y);
+      const double scale = 1.0 / (1.0 + dt * nodes.inv_mass[i] * c);
+      nodes.v_x[i] = flow_x + u_x * scale;
+      nodes.v_y[i] = flow_y + u_y * scale;
+    }
+  }
+
+  PointAttractor::PointAttractor(double x, double y, double strength, double softening)
+    : x(x), y(y), strength(strength), softening(softening) {}
+
+  void PointAttractor::apply(Space& space) {
+    NodeArrays &nodes = space.nodes;
+    const double h = strength * space.dt(), eps2 = softening * softening;
+    const size_t n = nodes.size();
+    for (size_t i = 0; i < n; i++) {
+      if (nodes.fixed[i]) { continue; }
+      const double d_x = x - nodes.x[i], d_y = y - nodes.y[i];
+      const double d2 = d_x * d_x + d_y * d_y + eps2;
+      if (d2 == 0.0) { continue; }
+      const double k = h / (d2 * sqrt(d2));
+      nodes.v_x[i] += k * d_x;
+      nodes.v_y[i] += k * d_y;
+    }
+  }
+
+  NodeForces::NodeForces(size_t n_nodes) : forces(2 * n_nodes, 0.0) {}
+
+  size_t NodeForces::size() {
+    return forces.size() / 2;
+  }
+
+  void NodeForces::apply(Space& space) {
+    NodeArrays &nodes = space.nodes;
+    const double dt = space.dt();
+    const size_t n = min(size(), nodes.size());
+    for (size_t i = 0; i < n; i++) {
+      const double h = dt * nodes.inv_mass[i];
+      nodes.v_x[i] += h * forces[2 * i];
+      nodes.v_y[i] += h * forces[2 * i + 1];
+    }
+  }
+}
@@ -0,0 +1,67 @@
+#ifndef FORCES_H
+#define FORCES_H
+
+#include <vector>
+#include <sys/types.h>
+
+
+using namespace std;
+
+namespace springs {
+
+  class Space;
+
+  /*  External force field, applied to the node velocities at the start of each step, right
+   *  after gravity and before the constraints are solved. Fixed nodes are not affected.
+   */
+  class ForceField {
+    public:
+      virtual ~ForceField() = default;
+      virtual void apply(Space& space) = 0;
+  };
+
+  /*  Fluid drag, relative to a uniform flow (flow_x, flow_y):
+   *
+   *      F = -(linear + quadratic * |v - flow|) (v - flow)
+   *
+   *  integrated semi-implicitly, so that strong drag damps the relative velocity without ever
+   *  reversing it, whatever the time step. A drag of zero with a non-zero flow does nothing:
+   *  the flow acts through the drag.
+   */
+  class Drag : public ForceField {
+    public:
+      Drag(double linear, double quadratic, double flow_x, double flow_y);
+
+      double linear, quadratic, flow_x, flow_y;
+
+      void apply(Space& space);
+  };
+
+  /*  Point attractor at (x, y): an acceleration of magnitude `strength / d²` towards it, at
+   *  distance d, softened as `strength * d / (d² + softening²)^(3/2)` near the point. A
+   *  negative strength repels.
+   */
+  class PointAttractor : public ForceField {
+    public:
+      PointAttractor(double x, double y, double strength, double softening);
+
+      double x, y, strength, softening;
+
+      void apply(Space& space);
+  };
+
+  /*  Arbitrary per-node forces, e.g. computed by a controller: `forces` holds (f_x, f_y) for
+   *  each of the first `size()` nodes, interleaved. Nodes added afterwards receive no force.
+   */
+  class NodeForces : public ForceField {
+    public:
+      NodeForces(size_t n_nodes);
+
+      vector<double> forces;
+
+      size_t size();
+      void apply(Space& space);
+  };
+}
+
+#endif
@@ -0,0 +1,112 @@
+#ifndef GRID_H
+#define GRID_H
+
+#include <vector>
+#include <unordered_map>
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <sys/types.h>
+
+#include "aabb_tree.h"
+
+
+using namespace std;
+
+namespace springs {
+
+  // Bin occupancy statistics of a collision detector.
+  struct GridStats {
+    double size_x, size_y;   // cell size
+    size_t n_items;          // obstacles in the grid
+    size_t n_cells;          // non-empty cells
+    size_t n_entries;        // sum of the cell sizes
+    size_t max_occupancy;    // size of the largest cell
+    double mean_occupancy;   // mean size of the non-empty cells
+    size_t n_tree;           // obstacles in the AABB tree
+  };
+
+  // obstacles covering more cells than this are better off in an AABB tree.
+  const size_t MAX_CELLS_PER_ITEM = 64;
+
+  // Cell size along one axis, from the extents of the obstacles along that axis: twice the
+  // median, so that a typical obstacle covers one or two cells, regardless of outliers.
+  inline double cell_size(vector<double> extents) {
+    if (extents.empty()) { return 1.0; }
+    auto median = extents.begin() + extents.size() / 2;
+    nth_element(extents.begin(), median, extents.end());
+    if (*median > 0) { return 2 * *median; }
+    double max_extent = *max_element(extents.begin(), extents.end());
+    return max_extent > 0 ? max_extent : 1.0;
+  }
+
+
+  /*  Sparse grid: only the non-empty cells are stored, in a hash map, so that the memory is
+   *  proportional to the number of obstacles, not to the area of their bounding box.
+   */
+  template <typename T>
+  class SparseGrid {
+    public:
+      double size_x, size_y;
+
+      SparseGrid() : size_x(1.0), size_y(1.0), _n_items(0) {}
+
+      int cell_x(double x) { return floor(x / size_x); }
+      int cell_y(double y) { return floor(y / size_y); }
+
+      size_t n_cells(const AABB &box) {
+        return (size_t)(cell_x(box.x_max) - cell_x(box.x_min) + 1)
+             * (size_t)(cell_y(box.y_max) - cell_y(box.y_min) + 1);
+      }
+
+      void insert(const AABB &box, const T &item) {
+        for (int i = cell_x(box.x_min); i <= cell_x(box.x_max); i++) {
+          for (int j = cell_y(box.y_min); j <= cell_y(box.y_max); j++) {
+            _cells[_key(i, j)].push_back(item);
+          }
+        }
+        _n_items++;
+      }
+
+      // remove the items for which `match(item)` is true from the cells covered by `box`.
+      template <typename F>
+      void remove(const AABB &box, F match) {
+        for (int i = cell_x(box.x_min); i <= cell_x(box.x_max); i++) {
+          for (int j = cell_y(box.y_min); j <= cell_y(box.y_max); j++) {
+            auto cell = _cells.find(_key(i, j));
+            if (cell == _cells.end()) { continue; }
+            vector<T> &items = cell->second;
+            items.erase(remove_if(items.begin(), items.end(), match), items.end());
+            if (items.empty()) { _cells.erase(cell); }
+          }
+        }
+        _n_items--;
+      }
+
+      // items of the cell containing (x, y); NULL if the cell is empty.
+      vector<T>* cell(double x, double y) {
+        auto cell = _cells.find(_key(cell_x(x), cell_y(y)));
+        return cell == _cells.end() ? NULL : &cell->second;
+      }
+
+      GridStats stats() {
+        GridStats stats = {size_x, size_y, _n_items, _cells.size(), 0, 0, 0.0, 0};
+        for (auto& cell: _cells) {
+          stats.n_entries += cell.second.size();
+          stats.max_occupancy = max(stats.max_occupancy, cell.second.size());
+        }
+        if (stats.n_cells > 0) { stats.mean_occupancy = (double)stats.n_entries / stats.n_cells; }
+        return stats;
+      }
+
+    private:
+      unordered_map<uint64_t, vector<T>> _cells;
+      size_t _n_items;
+
+      uint64_t _key(int i, int j) {
+        return ((uint64_t)(uint32_t)i << 32) | (uint64_t)(uint32_t)j;
+      }
+  };
+}
+
+#endif
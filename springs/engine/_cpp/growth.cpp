@@ -0,0 +1,42 @@
+#include "growth.h"
+#include "space.h"
+
+
+namespace springs {
+
+  GrowthSchedule::GrowthSchedule(vector<uint> links, size_t n_keyframes)
+    : links(links), times(n_keyframes, 0.0), relax_lengths(n_keyframes * links.size(), 0.0),
+      _keyframe(0), _finished(false) {}
+
+  size_t GrowthSchedule::n_keyframes() {
+    return times.size();
+  }
+
+  bool GrowthSchedule::finished() {
+    return _finished;
+  }
+
+  void GrowthSchedule::reset() {
+    _keyframe = 0;
+    _finished = false;
+  }
+
+  void GrowthSchedule::actuate(Space& space) {
+    const size_t n = links.size(), n_k = n_keyframes();
+    if (_finished || n_k == 0 || space.t < times[0]) { return; }
+
+    // time only moves forward: the current segment is found by advancing from the last one.
+    while (_keyframe + 1 < n_k && times[_keyframe + 1] <= space.t) { _keyframe++; }
+    double* relax_length = space.links.relax_length;
+    const double* a = &relax_lengths[_keyframe * n];
+
+    if (_keyframe + 1 == n_k) {
+      for (size_t i = 0; i < n; i++) { relax_length[links[i]] = a[i]; }
+      _finished = true;
+      return;
+    }
+    const double* b = a + n;
+    const double alpha = (space.t - times[_keyframe]) / (times[_keyframe + 1] - times[_keyframe]);
+    for (size_t i = 0; i < n; i++) { relax_length[links[i]] = a[i] + alpha * (b[i] - a[i]); }
+  }
+}
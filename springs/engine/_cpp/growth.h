@@ -0,0 +1,40 @@
+#ifndef GROWTH_H
+#define GROWTH_H
+
+#include <vector>
+#include <sys/types.h>
+
+#include "actuation.h"
+
+
+using namespace std;
+
+namespace springs {
+
+  /*  Growth schedule: relax lengths of `links` at keyframe times, interpolated linearly in
+   *  time. Before the first keyframe, nothing is written; after the last one, its relax
+   *  lengths are written once, and the schedule is finished. Nonlinear growth curves are
+   *  approximated by adding keyframes.
+   *
+   *  `relax_lengths` is a n_keyframes × n_links matrix, in row-major order.
+   */
+  class GrowthSchedule : public Actuator {
+    public:
+      GrowthSchedule(vector<uint> links, size_t n_keyframes);
+
+      vector<uint> links;
+      vector<double> times, relax_lengths;
+
+      size_t n_keyframes();
+      bool finished();
+      // restart the schedule, e.g. after rewriting the keyframes.
+      void reset();
+      void actuate(Space& space);
+
+    protected:
+      size_t _keyframe;  // keyframe that starts the current segment.
+      bool _finished;
+  };
+}
+
+#endif
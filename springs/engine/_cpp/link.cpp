@@ -1,5 +1,6 @@
 #include <iostream>
 #include <algorithm>
+#include <cassert>
 
 #include "link.h"
 
@@ -7,155 +8,280 @@
 
 namespace springs {
 
-  Link::Link() {}
+  enum { LINK_NODE_A, LINK_NODE_B, LINK_N_INDICES };
+  enum { LINK_EXPAND_FACTOR, LINK_RELAX_LENGTH, LINK_MAX_IMPULSE, LINK_MAX_LENGTH,
+         LINK_STIFFNESS, LINK_DAMPING_RATIO,
+         LINK_MASS, LINK_GAMMA, LINK_BIAS, LINK_IMPULSE, LINK_U_X, LINK_U_Y,
+         LINK_MEASURED_LENGTH, LINK_MEASURED_FORCE, LINK_N_VALUES };
+  enum { LINK_ACTUATED, LINK_ACTIVE, LINK_N_FLAGS };
 
-  Link::Link(double dt, Node* node_a, Node* node_b, double stiffness,
-             double damping_ratio, bool actuated, double max_impulse)
-  : node_a(node_a), node_b(node_b), actuated(actuated), expand_factor(1.0), max_impulse(max_impulse),
-    _dt(dt), _stiffness(stiffness), _damping_ratio(damping_ratio)
+  LinkArrays::LinkArrays(NodeArrays* nodes)
+  : nodes(nodes), dt(0), _colored(false), _indices(LINK_N_INDICES), _values(LINK_N_VALUES), _flags(LINK_N_FLAGS)
   {
-    node_a->links.push_back(this);
-    node_b->links.push_back(this);
+    _bind();
+  }
+
+  void LinkArrays::_bind() {
+    node_a = _indices.column(LINK_NODE_A);
+    node_b = _indices.column(LINK_NODE_B);
 
-    relax_length  = _distance_unit_vector();
-    assert (relax_length > 0);
-    max_length    = relax_length;
+    expand_factor = _values.column(LINK_EXPAND_FACTOR);
+    relax_length  = _values.column(LINK_RELAX_LENGTH);
+    max_impulse   = _values.column(LINK_MAX_IMPULSE);
+    max_length    = _values.column(LINK_MAX_LENGTH);
+    stiffness     = _values.column(LINK_STIFFNESS);
+    damping_ratio = _values.column(LINK_DAMPING_RATIO);
+    mass          = _values.column(LINK_MASS);
+    gamma         = _values.column(LINK_GAMMA);
+    bias          = _values.column(LINK_BIAS);
+    impulse       = _values.column(LINK_IMPULSE);
+    u_x           = _values.column(LINK_U_X);
+    u_y           = _values.column(LINK_U_Y);
+    measured_length = _values.column(LINK_MEASURED_LENGTH);
+    measured_force  = _values.column(LINK_MEASURED_FORCE);
 
-    _update();
+    actuated = _flags.column(LINK_ACTUATED);
+    active   = _flags.column(LINK_ACTIVE);
   }
 
-  double Link::length() {
-    double d_x = node_b->x - node_a->x;
-    double d_y = node_b->y - node_a->y;
-    return sqrt(d_x*d_x + d_y*d_y);
+  size_t LinkArrays::size() {
+    return _values.size();
+  }
+
+  uint LinkArrays::_add_row(uint node_a_, uint node_b_, double stiffness_,
+                            double damping_ratio_, bool actuated_, double max_impulse_) {
+    uint i = _values.push_back();
+    _indices.push_back();
+    _flags.push_back();
+    _bind();
+    _colored = false;
+
+    node_a[i] = node_a_;
+    node_b[i] = node_b_;
+    actuated[i]      = actuated_;
+    expand_factor[i] = 1.0;
+    max_impulse[i]   = max_impulse_;
+    stiffness[i]     = stiffness_;
+    damping_ratio[i] = damping_ratio_;
+
+    if (node_links.size() < nodes->size()) { node_links.resize(nodes->size()); }
+    node_links[node_a_].push_back(i);
+    node_links[node_b_].push_back(i);
+
+    relax_length[i] = _distance_unit_vector(i);
+    assert (relax_length[i] > 0);
+    max_length[i]   = relax_length[i];
+    return i;
   }
 
-  inline double Link::dt() {
-    return _dt;
+  uint LinkArrays::add(uint node_a_, uint node_b_, double stiffness_, double damping_ratio_,
+                       bool actuated_, double max_impulse_) {
+    uint i = _add_row(node_a_, node_b_, stiffness_, damping_ratio_, actuated_, max_impulse_);
+    _update(i);
+    return i;
   }
 
-  inline void Link::set_dt(double value) {
-    _dt = value;
-    _update();
+  double LinkArrays::length(uint i) {
+    double d_x = nodes->x[node_b[i]] - nodes->x[node_a[i]];
+    double d_y = nodes->y[node_b[i]] - nodes->y[node_a[i]];
+    return sqrt(d_x*d_x + d_y*d_y);
+  }
+
+  void LinkArrays::set_dt(double value) {
+    dt = value;
+    for (uint i = 0; i < size(); i++) { _update(i); }
   }
 
-  double Link::stiffness() {
-    return _stiffness;
+  void LinkArrays::set_stiffness(uint i, double value) {
+    stiffness[i] = value;
+    _update(i);
   }
 
-  void Link::set_stiffness(double value) {
-    _stiffness = value;
-    _update();
+  void LinkArrays::set_damping_ratio(uint i, double value) {
+    damping_ratio[i] = value;
+    _update(i);
   }
 
-  double Link::damping_ratio() {
-    return _damping_ratio;
+  double LinkArrays::frequency(uint i) {
+    double omega = sqrt(stiffness[i] * (nodes->inv_mass[node_a[i]] + nodes->inv_mass[node_b[i]]));
+    return omega / 6.28318530718;  // omega / 2π
   }
 
-  void Link::set_damping_ratio(double value) {
-    _damping_ratio = value;
-    _update();
+  void LinkArrays::set_frequency(uint i, double value) {
+    _update(i);
   }
 
-  double Link::frequency() {
-    return _frequency;
+  void LinkArrays::contract(uint i, double value) {
+    expand_factor[i] = value;
   }
 
-  void Link::set_frequency(double value) {
-    double _mass = 1 / (node_a->inv_mass() + node_b->inv_mass());
-    _frequency = sqrt(_stiffness / _mass) / 6.28318530718;  // omega / 2π
-    _update();
+  void LinkArrays::contract(const uint* indices, size_t n, const double* factors,
+                            bool broadcast) {
+    if (broadcast) {
+      for (size_t k = 0; k < n; k++) { expand_factor[indices[k]] = factors[0]; }
+    } else {
+      for (size_t k = 0; k < n; k++) { expand_factor[indices[k]] = factors[k]; }
+    }
   }
 
-  void Link::contract(double value) {
-    expand_factor = value;
+  void LinkArrays::relax(uint i) {
+    expand_factor[i] = 1.0;
   }
 
-  void Link::relax() {
-    expand_factor = 1.0;
+  void LinkArrays::update_node(uint node) {
+    if (node >= node_links.size()) { return; }
+    for (auto& i: node_links[node]) { _update(i); }
   }
 
 
   // Physic updates
 
-  inline void Link::_update() {
-    active = !(node_a->fixed() && node_b->fixed());
-    if (active) {
-      _inv_mass = node_a->inv_mass() + node_b->inv_mass();
-      _mass = _inv_mass == 0 ? 0.0 : 1.0 / _inv_mass;
+  inline void LinkArrays::_update(uint i) {
+    const uint a = node_a[i], b = node_b[i];
+    active[i] = !(nodes->fixed[a] && nodes->fixed[b]);
+    if (active[i]) {
+      double _inv_mass = nodes->inv_mass[a] + nodes->inv_mass[b];
+      double _mass = _inv_mass == 0 ? 0.0 : 1.0 / _inv_mass;
 
-      double omega = sqrt(_stiffness * _inv_mass);
-      _frequency = omega / 6.28318530718;  // omega / 2π
-      double _damping = 2 * _mass * _damping_ratio * omega;
-      _gamma = 1.0 / (_dt * (_damping + _dt * _stiffness));
+      double omega = sqrt(stiffness[i] * _inv_mass);
+      double _damping = 2 * _mass * damping_ratio[i] * omega;
+      gamma[i] = 1.0 / (dt * (_damping + dt * stiffness[i]));
 
-      _inv_mass += _gamma;
-      _mass = 1 / _inv_mass;
-      _impulse = 0.0;
+      _inv_mass += gamma[i];
+      mass[i] = 1 / _inv_mass;
+      impulse[i] = 0.0;
     }
   }
 
-  inline void Link::_update_velocities(const double impulse) {
+  inline void LinkArrays::_update_velocities(uint i, const double impulse) {
     if (impulse != 0) {
-      double P_x = impulse * _u_x;
-      double P_y = impulse * _u_y;
+      const uint a = node_a[i], b = node_b[i];
+      double P_x = impulse * u_x[i];
+      double P_y = impulse * u_y[i];
 
-      if (!node_a->fixed()) {
-        node_a->v_x -= P_x * node_a->inv_mass();
-        node_a->v_y -= P_y * node_a->inv_mass();
+      if (!nodes->fixed[a]) {
+        nodes->v_x[a] -= P_x * nodes->inv_mass[a];
+        nodes->v_y[a] -= P_y * nodes->inv_mass[a];
       }
 
-      if (!node_b->fixed()) {
-        node_b->v_x += P_x * node_b->inv_mass();
-        node_b->v_y += P_y * node_b->inv_mass();
+      if (!nodes->fixed[b]) {
+        nodes->v_x[b] += P_x * nodes->inv_mass[b];
+        nodes->v_y[b] += P_y * nodes->inv_mass[b];
       }
     }
   }
 
   // Return the distance *and* update the unit vector
-  inline double Link::_distance_unit_vector() {
-    double d_x = node_b->x - node_a->x;
-    double d_y = node_b->y - node_a->y;
+  inline double LinkArrays::_distance_unit_vector(uint i) {
+    double d_x = nodes->x[node_b[i]] - nodes->x[node_a[i]];
+    double d_y = nodes->y[node_b[i]] - nodes->y[node_a[i]];
     double d   = sqrt(d_x*d_x + d_y*d_y);
     if (d > 0) {
-      _u_x = d_x / d;
-      _u_y = d_y / d;
+      u_x[i] = d_x / d;
+      u_y[i] = d_y / d;
     }
     return d;
   }
 
-  inline double Link::prestep() {
-    if (active) {
-      double d = _distance_unit_vector();
-      if (d > 0.0) {
-        double diff_d = d - expand_factor * relax_length;
-        _bias = diff_d * _dt * _stiffness * _gamma;
-        _update_velocities(_impulse);
-        return _impulse;
+  inline void LinkArrays::prestep() {
+    const size_t n = size();
+    for (uint i = 0; i < n; i++) {
+      if (active[i]) {
+        double d = _distance_unit_vector(i);
+        if (d > 0.0) {
+          double diff_d = d - expand_factor[i] * relax_length[i];
+          bias[i] = diff_d * dt * stiffness[i] * gamma[i];
+          _update_velocities(i, impulse[i]);
+        }
       }
     }
-    return 0.0;
   }
 
   // Relative velocity, projected onto the link's direction
-  inline double Link::_relative_velocity() {
-    double vBA_x = node_b->v_x - node_a->v_x;
-    double vBA_y = node_b->v_y - node_a->v_y;
-    return _u_x * vBA_x + _u_y * vBA_y;
-  }
-
-  inline double Link::substep() {
-    if (active) {
-      double v_r = _relative_velocity();
-      double impulse = - _mass * (v_r + _bias + _gamma * _impulse);
-      _impulse += impulse;
-      _update_velocities(impulse);
-      return impulse;
+  inline double LinkArrays::_relative_velocity(uint i) {
+    double vBA_x = nodes->v_x[node_b[i]] - nodes->v_x[node_a[i]];
+    double vBA_y = nodes->v_y[node_b[i]] - nodes->v_y[node_a[i]];
+    return u_x[i] * vBA_x + u_y[i] * vBA_y;
+  }
+
+  inline void LinkArrays::_solve(uint i) {
+    if (active[i]) {
+      double v_r = _relative_velocity(i);
+      double impulse_i = - mass[i] * (v_r + bias[i] + gamma[i] * impulse[i]);
+      impulse[i] += impulse_i;
+      _update_velocities(i, impulse_i);
+    }
+  }
+
+  inline void LinkArrays::substep() {
+    const size_t n = size();
+    for (uint i = 0; i < n; i++) { _solve(i); }
+  }
+
+  // links solved by a thread in one go: small enough to balance the load, large enough to
+  // amortize the dispatch.
+  const size_t COLOR_BLOCK_SIZE = 256;
+
+  void LinkArrays::substep(ThreadPool &pool) {
+    if (!_colored) { color(); }
+    for (size_t c = 0; c < n_colors(); c++) {
+      const size_t begin = color_offsets[c], end = color_offsets[c + 1];
+      const size_t n_blocks = (end - begin + COLOR_BLOCK_SIZE - 1) / COLOR_BLOCK_SIZE;
+      pool.parallel_for(n_blocks, [&](size_t block) {
+        const size_t block_end = min(end, begin + (block + 1) * COLOR_BLOCK_SIZE);
+        for (size_t k = begin + block * COLOR_BLOCK_SIZE; k < block_end; k++) {
+          _solve(colored_links[k]);
+        }
+      });
+    }
+  }
+
+  size_t LinkArrays::n_colors() {
+    return color_offsets.empty() ? 0 : color_offsets.size() - 1;
+  }
+
+  // Greedy coloring, in link order: each link takes the smallest color not used by the links
+  // sharing one of its nodes.
+  void LinkArrays::color() {
+    const size_t n = size();
+    const uint NONE = (uint)-1;
+    vector<uint> colors(n, NONE);
+    vector<char> taken;
+    uint n_colors_ = 0;
+
+    for (uint i = 0; i < n; i++) {
+      taken.assign(n_colors_ + 1, false);
+      for (uint node: {node_a[i], node_b[i]}) {
+        for (auto& j: node_links[node]) {
+          if (colors[j] != NONE) { taken[colors[j]] = true; }
+        }
+      }
+      uint c = 0;
+      while (taken[c]) { c++; }
+      colors[i] = c;
+      n_colors_ = max(n_colors_, c + 1);
     }
-    return 0.0;
+
+    // counting sort, stable in link order.
+    color_offsets.assign(n_colors_ + 1, 0);
+    for (uint i = 0; i < n; i++) { color_offsets[colors[i] + 1]++; }
+    for (uint c = 0; c < n_colors_; c++) { color_offsets[c + 1] += color_offsets[c]; }
+    colored_links.resize(n);
+    vector<size_t> cursor(color_offsets.begin(), color_offsets.end() - 1);
+    for (uint i = 0; i < n; i++) { colored_links[cursor[colors[i]]++] = i; }
+
+    _colored = true;
+  }
+
+  double LinkArrays::force(uint i) {
+    return impulse[i] / dt;
   }
 
-  double Link::force() {
-    return _impulse / _dt;
+  void LinkArrays::measure() {
+    const size_t n = size();
+    for (uint i = 0; i < n; i++) {
+      measured_length[i] = length(i);
+      measured_force[i]  = force(i);
+    }
   }
 }
@@ -1,57 +1,110 @@
 #ifndef LINK_H
 #define LINK_H
 
+#include <vector>
+#include <sys/types.h>
+
+#include "columns.h"
+#include "node.h"
+#include "threads.h"
+
+
+using namespace std;
 
 namespace springs {
 
-  class Link {
+  /*  Link table: each link is a row, designated by its index, and each field is a contiguous
+   *  array. `prestep()` and `substep()` sweep the whole table linearly.
+   *
+   *  `substep(pool)` is the parallel alternative: the links are colored so that no two links of
+   *  the same color share a node, and the links of each color are solved concurrently. The
+   *  result does not depend on the number of threads, but differs from the linear sweep, since
+   *  the links are solved in a different order.
+   *
+   *  The field pointers are refreshed when the table grows: never keep them across an `add()`
+   *  call.
+   */
+  class LinkArrays {
 
     public:
-      Link();
-      Link(double dt, Node* node_a, Node* node_b,
-           double stiffness, double damping_ratio, bool actuated, double max_impulse);
+      LinkArrays(NodeArrays* nodes);
 
-      Node* node_a;
-      Node* node_b;
+      NodeArrays* nodes;
+      double dt;
 
-      bool actuated, active;
-      double expand_factor, relax_length, max_impulse;
-      double max_length; // max *achieved* length.
+      uint *node_a, *node_b;  // node indices
 
-      double length();
+      char   *actuated, *active;
+      double *expand_factor, *relax_length, *max_impulse;
+      double *max_length; // max *achieved* length.
+      double *stiffness, *damping_ratio;
 
-      double dt();
-      void set_dt(double);
+      // precomputed by `_update()`, and solver state
+      double *mass, *gamma, *bias, *impulse;
+      double *u_x, *u_y;  // unit vector, from node_a to node_b
+
+      // current length and force, refreshed by `measure()` only.
+      double *measured_length, *measured_force;
 
-      double stiffness();
-      void set_stiffness(double value);
+      // links connected to each node: because links precompute values that depend on the
+      // node parameters (mass), they must be updated each time those change.
+      vector<vector<uint>> node_links;
 
-      double damping_ratio();
-      void set_damping_ratio(double value);
+      // link indices sorted by color; the links of color c are in
+      // [color_offsets[c], color_offsets[c + 1]). Computed by `color()`.
+      vector<uint> colored_links;
+      vector<size_t> color_offsets;
+      size_t n_colors();
+      void color();
 
-      double frequency();
-      void set_frequency(double value);
+      size_t size();
+      // storage of the table, to keep it alive in views (see Columns).
+      vector<shared_ptr<void>> storage() const {
+        return {_indices.storage(), _values.storage(), _flags.storage()};
+      }
+      uint add(uint node_a, uint node_b, double stiffness, double damping_ratio, bool actuated,
+               double max_impulse);
 
-      void contract(double expand_factor);
-      void relax();
+      double length(uint i);
 
-      double prestep();
-      double substep();
-      void  _update();
+      void set_dt(double);
+      void set_stiffness(uint i, double value);
+      void set_damping_ratio(uint i, double value);
 
-      double force();
+      double frequency(uint i);
+      void set_frequency(uint i, double value);
+
+      void contract(uint i, double expand_factor);
+      // contract the links `indices[k]` by `factors[k]`, or all of them by `factors[0]` if
+      // `broadcast` is true.
+      void contract(const uint* indices, size_t n, const double* factors, bool broadcast);
+      void relax(uint i);
+
+      void prestep();
+      void substep();
+      void substep(ThreadPool &pool);
+      void update_node(uint node);
+      void _update(uint i);
+
+      double force(uint i);
+      // refresh `measured_length` and `measured_force` for all the links.
+      void measure();
 
     protected:
-      void _update_velocities(const double impulse);
-      // Return the distance *and* update the unit vector
-      double _distance_unit_vector();
-      double _relative_velocity();
+      bool _colored;  // whether `colored_links` is up to date.
 
-      double _mass, _inv_mass;
-      double _u_x, _u_y;
+      Columns<uint>   _indices;
+      Columns<double> _values;
+      Columns<char>   _flags;
 
-      double _dt, _stiffness, _damping_ratio, _frequency;
-      double _bias, _gamma, _impulse, _v_substep;
+      uint _add_row(uint node_a, uint node_b, double stiffness, double damping_ratio,
+                    bool actuated, double max_impulse);
+      void _bind();
+      void _update_velocities(uint i, const double impulse);
+      // Return the distance *and* update the unit vector
+      double _distance_unit_vector(uint i);
+      double _relative_velocity(uint i);
+      void _solve(uint i);
   };
 }
 
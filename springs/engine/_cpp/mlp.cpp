@@ -0,0 +1,49 @@
+#include <cmath>
+#include <stdexcept>
+
+#include "mlp.h"
+#include "space.h"
+
+
+namespace springs {
+
+  static size_t n_parameters(const vector<size_t> &dims) {
+    size_t n = 0;
+    for (size_t k = 0; k + 1 < dims.size(); k++) { n += (dims[k] + 1) * dims[k + 1]; }
+    return n;
+  }
+
+  MLP::MLP(vector<size_t> dims, vector<uint> links, ActuationMap* actuation_map)
+    : OutputActuator(dims.back(), links, actuation_map), dims(dims),
+      parameters(n_parameters(dims), 0.0),
+      output_scales(dims.back(), 1.0), output_offsets(dims.back(), 0.0) {}
+
+  void MLP::actuate(Space& space) {
+    const vector<double> &sensors = space.sensors->values;
+    if (sensors.size() != dims[0]) {
+      throw runtime_error("the number of sensors does not match the input size of the MLP");
+    }
+
+    _input.assign(sensors.begin(), sensors.end());
+    const double* p = parameters.data();
+    for (size_t k = 0; k + 1 < dims.size(); k++) {
+      const size_t n_in = dims[k], n_out = dims[k + 1];
+      const double* bias = p + n_in * n_out;
+      _output.resize(n_out);
+      for (size_t i = 0; i < n_out; i++) {
+        const double* w = p + i * n_in;
+        double sum = bias[i];
+        for (size_t j = 0; j < n_in; j++) { sum += w[j] * _input[j]; }
+        _output[i] = tanh(sum);
+      }
+      p = bias + n_out;
+      _input.swap(_output);
+    }
+
+    const size_t n = outputs.size();
+    for (size_t i = 0; i < n; i++) {
+      outputs[i] = output_offsets[i] + output_scales[i] * _input[i];
+    }
+    _apply_outputs(space);
+  }
+}
@@ -0,0 +1,36 @@
+#ifndef MLP_H
+#define MLP_H
+
+#include <vector>
+#include <sys/types.h>
+
+#include "actuation.h"
+
+
+using namespace std;
+
+namespace springs {
+
+  /*  Dense multi-layer perceptron controller, fed with the sensor buffer of the space:
+   *
+   *      h_0 = sensors,  h_k+1 = tanh(W_k h_k + b_k),
+   *      outputs = output_offsets + output_scales * h_last
+   *
+   *  `dims` holds the input size, the hidden sizes and the output size. All the parameters
+   *  are in one flat array: for each layer, W_k (dims[k+1] × dims[k], row-major), then b_k.
+   */
+  class MLP : public OutputActuator {
+    public:
+      MLP(vector<size_t> dims, vector<uint> links, ActuationMap* actuation_map);
+
+      vector<size_t> dims;
+      vector<double> parameters, output_scales, output_offsets;
+
+      void actuate(Space& space);
+
+    protected:
+      vector<double> _input, _output;  // activations of the current layer.
+  };
+}
+
+#endif
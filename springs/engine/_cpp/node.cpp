@@ -3,7 +3,6 @@
 #include <sys/types.h>
 
 #include "node.h"
-#include "link.h"
 
 
 // bound on how much a node position can change from one update to another
@@ -13,57 +12,100 @@
 
 namespace springs {
 
-  Node::Node() {}
-  Node::Node(double dt, double x, double y, double mass, double friction, bool fixed)
-    : dt(dt), x(x), y(y), v_x(0), v_y(0), friction(friction), colliding(false), _fixed(fixed) {
-    set_mass(mass);
-    _dt_sq = dt * dt;
+  // column order matters: (x, y) and (v_x, v_y) must be adjacent.
+  enum { NODE_X, NODE_Y, NODE_X_PREV, NODE_Y_PREV, NODE_V_X, NODE_V_Y,
+         NODE_MASS, NODE_INV_MASS, NODE_FRICTION, NODE_N_VALUES };
+  enum { NODE_FIXED, NODE_COLLIDING, NODE_N_FLAGS };
+  enum { NODE_BODY, NODE_N_INDICES };
+
+  NodeArrays::NodeArrays() : _values(NODE_N_VALUES), _flags(NODE_N_FLAGS),
+                             _indices(NODE_N_INDICES) {
+    _bind();
   }
 
-  double Node::mass() {
-    return _mass;
+  inline void NodeArrays::_bind() {
+    x        = _values.column(NODE_X);
+    y        = _values.column(NODE_Y);
+    x_prev   = _values.column(NODE_X_PREV);
+    y_prev   = _values.column(NODE_Y_PREV);
+    v_x      = _values.column(NODE_V_X);
+    v_y      = _values.column(NODE_V_Y);
+    mass     = _values.column(NODE_MASS);
+    inv_mass = _values.column(NODE_INV_MASS);
+    friction = _values.column(NODE_FRICTION);
+
+    fixed     = _flags.column(NODE_FIXED);
+    colliding = _flags.column(NODE_COLLIDING);
+
+    body = _indices.column(NODE_BODY);
   }
 
-  void Node::set_mass(const double mass) {
-    _mass     = mass;
-    _inv_mass = _fixed ? 0.0 : 1.0 / _mass;
-    for (auto& link: links) {
-      link->_update();
-    }
+  size_t NodeArrays::size() {
+    return _values.size();
   }
 
-  double Node::inv_mass() { return _inv_mass; }
+  void NodeArrays::reserve(size_t n) {
+    _values.reserve(n);
+    _flags.reserve(n);
+    _indices.reserve(n);
+    _bind();
+  }
 
-  bool Node::fixed() { return _fixed; }
+  uint NodeArrays::add(double x_, double y_, double mass_, double friction_, bool fixed_) {
+    uint i = _values.push_back();
+    _flags.push_back();
+    _indices.push_back();
+    _bind();
+
+    x[i] = x_;
+    y[i] = y_;
+    v_x[i] = 0;
+    v_y[i] = 0;
+    friction[i]  = friction_;
+    colliding[i] = false;
+    fixed[i]     = fixed_;
+    body[i]      = 0;
+    set_mass(i, mass_);
+    return i;
+  }
+
+  void NodeArrays::set_mass(uint i, double value) {
+    mass[i]     = value;
+    inv_mass[i] = fixed[i] ? 0.0 : 1.0 / value;
+  }
 
-  void Node::set_fixed(const bool fixed) {
-    if (_fixed != fixed) {
-      _inv_mass = fixed ? 0.0 : 1.0 / _mass;
+  void NodeArrays::set_fixed(uint i, bool value) {
+    if (fixed[i] != value) {
+      inv_mass[i] = value ? 0.0 : 1.0 / mass[i];
     }
-    _fixed = fixed;
+    fixed[i] = value;
   }
 
-  inline void Node::update_position() {
-    x_prev = x;
-    y_prev = y;
-    if (_fixed) {
-      v_x = 0;
-      v_y = 0;
-    } else {
-      // bounding large velocities to avoid instabilities
-      double translation_squared = _dt_sq * (v_x * v_x + v_y * v_y);
-      if (translation_squared > max_translation_squared) {
-          double translation = sqrt(translation_squared);
-          v_x *= max_translation / translation;
-          v_y *= max_translation / translation;
+  inline void NodeArrays::update_positions(double dt) {
+    const double dt_sq = dt * dt;
+    const size_t n = size();
+    for (size_t i = 0; i < n; i++) {
+      x_prev[i] = x[i];
+      y_prev[i] = y[i];
+      if (fixed[i]) {
+        v_x[i] = 0;
+        v_y[i] = 0;
+      } else {
+        // bounding large velocities to avoid instabilities
+        double translation_squared = dt_sq * (v_x[i] * v_x[i] + v_y[i] * v_y[i]);
+        if (translation_squared > max_translation_squared) {
+            double translation = sqrt(translation_squared);
+            v_x[i] *= max_translation / translation;
+            v_y[i] *= max_translation / translation;
+        }
+        x[i] += dt * v_x[i];
+        y[i] += dt * v_y[i];
       }
-      x += dt * v_x;
-      y += dt * v_y;
     }
   }
 
-  void Node::translate(const double dx, const double dy) {
-    x += dx;
-    y += dy;
+  void NodeArrays::translate(uint i, double dx, double dy) {
+    x[i] += dx;
+    y[i] += dy;
   }
 }
@@ -3,50 +3,57 @@
 
 #include <vector>
 #include <cmath>
+#include <sys/types.h>
+
+#include "columns.h"
 
 
 using namespace std;
 
 namespace springs {
-  // because cluster does not support C++17.
+  // v clamped to [lower, upper]; the argument order differs from std::clamp(v, lower, upper).
   double clamp(double lower, double v, double upper) {
     return fmax(lower, fmin(v, upper));
   }
 
-  class Link;
-
-  class Node {
+  /*  Node state, stored as one contiguous array per field (structure of arrays).
+   *
+   *  Nodes are designated by their index. The field pointers are refreshed when the arrays
+   *  grow: never keep them across an `add()` call.
+   */
+  class NodeArrays {
     public:
-      double dt;
-      double x, y;           // position
-      double x_prev, y_prev; // position at the previous timestep
-      double v_x, v_y;       // velocity
-      double friction;
-      bool   colliding;       // a collision was detected during the last timestep.
-
-      // Links connected to the node
-      // because links precompute values that may depend on a node parameter (mass, friction),
-      // we want to call their `_update()` each time we change the value of a node parameter.
-      vector<Link*> links;
-
-      Node();
-      Node(double dt, double x, double y, double mass, double friction, bool fixed);
-
-      double mass();
-      void set_mass(const double mass);
-      double inv_mass();
-
-      bool fixed();
-      void set_fixed(const bool fixed);
-
-      void update_position();
-      void translate(const double dx, const double dy);
+      NodeArrays();
+
+      double *x, *y;           // position
+      double *x_prev, *y_prev; // position at the previous timestep
+      double *v_x, *v_y;       // velocity
+      double *mass, *inv_mass;
+      double *friction;
+      char   *fixed;
+      char   *colliding;       // a collision was detected during the last timestep.
+      uint   *body;            // body id, to filter self-collisions.
+
+      size_t size();
+      void reserve(size_t n);
+      // storage of the arrays, to keep it alive in views (see Columns).
+      vector<shared_ptr<void>> storage() const {
+        return {_values.storage(), _flags.storage(), _indices.storage()};
+      }
+      uint add(double x, double y, double mass, double friction, bool fixed);
+
+      void set_mass(uint i, double mass);
+      void set_fixed(uint i, bool fixed);
+
+      void update_positions(double dt);
+      void translate(uint i, double dx, double dy);
 
     private:
-      double _mass;
-      double _inv_mass;
-      double _fixed;
-      double _dt_sq;
+      Columns<double> _values;
+      Columns<char>   _flags;
+      Columns<uint>   _indices;
+
+      void _bind();
   };
 }
 
@@ -0,0 +1,65 @@
+#include <cmath>
+
+#include "playback.h"
+#include "space.h"
+
+
+namespace springs {
+
+  Playback::Playback(size_t n_samples, vector<uint> links, ActuationMap* actuation_map)
+    : OutputActuator(actuation_map ? actuation_map->n_inputs : links.size(), links, actuation_map),
+      table(n_samples * outputs.size(), 0.0), sample_dt(1.0), rate(1.0), position(0.0),
+      loop(true), interpolation(LINEAR), _finished(false) {}
+
+  size_t Playback::n_samples() {
+    return outputs.empty() ? 0 : table.size() / outputs.size();
+  }
+
+  bool Playback::finished() {
+    return _finished;
+  }
+
+  void Playback::reset() {
+    position = 0.0;
+    _finished = false;
+  }
+
+  // sample `k`, wrapped around when looping, else clamped to the table.
+  inline const double* Playback::_sample(long k) {
+    const long n = n_samples();
+    if (loop) { k = ((k % n) + n) % n; }
+    else      { k = k < 0 ? 0 : (k >= n ? n - 1 : k); }
+    return &table[k * outputs.size()];
+  }
+
+  void Playback::actuate(Space& space) {
+    const size_t n = outputs.size(), n_k = n_samples();
+    if (_finished || n_k == 0) { return; }
+
+    if (loop) {
+      position = fmod(position, (double)n_k);
+      if (position < 0) { position += n_k; }
+    } else if (position >= n_k - 1) {
+      position = n_k - 1;
+      _finished = true;
+    } else if (position < 0) {
+      position = 0.0;
+    }
+
+    const long k = floor(position);
+    const double u = position - k;
+    const double *p1 = _sample(k), *p2 = _sample(k + 1);
+    if (interpolation == CUBIC) {
+      const double *p0 = _sample(k - 1), *p3 = _sample(k + 2);
+      for (size_t i = 0; i < n; i++) {
+        outputs[i] = p1[i] + 0.5 * u * (p2[i] - p0[i] + u * (2 * p0[i] - 5 * p1[i] + 4 * p2[i]
+                     - p3[i] + u * (3 * (p1[i] - p2[i]) + p3[i] - p0[i])));
+      }
+    } else {
+      for (size_t i = 0; i < n; i++) { outputs[i] = p1[i] + u * (p2[i] - p1[i]); }
+    }
+    _apply_outputs(space);
+
+    position += rate * period * space.dt() / sample_dt;
+  }
+}
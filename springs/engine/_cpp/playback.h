@@ -0,0 +1,48 @@
+#ifndef PLAYBACK_H
+#define PLAYBACK_H
+
+#include <vector>
+#include <sys/types.h>
+
+#include "actuation.h"
+
+
+using namespace std;
+
+namespace springs {
+
+  enum Interpolation { LINEAR = 0, CUBIC = 1 };
+
+  /*  Playback of a precomputed actuation: a table of n_samples × n_outputs values, sampled
+   *  every `sample_dt` seconds, in row-major order. The outputs are written to the expand
+   *  factors of `links` (one link per column) or, with an actuation map, are its motor signal.
+   *
+   *  `position` is the playback position, in samples: it advances by `rate * period * dt /
+   *  sample_dt` at each actuation, and the table is interpolated there, linearly or with a
+   *  Catmull-Rom spline through the samples. A looping table wraps around from its last sample
+   *  to its first one, so it should not repeat the first sample at the end. Else, the playback
+   *  stops on the last sample.
+   */
+  class Playback : public OutputActuator {
+    public:
+      Playback(size_t n_samples, vector<uint> links, ActuationMap* actuation_map);
+
+      vector<double> table;
+      double sample_dt, rate, position;
+      bool loop;
+      Interpolation interpolation;
+
+      size_t n_samples();
+      bool finished();
+      // rewind to the first sample.
+      void reset();
+      void actuate(Space& space);
+
+    protected:
+      bool _finished;
+
+      const double* _sample(long k);
+  };
+}
+
+#endif
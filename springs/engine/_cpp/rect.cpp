@@ -1,3 +1,4 @@
+#include <algorithm>
 #include <numeric>
 #include <cmath>
 #include <sys/types.h>
@@ -14,166 +15,203 @@ namespace springs {
         height = yT - yB;
     }
 
-    inline bool Rect::collides(Node* node) {
-        return (xL < node->x && node->x <= xR &&
-                yB < node->y && node->y <= yT   );
+    inline bool Rect::collides(double x, double y) {
+        return (xL < x && x <= xR &&
+                yB < y && y <= yT   );
     }
 
-    Collision::Collision(Rect* rect, Node* node, double threshold)
-        : rect(rect), node(node), threshold(threshold), diff_v_x(0), diff_v_y(0), _disabled(false)
-    {
+    void Rect::translate(double dx, double dy) {
+        xL += dx; xR += dx;
+        yB += dy; yT += dy;
+    }
 
+    AABB Rect::aabb() {
+        return AABB(xL, xR, yB, yT);
+    }
+
+    Collision::Collision(Rect* rect, NodeArrays* nodes, uint node, double threshold)
+        : rect(rect), nodes(nodes), node(node), threshold(threshold), diff_v_x(0), diff_v_y(0),
+          _disabled(false)
+    {
+        double &x = nodes->x[node], &y = nodes->y[node];
+        double &v_x = nodes->v_x[node], &v_y = nodes->v_y[node];
 
         // determine collision point and bias.
-        double diff_xL = node->x - rect->xL;
-        double diff_xR = rect->xR - node->x;
-        double diff_yB = node->y - rect->yB;
-        double diff_yT = rect->yT - node->y;
+        double diff_xL = x - rect->xL;
+        double diff_xR = rect->xR - x;
+        double diff_yB = y - rect->yB;
+        double diff_yT = rect->yT - y;
 
         _x_not_y_collision = fmin(diff_xL, diff_xR) < fmin(diff_yB, diff_yT);
         if (_x_not_y_collision) {
             if (diff_xL < diff_xR) {
-                node->x = rect->xL;
-                if (node->v_x < 0) {_disabled = true;}
-                else if (node->v_x < threshold) { _bias = 0.0; }
-                else { _bias = - node->v_x * rect->restitution; }
+                x = rect->xL;
+                if (v_x < 0) {_disabled = true;}
+                else if (v_x < threshold) { _bias = 0.0; }
+                else { _bias = - v_x * rect->restitution; }
             } else {
-                node->x = rect->xR;
-                if (node->v_x > 0) {_disabled = true;}
-                else if (node->v_x > -threshold) { _bias = 0.0; }
-                else { _bias = - node->v_x * rect->restitution; }
+                x = rect->xR;
+                if (v_x > 0) {_disabled = true;}
+                else if (v_x > -threshold) { _bias = 0.0; }
+                else { _bias = - v_x * rect->restitution; }
             }
         } else {
             if (diff_yB < diff_yT) {
-                node->y = rect->yB;
-                if (node->v_y < 0) {_disabled = true;}
-                else if (node->v_y < threshold) { _bias = 0.0; }
-                else { _bias = - node->v_y * rect->restitution; }
+                y = rect->yB;
+                if (v_y < 0) {_disabled = true;}
+                else if (v_y < threshold) { _bias = 0.0; }
+                else { _bias = - v_y * rect->restitution; }
             } else {
-                node->y = rect->yT;
-                if (node->v_y > 0) {_disabled = true;}
-                else if (node->v_y > -threshold) { _bias = 0.0; }
-                else { _bias = - node->v_y * rect->restitution; }
+                y = rect->yT;
+                if (v_y > 0) {_disabled = true;}
+                else if (v_y > -threshold) { _bias = 0.0; }
+                else { _bias = - v_y * rect->restitution; }
             }
         }
     }
 
     inline void Collision::substep() {
         if (_disabled) { return; }
+        double &v_x = nodes->v_x[node], &v_y = nodes->v_y[node];
+        const double friction = nodes->friction[node];
 
         if (_x_not_y_collision) {
             // friction
-            double max_friction = node->friction * fabs(diff_v_x);
-            if (fabs(node->v_y) > 1) { max_friction /= 2; }  // moving: dynamic friction
-            double new_diff_v_y = clamp(-max_friction, diff_v_y - node->v_y, max_friction);
-            node->v_y += new_diff_v_y - diff_v_y;
+            double max_friction = friction * fabs(diff_v_x);
+            if (fabs(v_y) > 1) { max_friction /= 2; }  // moving: dynamic friction
+            double new_diff_v_y = clamp(-max_friction, diff_v_y - v_y, max_friction);
+            v_y += new_diff_v_y - diff_v_y;
             diff_v_y = new_diff_v_y;
             // restitution
-            double new_diff_v_x = diff_v_x + _bias - node->v_x;
-            node->v_x += new_diff_v_x - diff_v_x;
+            double new_diff_v_x = diff_v_x + _bias - v_x;
+            v_x += new_diff_v_x - diff_v_x;
             diff_v_x = new_diff_v_x;
 
         } else {
             // friction
-            double max_friction = node->friction * fabs(diff_v_y);
-            if (fabs(node->v_x) > 1) { max_friction /= 2; }  // moving: dynamic friction
-            double new_diff_v_x = clamp(-max_friction, diff_v_x - node->v_x, max_friction);
-            node->v_x += new_diff_v_x - diff_v_x;
+            double max_friction = friction * fabs(diff_v_y);
+            if (fabs(v_x) > 1) { max_friction /= 2; }  // moving: dynamic friction
+            double new_diff_v_x = clamp(-max_friction, diff_v_x - v_x, max_friction);
+            v_x += new_diff_v_x - diff_v_x;
             diff_v_x = new_diff_v_x;
             // restitution
-            double new_diff_v_y = diff_v_y + _bias - node->v_y;
-            node->v_y += new_diff_v_y - diff_v_y;
+            double new_diff_v_y = diff_v_y + _bias - v_y;
+            v_y += new_diff_v_y - diff_v_y;
             diff_v_y = new_diff_v_y;
         }
     }
 
     CollisionDetector::CollisionDetector(double size_x, double size_y)
-        : size_x(size_x), size_y(size_y) {
+        : size_x(size_x), size_y(size_y), _prepared(false) {
         _autosize_x = size_x <= 0;
         _autosize_y = size_y <= 0;
     }
 
 
     inline void CollisionDetector::add_rect(Rect* rect) {
-        rects.push_back(rect);
-        _bins.clear();
+        if (!_prepared) { rects.push_back(rect); }
+        else            { _add_to_tree(rect); }
+    }
+
+    inline void CollisionDetector::remove_rect(Rect* rect) {
+        auto proxy = _proxies.find(rect);
+        if (proxy != _proxies.end()) {
+            _tree.remove(proxy->second);
+            _proxies.erase(proxy);
+        } else {
+            _remove_from_grid(rect);
+        }
+    }
+
+    inline void CollisionDetector::translate_rect(Rect* rect, double dx, double dy) {
+        auto proxy = _proxies.find(rect);
+        if (proxy != _proxies.end()) {
+            rect->translate(dx, dy);
+            _tree.move(proxy->second, rect->aabb());
+        } else if (!_prepared) {  // the grid is not built yet
+            rect->translate(dx, dy);
+        } else {
+            _remove_from_grid(rect);
+            rect->translate(dx, dy);
+            _add_to_tree(rect);
+        }
     }
 
-    inline int CollisionDetector::_bin_x(double x) {
-        return floor((x - _min_x_bin) / size_x);
+    inline void CollisionDetector::_add_to_tree(Rect* rect) {
+        _proxies[rect] = _tree.insert(rect->aabb(), rect);
     }
-    inline int CollisionDetector::_bin_y(double y) {
-        return floor((y - _min_y_bin) / size_y);
+
+    inline void CollisionDetector::_remove_from_grid(Rect* rect) {
+        rects.erase(remove(rects.begin(), rects.end(), rect), rects.end());
+        if (!_prepared) { return; }
+        _grid.remove(rect->aabb(), [&](Rect* item) { return item == rect; });
     }
 
     inline void CollisionDetector::_autosize() {
         if (_autosize_x) {
             vector<double> widths;
             for (auto& rect: rects) { widths.push_back(rect->xR - rect->xL); }
-            double mean_width = accumulate(widths.begin(), widths.end(), 0.0) / widths.size();
-            size_x = 3 * mean_width; // heuristic. TODO: refine.
+            size_x = cell_size(widths);
         }
         if (_autosize_y) {
             vector<double> heights;
             for (auto& rect: rects) { heights.push_back(rect->yT - rect->yB); }
-            double mean_height = accumulate(heights.begin(), heights.end(), 0.0) / heights.size();
-            size_y = 3 * mean_height; // heuristic. TODO: refine.
+            size_y = cell_size(heights);
         }
     }
 
     inline void CollisionDetector::_prepare() {
         _autosize();
+        _grid.size_x = size_x;
+        _grid.size_y = size_y;
 
-        vector<double> xLs, xRs, yBs, yTs;
+        vector<Rect*> grid_rects;
         for (auto& rect: rects) {
-            xLs.push_back(rect->xL); xRs.push_back(rect->xR);
-            yBs.push_back(rect->yB); yTs.push_back(rect->yT);
-        }
-        double min_x = *min_element(xLs.begin(), xLs.end());
-        double max_x = *max_element(xRs.begin(), xRs.end());
-        double min_y = *min_element(yBs.begin(), yBs.end());
-        double max_y = *max_element(yTs.begin(), yTs.end());
-
-        _min_x_bin = size_x * floor(min_x / size_x);
-        _min_y_bin = size_y * floor(min_y / size_y);
-        n_bins_x = floor(max_x / size_x) - floor(min_x / size_x) + 1;
-        n_bins_y = floor(max_y / size_y) - floor(min_y / size_y) + 1;
-        n_bins = n_bins_x * n_bins_y;
-
-        for (int i = 0; i < n_bins_x; i++) {
-            _bins.push_back(vector<vector<Rect*>>());
-            for (int j = 0; j < n_bins_y; j++) {
-                _bins[i].push_back(vector<Rect*>());
+            if (_grid.n_cells(rect->aabb()) > MAX_CELLS_PER_ITEM) {
+                _add_to_tree(rect);
+            } else {
+                _grid.insert(rect->aabb(), rect);
+                grid_rects.push_back(rect);
             }
         }
+        rects = grid_rects;
+        _prepared = true;
+    }
 
-        for (auto& rect: rects) {
-            for (int i = _bin_x(rect->xL); i <= _bin_x(rect->xR); i++) {
-                for (int j = _bin_y(rect->yB); j <= _bin_y(rect->yT); j++) {
-                    _bins[i][j].push_back(rect);
-                }
-            }
-        }
+    GridStats CollisionDetector::stats() {
+        GridStats stats = _grid.stats();
+        stats.n_tree = _tree.size();
+        return stats;
     }
 
-    inline void CollisionDetector::detect_collisions(vector<Node*> &nodes,
+    inline void CollisionDetector::detect_collisions(NodeArrays &nodes,
              double restitution_threshold, vector<Collision> &collisions) {
-        if (rects.size() == 0 || nodes.size() == 0) { return; }
-        if (_bins.size() == 0) { _prepare(); }
-
-        for (Node* node: nodes) {
-            int bin_x = _bin_x(node->x);
-            int bin_y = _bin_y(node->y);
-            if (0 <= bin_y && bin_y < n_bins_y && 0 <= bin_x && bin_x < n_bins_x) {
-                for (Rect* rect: _bins[bin_x][bin_y]) {
-                    if (rect->collides(node)) {
-                        Collision col = Collision(rect, node, restitution_threshold);
-                        collisions.push_back(col);
-                        node->colliding = true;
-                        // probably problematic when two or more rectangles overlap and share an edge
-                    }
+        if (nodes.size() == 0) { return; }
+        if (!_prepared) {
+            if (rects.size() == 0) { return; }
+            _prepare();
+        }
+
+        const size_t n = nodes.size();
+        for (uint node = 0; node < n; node++) {
+            vector<Rect*>* cell = _grid.cell(nodes.x[node], nodes.y[node]);
+            if (cell != NULL) {
+                for (Rect* rect: *cell) {
+                    _add_collision(nodes, node, rect, restitution_threshold, collisions);
                 }
             }
+            _tree.query(nodes.x[node], nodes.y[node], [&](Rect* rect) {
+                _add_collision(nodes, node, rect, restitution_threshold, collisions);
+            });
+        }
+    }
+
+    inline void CollisionDetector::_add_collision(NodeArrays &nodes, uint node, Rect* rect,
+            double restitution_threshold, vector<Collision> &collisions) {
+        if (rect->collides(nodes.x[node], nodes.y[node])) {
+            collisions.emplace_back(rect, &nodes, node, restitution_threshold);
+            nodes.colliding[node] = true;
+            // probably problematic when two or more rectangles overlap and share an edge
         }
     }
 }
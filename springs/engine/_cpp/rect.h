@@ -1,7 +1,11 @@
 #ifndef RECT_H
 #define RECT_H
 
+#include <unordered_map>
+
 #include "node.h"
+#include "aabb_tree.h"
+#include "grid.h"
 
 
 using namespace std;
@@ -12,17 +16,20 @@ namespace springs {
     public:
       double xL, xR, yB, yT, width, height, restitution;
       Rect(double xL, double xR, double yB, double yT, double restitution);
-      bool collides(Node* node);
+      bool collides(double x, double y);
+      void translate(double dx, double dy);
+      AABB aabb();
   };
 
   class Collision {
     public:
       Rect* rect;
-      Node* node;
+      NodeArrays* nodes;
+      uint node;
 
       double threshold, diff_v_x, diff_v_y;
 
-      Collision(Rect* rect, Node* node, double threshold);
+      Collision(Rect* rect, NodeArrays* nodes, uint node, double threshold);
       void substep();
 
     protected:
@@ -30,27 +37,37 @@ namespace springs {
       double _bias;
   };
 
+  /*  Rects are binned in a sparse grid, built at the first detection. Rects added afterwards,
+   *  rects that move, and rects too large for the grid cells are stored in a dynamic AABB tree
+   *  instead, so that the grid never needs to be rebuilt.
+   */
   class CollisionDetector {
     public:
-      vector<Rect*> rects;
-      int n_bins, n_bins_x, n_bins_y;
+      vector<Rect*> rects;  // rects in the grid.
       double size_x, size_y;
 
       CollisionDetector(double size_x, double size_y);
       void add_rect(Rect* rect);
-      void detect_collisions(vector<Node*> &nodes, double restitution_threshold,
+      void remove_rect(Rect* rect);
+      void translate_rect(Rect* rect, double dx, double dy);
+      void detect_collisions(NodeArrays &nodes, double restitution_threshold,
                              vector<Collision> &collisions);
+      GridStats stats();
 
     protected:
-      vector<vector<vector<Rect*>>> _bins;
-      double _min_x_bin, _min_y_bin;
+      bool _prepared;
+      SparseGrid<Rect*> _grid;
+      AABBTree<Rect*> _tree;
+      unordered_map<Rect*, int> _proxies;  // tree leaves of the rects in the tree.
       bool _autosize_x, _autosize_y;
 
       void _prepare();
+      void _add_to_tree(Rect* rect);
+      void _remove_from_grid(Rect* rect);
+      void _add_collision(NodeArrays &nodes, uint node, Rect* rect,
+                          double restitution_threshold, vector<Collision> &collisions);
       // automatically chooses size_x and size_y based on the rectangles dimensions.
       void _autosize();
-      int _bin_x(double x);
-      int _bin_y(double x);
     };
 }
 
@@ -0,0 +1,159 @@
+#include <cmath>
+#include <algorithm>
+
+#include "self_collision.h"
+
+
+namespace springs {
+
+  // fraction of the penetration corrected at each step.
+  const double SELF_CONTACT_BETA = 0.2;
+  // cell coordinates are clamped to +/- this, so that they fit an int, and iterate safely.
+  const double MAX_CELL = 1 << 30;
+
+  SelfContact::SelfContact(NodeArrays* nodes, uint node, uint node_a, uint node_b, double t,
+                           double normal_x, double normal_y, double penetration, double dt)
+    : nodes(nodes), node(node), node_a(node_a), node_b(node_b), t(t),
+      normal_x(normal_x), normal_y(normal_y), impulse(0)
+  {
+    double inv_mass = nodes->inv_mass[node] + (1 - t) * (1 - t) * nodes->inv_mass[node_a]
+                                            + t * t * nodes->inv_mass[node_b];
+    mass = inv_mass > 0 ? 1.0 / inv_mass : 0.0;
+    bias = SELF_CONTACT_BETA * penetration / dt;
+  }
+
+  inline void SelfContact::substep() {
+    // normal velocity of the node, relative to the contact point on the link.
+    const double v_r = normal_x * (nodes->v_x[node] - (1 - t) * nodes->v_x[node_a] - t * nodes->v_x[node_b])
+                     + normal_y * (nodes->v_y[node] - (1 - t) * nodes->v_y[node_a] - t * nodes->v_y[node_b]);
+    const double new_impulse = fmax(0.0, impulse + mass * (bias - v_r));
+    const double P = new_impulse - impulse;
+    impulse = new_impulse;
+
+    const double P_x = P * normal_x, P_y = P * normal_y;
+    nodes->v_x[node]   += P_x * nodes->inv_mass[node];
+    nodes->v_y[node]   += P_y * nodes->inv_mass[node];
+    nodes->v_x[node_a] -= P_x * (1 - t) * nodes->inv_mass[node_a];
+    nodes->v_y[node_a] -= P_y * (1 - t) * nodes->inv_mass[node_a];
+    nodes->v_x[node_b] -= P_x * t * nodes->inv_mass[node_b];
+    nodes->v_y[node_b] -= P_y * t * nodes->inv_mass[node_b];
+  }
+
+
+  SelfCollisionDetector::SelfCollisionDetector(double radius, bool same_body)
+    : radius(radius), same_body(same_body), _inv_cell_size(1.0), _mask(0) {}
+
+  inline int SelfCollisionDetector::_cell(double v) {
+    // fmin/fmax also send NaN to a bound: casting it, or an out of range value, is undefined.
+    return (int)fmax(-MAX_CELL, fmin(MAX_CELL, floor(v * _inv_cell_size)));
+  }
+
+  inline size_t SelfCollisionDetector::_hash(int i, int j) {
+    return ((size_t)i * 73856093u ^ (size_t)j * 19349663u) & _mask;
+  }
+
+  void SelfCollisionDetector::_hash_nodes(NodeArrays &nodes) {
+    const size_t n = nodes.size();
+    size_t table_size = 16;
+    while (table_size < 2 * n) { table_size *= 2; }
+    _mask = table_size - 1;
+
+    // counting sort of the nodes by hash.
+    _cell_i.resize(n);
+    _cell_j.resize(n);
+    _cell_start.assign(table_size + 1, 0);
+    for (uint p = 0; p < n; p++) {
+      _cell_i[p] = _cell(nodes.x[p]);
+      _cell_j[p] = _cell(nodes.y[p]);
+      _cell_start[_hash(_cell_i[p], _cell_j[p])]++;
+    }
+    for (size_t h = 1; h <= table_size; h++) { _cell_start[h] += _cell_start[h - 1]; }
+    _cell_nodes.resize(n);
+    for (uint p = n; p-- > 0;) { _cell_nodes[--_cell_start[_hash(_cell_i[p], _cell_j[p])]] = p; }
+  }
+
+  void SelfCollisionDetector::detect_collisions(NodeArrays &nodes, vector<LinkArrays*> tables,
+                                                double dt, vector<SelfContact> &contacts) {
+    const size_t n = nodes.size();
+    if (n == 0) { return; }
+    if (!same_body) {  // nothing to do with a single body.
+      uint* body_end = nodes.body + n;
+      if (find_if(nodes.body, body_end, [&](uint body) { return body != nodes.body[0]; })
+          == body_end) {
+        return;
+      }
+    }
+
+    // cells about as large as the links, and never smaller than the collision diameter.
+    double extent = 0;
+    size_t n_links = 0;
+    for (auto& links: tables) {
+      for (uint l = 0; l < links->size(); l++) {
+        extent += fmax(fabs(nodes.x[links->node_b[l]] - nodes.x[links->node_a[l]]),
+                       fabs(nodes.y[links->node_b[l]] - nodes.y[links->node_a[l]]));
+      }
+      n_links += links->size();
+    }
+    if (n_links == 0) { return; }
+    _inv_cell_size = 1.0 / fmax(2 * radius, extent / n_links);
+
+    _hash_nodes(nodes);
+    for (auto& links: tables) { _detect(nodes, *links, dt, contacts); }
+  }
+
+  void SelfCollisionDetector::_detect(NodeArrays &nodes, LinkArrays &links, double dt,
+                                      vector<SelfContact> &contacts) {
+    for (uint l = 0; l < links.size(); l++) {
+      const uint a = links.node_a[l], b = links.node_b[l];
+      const double x_a = nodes.x[a], y_a = nodes.y[a];
+      const double d_x = nodes.x[b] - x_a, d_y = nodes.y[b] - y_a;
+      const double length_sq = d_x * d_x + d_y * d_y;
+      if (length_sq == 0) { continue; }
+
+      const double x_min = fmin(x_a, nodes.x[b]) - radius, x_max = fmax(x_a, nodes.x[b]) + radius;
+      const double y_min = fmin(y_a, nodes.y[b]) - radius, y_max = fmax(y_a, nodes.y[b]) + radius;
+      auto collide = [&](uint p) {
+        if (p == a || p == b) { return; }
+        if (!same_body && (nodes.body[p] == nodes.body[a] || nodes.body[p] == nodes.body[b])) {
+          return;
+        }
+        const double x = nodes.x[p], y = nodes.y[p];
+        if (!(x_min <= x && x <= x_max && y_min <= y && y <= y_max)) { return; }
+        if (nodes.fixed[p] && nodes.fixed[a] && nodes.fixed[b]) { return; }
+
+        // closest point on the segment
+        const double t = clamp(0.0, ((x - x_a) * d_x + (y - y_a) * d_y) / length_sq, 1.0);
+        const double n_x = x - (x_a + t * d_x), n_y = y - (y_a + t * d_y);
+        const double distance = sqrt(n_x * n_x + n_y * n_y);
+        if (distance >= radius) { return; }
+
+        if (distance > 0) {
+          contacts.emplace_back(&nodes, p, a, b, t, n_x / distance, n_y / distance,
+                                radius - distance, dt);
+        } else {  // on the segment: push along the link normal.
+          const double length = sqrt(length_sq);
+          contacts.emplace_back(&nodes, p, a, b, t, -d_y / length, d_x / length, radius, dt);
+        }
+      };
+
+      // a link much longer than the cells would visit O((length / cell size)^2) cells: past
+      // one cell per node, testing every node is cheaper.
+      const int i_min = _cell(x_min), i_max = _cell(x_max);
+      const int j_min = _cell(y_min), j_max = _cell(y_max);
+      if ((double)(i_max - i_min + 1) * (double)(j_max - j_min + 1) > nodes.size()) {
+        for (uint p = 0; p < nodes.size(); p++) { collide(p); }
+        continue;
+      }
+      for (int i = i_min; i <= i_max; i++) {
+        for (int j = j_min; j <= j_max; j++) {
+          const size_t h = _hash(i, j);
+          for (uint k = _cell_start[h]; k < _cell_start[h + 1]; k++) {
+            const uint p = _cell_nodes[k];
+            // other cells sharing the hash.
+            if (_cell_i[p] == i && _cell_j[p] == j) { collide(p); }
+          }
+        }
+      }
+    }
+  }
+}
@@ -0,0 +1,63 @@
+#ifndef SELF_COLLISION_H
+#define SELF_COLLISION_H
+
+#include <vector>
+#include <sys/types.h>
+
+#include "node.h"
+#include "link.h"
+
+
+using namespace std;
+
+namespace springs {
+
+  /*  Non-penetration constraint between a node and a link segment: the node must not come
+   *  closer than the collision radius to the segment. The impulse is shared between the node
+   *  and the two nodes of the link, in proportion to the position of the contact on the link.
+   */
+  class SelfContact {
+    public:
+      NodeArrays* nodes;
+      uint node, node_a, node_b;
+      double t;                   // contact position on the link: 0 at node_a, 1 at node_b.
+      double normal_x, normal_y;  // from the link to the node.
+      double mass, bias, impulse;
+
+      SelfContact(NodeArrays* nodes, uint node, uint node_a, uint node_b, double t,
+                  double normal_x, double normal_y, double penetration, double dt);
+      void substep();
+  };
+
+  /*  Node versus link collisions, between bodies, or within bodies if `same_body` is true.
+   *
+   *  Each step, the node positions are hashed in a grid whose cells are about one link long
+   *  (counting sort in a fixed size table, so there is no allocation once warmed up). Each link
+   *  then only tests the nodes of the cells its bounding box overlaps: the cost is O(n) for
+   *  bodies of bounded density. A link whose bounding box overlaps more cells than there are
+   *  nodes tests all the nodes directly instead.
+   */
+  class SelfCollisionDetector {
+    public:
+      double radius;   // minimum distance between a node and a link.
+      bool same_body;  // detect collisions between nodes and links of the same body.
+
+      SelfCollisionDetector(double radius, bool same_body);
+      void detect_collisions(NodeArrays &nodes, vector<LinkArrays*> tables, double dt,
+                             vector<SelfContact> &contacts);
+
+    protected:
+      double _inv_cell_size;
+      size_t _mask;               // hash table size - 1
+      vector<uint> _cell_start;   // nodes of hash h: _cell_nodes[_cell_start[h]:_cell_start[h+1]]
+      vector<uint> _cell_nodes;
+      vector<int> _cell_i, _cell_j;  // cell of each node
+
+      int _cell(double v);
+      size_t _hash(int i, int j);
+      void _hash_nodes(NodeArrays &nodes);
+      void _detect(NodeArrays &nodes, LinkArrays &links, double dt, vector<SelfContact> &contacts);
+  };
+}
+
+#endif
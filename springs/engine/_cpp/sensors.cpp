@@ -1,4 +1,9 @@
 #include <numeric>
+#include <algorithm>
+#include <functional>
+#include <unordered_map>
+#include <utility>
+#include <stdexcept>
 #include <cmath>
 #include <sys/types.h>
 #include <iostream>
@@ -12,36 +17,90 @@ namespace springs {
     Sensor::~Sensor() = default;
     double Sensor::update() { _value = -12345678.0; return _value; }
     double Sensor::value() { return _value; }
+    vector<Sensor*> Sensor::dependencies() { return {}; }
 
-    SensorHub::SensorHub() {}
+    SensorHub::SensorHub() : _sorted(true) {}
 
-    // vector<double> SensorHub::sensor_values() {
-    //     vector<double> values;
-    //     for (auto& sensor: sensors) {
-    //         values.push_back(sensor->value());
-    //     }
-    //     return values;
-    // }
+    SensorHub::~SensorHub() {
+        for (auto& sensor: sensors) { delete sensor; }
+    }
 
     void SensorHub::add_sensor(Sensor* sensor) {
         sensors.push_back(sensor);
+        if (values.size() == values.capacity()) {
+            vector<double> grown;
+            grown.reserve(values.empty() ? 16 : 2 * values.size());
+            grown.assign(values.begin(), values.end());
+            _outgrown.push_back(move(values));
+            values = move(grown);
+        }
+        values.push_back(sensor->value());
+        _sorted = false;
+    }
+
+    void SensorHub::update() {
+        if (!_sorted) { _sort(); }
+        for (auto& k: _order) { values[k] = sensors[k]->update(); }
+    }
+
+    // Kahn's algorithm. Among the sensors ready to be updated, the earliest added comes first,
+    // so that the insertion order is kept whenever it already satisfies the dependencies.
+    void SensorHub::_sort() {
+        const size_t n = sensors.size();
+        unordered_map<Sensor*, size_t> index;
+        for (size_t k = 0; k < n; k++) { index[sensors[k]] = k; }
+
+        vector<size_t> n_dependencies(n, 0);
+        vector<vector<size_t>> dependents(n);
+        for (size_t k = 0; k < n; k++) {
+            for (auto& dependency: sensors[k]->dependencies()) {
+                auto i = index.find(dependency);
+                if (i == index.end()) { continue; }  // not in the hub: never updated.
+                n_dependencies[k]++;
+                dependents[i->second].push_back(k);
+            }
+        }
+
+        vector<size_t> ready;  // min-heap on the insertion index.
+        for (size_t k = 0; k < n; k++) { if (n_dependencies[k] == 0) { ready.push_back(k); } }
+        make_heap(ready.begin(), ready.end(), greater<size_t>());
+
+        _order.clear();
+        while (!ready.empty()) {
+            pop_heap(ready.begin(), ready.end(), greater<size_t>());
+            size_t k = ready.back();
+            ready.pop_back();
+            _order.push_back(k);
+            for (auto& dependent: dependents[k]) {
+                if (--n_dependencies[dependent] == 0) {
+                    ready.push_back(dependent);
+                    push_heap(ready.begin(), ready.end(), greater<size_t>());
+                }
+            }
+        }
+        if (_order.size() != n) { throw runtime_error("cyclic sensor dependencies"); }
+        _sorted = true;
     }
 
-    AngleSensor::AngleSensor(Node* origin, Node* satellite)
-      : origin(origin), satellite(satellite), ref_sensor(NULL) {
+    AngleSensor::AngleSensor(NodeArrays* nodes, uint origin, uint satellite)
+      : nodes(nodes), origin(origin), satellite(satellite), ref_sensor(NULL) {
        _reference_angle = 0.0;
        _reference_angle = update();
     }
 
-    AngleSensor::AngleSensor(Node* origin, Node* satellite, AngleSensor* ref_sensor)
-      : origin(origin), satellite(satellite), ref_sensor(ref_sensor) {
+    AngleSensor::AngleSensor(NodeArrays* nodes, uint origin, uint satellite,
+                             AngleSensor* ref_sensor)
+      : nodes(nodes), origin(origin), satellite(satellite), ref_sensor(ref_sensor) {
        _reference_angle = 0.0;
        _reference_angle = update();
     }
 
+    AngleSensor::~AngleSensor() = default;
+
     double AngleSensor::update() {
         double old_value = _value;
-        _value = atan2(satellite->y - origin->y, satellite->x - origin->x) - _reference_angle;
+        _value = atan2(nodes->y[satellite] - nodes->y[origin],
+                       nodes->x[satellite] - nodes->x[origin]) - _reference_angle;
         if (ref_sensor != NULL) { _value -= ref_sensor->value(); }
         if (_initialized) {
           _value += round((old_value - _value) / 6.28318530718) * 6.28318530718;
@@ -50,12 +109,19 @@ namespace springs {
         return _value;
     }
 
+    vector<Sensor*> AngleSensor::dependencies() {
+        if (ref_sensor == NULL) { return {}; }
+        return {ref_sensor};
+    }
+
     AngularVelocitySensor::AngularVelocitySensor(AngleSensor* sensor, double dt)
       : sensor(sensor), dt(dt) {
         _value = 0.0;
         _previous_angle = sensor->value();
     }
 
+    AngularVelocitySensor::~AngularVelocitySensor() = default;
+
     double AngularVelocitySensor::update() {
         double new_angle = sensor->value();
         _value = 0.5 * _value + 0.5 * (new_angle - _previous_angle) / dt;
@@ -63,14 +129,16 @@ namespace springs {
         return _value;
     }
 
-    TouchSensor::TouchSensor(vector<Node*> nodes)
-      : nodes(nodes) { _value = update(); }
+    vector<Sensor*> AngularVelocitySensor::dependencies() { return {sensor}; }
+
+    TouchSensor::TouchSensor(NodeArrays* nodes, vector<uint> node_indices)
+      : nodes(nodes), node_indices(node_indices) { _value = update(); }
 
-    TouchSensor::~TouchSensor() { nodes.clear(); }
+    TouchSensor::~TouchSensor() { node_indices.clear(); }
 
     double TouchSensor::update() {
         bool colliding = false;
-        for (auto& node: nodes) { colliding = colliding || node->colliding; }
+        for (auto& node: node_indices) { colliding = colliding || nodes->colliding[node]; }
         _value = colliding ? 0.0 : 1.0;
         return _value;
     }
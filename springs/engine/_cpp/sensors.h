@@ -14,10 +14,12 @@ namespace springs {
     class Sensor {
         public:
             Sensor();
-            ~Sensor();
+            virtual ~Sensor();
 
-            double update();   // FIXME: should be virtual
-            double value();   // FIXME: should be virtual
+            virtual double update();
+            double value();
+            // sensors whose value this sensor reads, and that must be updated before it.
+            virtual vector<Sensor*> dependencies();
 
           protected:
               double _value;
@@ -30,21 +32,34 @@ namespace springs {
             ~SensorHub();
 
             vector<Sensor*> sensors;
-            // vector<double> sensor_values();
+            // sensor values, contiguous, in the order of `sensors`.
+            vector<double> values;
 
             void add_sensor(Sensor* sensor);
+            // update the sensors, dependencies first, and write their values in `values`.
+            void update();
+
+        protected:
+            vector<size_t> _order;  // indices of the sensors, in dependency order.
+            // buffers outgrown by `values`, kept for the NumPy views on them. Their sizes
+            // double, so that they add up to less than the capacity of `values`.
+            vector<vector<double>> _outgrown;
+            bool _sorted;
+
+            void _sort();
     };
 
     class AngleSensor : public Sensor {
         public:
-            AngleSensor(Node* origin, Node* satellite);
-            AngleSensor(Node* origin, Node* satellite, AngleSensor* ref_sensor);
+            AngleSensor(NodeArrays* nodes, uint origin, uint satellite);
+            AngleSensor(NodeArrays* nodes, uint origin, uint satellite, AngleSensor* ref_sensor);
             ~AngleSensor();
 
             double update();
+            vector<Sensor*> dependencies();
 
-            Node* origin;
-            Node* satellite;
+            NodeArrays* nodes;
+            uint origin, satellite;
             AngleSensor* ref_sensor;
 
         protected:
@@ -60,6 +75,7 @@ namespace springs {
             ~AngularVelocitySensor();
 
             double update();
+            vector<Sensor*> dependencies();
 
             AngleSensor * sensor;
             double dt;
@@ -72,12 +88,13 @@ namespace springs {
      */
     class TouchSensor : public Sensor {
         public:
-            TouchSensor(vector<Node*> nodes);
+            TouchSensor(NodeArrays* nodes, vector<uint> node_indices);
             ~TouchSensor();
 
             double update();
 
-            vector<Node*> nodes;
+            NodeArrays* nodes;
+            vector<uint> node_indices;
     };
 
 }
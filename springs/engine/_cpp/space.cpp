@@ -1,4 +1,5 @@
 #include <iostream>
+#include <algorithm>
 
 #include "space.h"
 
@@ -8,7 +9,8 @@ namespace springs {
   double MODULO = 1e-10;
 
   Space::Space(double dt, uint n_substep_, double gravity_x_, double gravity_y_,
-               double restitution_threshold_) {
+               double restitution_threshold_)
+    : links(&nodes), springs(&nodes), _solver_pool(NULL) {
     set_dt(dt);
     n_substep = n_substep_;
     gravity_x = gravity_x_;
@@ -17,6 +19,7 @@ namespace springs {
 
     collision_detector = new CollisionDetector(-1, -1);
     triangle_collision_detector = new TriangleCollisionDetector(-1, -1);
+    self_collision_detector = NULL;
     sensors = new SensorHub();
 
     ticks = 0;
@@ -24,9 +27,15 @@ namespace springs {
   }
 
   Space::~Space() {
-    for (auto& node: nodes) { delete node; }
-    for (auto& link: links) { delete link; }
     for (auto& rect: rects) { delete rect; }
+    for (auto& triangle: triangles) { delete triangle; }
+    delete _solver_pool;
+    delete self_collision_detector;
+    delete sensors;
+    for (auto& actuation_map: actuation_maps) { delete actuation_map; }
+    for (auto& actuator: actuators) { delete actuator; }
+    for (auto& activation: activations) { delete activation; }
+    for (auto& force_field: force_fields) { delete force_field; }
   }
 
   double Space::dt() {
@@ -35,28 +44,49 @@ namespace springs {
 
   void Space::set_dt(double value) {
     _dt = value;
-    for (auto& node: nodes) { node->dt = value; }
-    for (auto& link: links) { link->set_dt(value); }
+    links.set_dt(value);
+    springs.set_dt(value);
   }
 
-  Node* Space::add_node(double x, double y, double mass, double friction, double fixed) {
-    Node* node = new Node(_dt, x, y, mass, friction, fixed);
-    nodes.push_back(node);
-    return node;
+  uint Space::add_node(double x, double y, double mass, double friction, double fixed) {
+    return nodes.add(x, y, mass, friction, fixed);
   }
 
-  Link* Space::add_link(Node* node_a, Node* node_b, double stiffness, double damping_ratio,
-                        bool actuated, double max_impulse) {
-    Link* link = new Link(_dt, node_a, node_b, stiffness, damping_ratio, actuated, max_impulse);
-    links.push_back(link);
-    return link;
+  void Space::set_node_mass(uint node, double mass) {
+    nodes.set_mass(node, mass);
+    links.update_node(node);
+    springs.update_node(node);
   }
 
-  Spring* Space::add_spring(Node* node_a, Node* node_b, double stiffness, double damping_ratio,
-                            bool actuated, double max_impulse) {
-    Spring* spring = new Spring(_dt, node_a, node_b, stiffness, damping_ratio, actuated, max_impulse);
-    springs.push_back(spring);
-    return spring;
+  void Space::set_node_fixed(uint node, bool fixed) {
+    nodes.set_fixed(node, fixed);
+  }
+
+  uint Space::add_link(uint node_a, uint node_b, double stiffness, double damping_ratio,
+                       bool actuated, double max_impulse) {
+    return links.add(node_a, node_b, stiffness, damping_ratio, actuated, max_impulse);
+  }
+
+  uint Space::add_nodes(size_t n, const double* x, const double* y, const double* mass,
+                        const double* friction, const char* fixed) {
+    const uint first = nodes.size();
+    for (size_t i = 0; i < n; i++) { nodes.add(x[i], y[i], mass[i], friction[i], fixed[i]); }
+    return first;
+  }
+
+  uint Space::add_links(size_t n, const uint* node_a, const uint* node_b, const double* stiffness,
+                        const double* damping_ratio, const char* actuated,
+                        const double* max_impulse) {
+    const uint first = links.size();
+    for (size_t i = 0; i < n; i++) {
+      links.add(node_a[i], node_b[i], stiffness[i], damping_ratio[i], actuated[i], max_impulse[i]);
+    }
+    return first;
+  }
+
+  uint Space::add_spring(uint node_a, uint node_b, double stiffness, double damping_ratio,
+                         bool actuated, double max_impulse) {
+    return springs.add(node_a, node_b, stiffness, damping_ratio, actuated, max_impulse);
   }
 
   Rect* Space::add_rect(double xL, double xR, double yB, double yT, double restitution) {
@@ -74,20 +104,53 @@ namespace springs {
     return triangle;
   }
 
-  AngleSensor* Space::add_angle_sensor(Node* origin, Node* satellite) {
-    AngleSensor* sensor = new AngleSensor(origin, satellite);
+  void Space::remove_rect(Rect* rect) {
+    collision_detector->remove_rect(rect);
+    rects.erase(remove(rects.begin(), rects.end(), rect), rects.end());
+    delete rect;
+  }
+
+  void Space::remove_triangle(Triangle* triangle) {
+    triangle_collision_detector->remove_triangle(triangle);
+    triangles.erase(remove(triangles.begin(), triangles.end(), triangle), triangles.end());
+    delete triangle;
+  }
+
+  void Space::translate_rect(Rect* rect, double dx, double dy) {
+    collision_detector->translate_rect(rect, dx, dy);
+  }
+
+  void Space::translate_triangle(Triangle* triangle, double dx, double dy) {
+    triangle_collision_detector->translate_triangle(triangle, dx, dy);
+  }
+
+  void Space::set_self_collision(bool enabled, double radius, bool same_body) {
+    delete self_collision_detector;
+    self_collision_detector = enabled ? new SelfCollisionDetector(radius, same_body) : NULL;
+  }
+
+  GridStats Space::rect_stats() {
+    return collision_detector->stats();
+  }
+
+  GridStats Space::triangle_stats() {
+    return triangle_collision_detector->stats();
+  }
+
+  AngleSensor* Space::add_angle_sensor(uint origin, uint satellite) {
+    AngleSensor* sensor = new AngleSensor(&nodes, origin, satellite);
     sensors->add_sensor(sensor);
     return sensor;
   }
 
-  AngleSensor* Space::add_relative_angle_sensor(Node* origin, Node* satellite, AngleSensor* ref_sensor) {
-    AngleSensor* sensor = new AngleSensor(origin, satellite, ref_sensor);
+  AngleSensor* Space::add_relative_angle_sensor(uint origin, uint satellite, AngleSensor* ref_sensor) {
+    AngleSensor* sensor = new AngleSensor(&nodes, origin, satellite, ref_sensor);
     sensors->add_sensor(sensor);
     return sensor;
   }
 
-  TouchSensor* Space::add_touch_sensor(vector<Node*> nodes) {
-    TouchSensor* sensor = new TouchSensor(nodes);
+  TouchSensor* Space::add_touch_sensor(vector<uint> node_indices) {
+    TouchSensor* sensor = new TouchSensor(&nodes, node_indices);
     sensors->add_sensor(sensor);
     return sensor;
   }
@@ -98,35 +161,121 @@ namespace springs {
     return sensor;
   }
 
+  ActuationMap* Space::add_actuation_map(size_t n_inputs) {
+    ActuationMap* actuation_map = new ActuationMap(&links, n_inputs);
+    actuation_maps.push_back(actuation_map);
+    return actuation_map;
+  }
+
+  void Space::add_actuator(Actuator* actuator, uint period) {
+    actuator->period = max(period, 1u);
+    actuators.push_back(actuator);
+  }
+
+  Controller* Space::add_controller(ControllerFunction function, void* user_data,
+                                    ActuationMap* actuation_map, uint period) {
+    Controller* controller = new Controller(function, user_data, actuation_map);
+    add_actuator(controller, period);
+    return controller;
+  }
+
+  CPG* Space::add_cpg(size_t n, vector<uint> links, ActuationMap* actuation_map, uint period) {
+    CPG* cpg = new CPG(n, links, actuation_map);
+    add_actuator(cpg, period);
+    return cpg;
+  }
+
+  MLP* Space::add_mlp(vector<size_t> dims, vector<uint> links, ActuationMap* actuation_map,
+                      uint period) {
+    MLP* mlp = new MLP(dims, links, actuation_map);
+    add_actuator(mlp, period);
+    return mlp;
+  }
+
+  GrowthSchedule* Space::add_growth_schedule(vector<uint> links, size_t n_keyframes,
+                                             uint period) {
+    GrowthSchedule* schedule = new GrowthSchedule(links, n_keyframes);
+    add_actuator(schedule, period);
+    return schedule;
+  }
+
+  Playback* Space::add_playback(size_t n_samples, vector<uint> links,
+                                ActuationMap* actuation_map, uint period) {
+    Playback* playback = new Playback(n_samples, links, actuation_map);
+    add_actuator(playback, period);
+    return playback;
+  }
+
+  ActivationDynamics* Space::add_activation_dynamics(vector<uint> links) {
+    ActivationDynamics* activation = new ActivationDynamics(links, this->links.expand_factor);
+    activations.push_back(activation);
+    return activation;
+  }
+
+  ForceField* Space::add_force_field(ForceField* force_field) {
+    force_fields.push_back(force_field);
+    return force_field;
+  }
+
+  void Space::set_colored_solver(bool colored, uint n_threads) {
+    delete _solver_pool;
+    _solver_pool = colored ? new ThreadPool(n_threads) : NULL;
+  }
+
+  bool Space::colored_solver() {
+    return _solver_pool != NULL;
+  }
+
   void Space::step() {
     // std::cout << "step cpp\n";
-    for (auto& node: nodes) {
-      node->colliding = false;
-      if (!node->fixed()) {
-        node->v_x += gravity_x * _dt;
-        node->v_y += gravity_y * _dt;
+    for (auto& actuator: actuators) {
+      if (ticks % actuator->period == 0) { actuator->actuate(*this); }
+    }
+    for (auto& activation: activations) { activation->update(*this); }
+
+    const size_t n_nodes = nodes.size();
+    for (size_t i = 0; i < n_nodes; i++) {
+      nodes.colliding[i] = false;
+      if (!nodes.fixed[i]) {
+        nodes.v_x[i] += gravity_x * _dt;
+        nodes.v_y[i] += gravity_y * _dt;
       }
     }
+    for (auto& force_field: force_fields) { force_field->apply(*this); }
+
+    links.prestep();
+    springs.prestep();
 
-    for (auto& link: links) { link->prestep(); }
-    for (auto& spring: springs) { spring->prestep(); }
+    _collisions.clear();
+    collision_detector->detect_collisions(nodes, restitution_threshold, _collisions);
 
-    vector<Collision> collisions;
-    collision_detector->detect_collisions(nodes, restitution_threshold, collisions);
+    _contacts.clear();
+    triangle_collision_detector->detect_collisions(nodes, restitution_threshold, _contacts);
 
-    vector<Contact> contacts;
-    triangle_collision_detector->detect_collisions(nodes, restitution_threshold, contacts);
+    _self_contacts.clear();
+    if (self_collision_detector) {
+      self_collision_detector->detect_collisions(nodes, {&links, &springs}, _dt, _self_contacts);
+    }
 
     for (uint k = 0; k < n_substep; k++) {
-      for (auto& collision: collisions) { collision.substep(); }
-      for (auto& contact: contacts) { contact.substep(); }
-      for (auto& link: links) { link->substep(); }
-      for (auto& spring: springs) { spring->substep(); }
+      for (auto& collision: _collisions) { collision.substep(); }
+      for (auto& contact: _contacts) { contact.substep(); }
+      for (auto& contact: _self_contacts) { contact.substep(); }
+      if (_solver_pool) { links.substep(*_solver_pool); }
+      else              { links.substep(); }
+      springs.substep();
     }
 
-    for (auto& node: nodes) { node->update_position(); }
+    nodes.update_positions(_dt);
+    for (auto& activation: activations) { activation->finish(*this); }
 
     t += _dt;
     ticks += 1;
+
+    sensors->update();
+  }
+
+  void Space::step_n(uint n) {
+    for (uint k = 0; k < n; k++) { step(); }
   }
 }
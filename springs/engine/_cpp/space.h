@@ -6,9 +6,19 @@
 
 #include "node.h"
 #include "link.h"
+#include "spring.h"
 #include "rect.h"
 #include "trig.h"
 #include "sensors.h"
+#include "actuation.h"
+#include "cpg.h"
+#include "mlp.h"
+#include "growth.h"
+#include "playback.h"
+#include "activation.h"
+#include "forces.h"
+#include "self_collision.h"
+#include "threads.h"
 
 
 using namespace std;
@@ -25,39 +35,93 @@ namespace springs {
       double gravity_x, gravity_y, t;
       double restitution_threshold;
 
-      vector<Link*> links;
-      vector<Spring*> springs;
-      vector<Node*> nodes;
+      NodeArrays nodes;
+      LinkArrays links;
+      SpringArrays springs;
       vector<Rect*> rects;
       vector<Triangle*> triangles;
 
       SensorHub* sensors;
+      vector<ActuationMap*> actuation_maps;
+      vector<Actuator*> actuators;
+      vector<ActivationDynamics*> activations;  // updated after the actuators.
+      vector<ForceField*> force_fields;         // applied after gravity.
 
       double dt();
       void set_dt(double);
 
-      Node* add_node(double x, double y, double mass, double friction, double fixed);
-
-      Link* add_link(Node* node_a, Node* node_b, double stiffness, double damping_ratio,
-                     bool actuated, double max_impulse);
-      Spring* add_spring(Node* node_a, Node* node_b, double spring, double damping_ratio,
-                         bool actuated, double max_impulse);
+      uint add_node(double x, double y, double mass, double friction, double fixed);
+      void set_node_mass(uint node, double mass);
+      void set_node_fixed(uint node, bool fixed);
+
+      uint add_link(uint node_a, uint node_b, double stiffness, double damping_ratio,
+                    bool actuated, double max_impulse);
+      // bulk versions of add_node and add_link, from arrays of size n. Return the first index.
+      uint add_nodes(size_t n, const double* x, const double* y, const double* mass,
+                     const double* friction, const char* fixed);
+      uint add_links(size_t n, const uint* node_a, const uint* node_b, const double* stiffness,
+                     const double* damping_ratio, const char* actuated,
+                     const double* max_impulse);
+      uint add_spring(uint node_a, uint node_b, double spring, double damping_ratio,
+                      bool actuated, double max_impulse);
 
       Rect* add_rect(double xL, double xR, double yB, double yT, double restitution);
       Triangle* add_triangle(const double xA, const double yA, const double xB, const double yB,
                              const double xC, const double yC, const double restitution);
-
-      AngleSensor* add_angle_sensor(Node* origin, Node* satellite);
-      AngleSensor* add_relative_angle_sensor(Node* origin, Node* satellite, AngleSensor* sensor);
-      TouchSensor* add_touch_sensor(vector<Node*> nodes);
+      // removed obstacles are deleted.
+      void remove_rect(Rect* rect);
+      void remove_triangle(Triangle* triangle);
+      void translate_rect(Rect* rect, double dx, double dy);
+      void translate_triangle(Triangle* triangle, double dx, double dy);
+      // node versus link collisions between bodies, and within bodies if `same_body` is true.
+      void set_self_collision(bool enabled, double radius, bool same_body);
+
+      // bin occupancy of the collision detectors.
+      GridStats rect_stats();
+      GridStats triangle_stats();
+
+      AngleSensor* add_angle_sensor(uint origin, uint satellite);
+      AngleSensor* add_relative_angle_sensor(uint origin, uint satellite, AngleSensor* sensor);
+      TouchSensor* add_touch_sensor(vector<uint> nodes);
       AngularVelocitySensor* add_angular_velocity_sensor(AngleSensor* sensor);
 
+      ActuationMap* add_actuation_map(size_t n_inputs);
+      // the space takes ownership of the actuator.
+      void add_actuator(Actuator* actuator, uint period);
+      Controller* add_controller(ControllerFunction function, void* user_data,
+                                 ActuationMap* actuation_map, uint period);
+      // `n` oscillators, driving `links` (one per oscillator), or else `actuation_map`.
+      CPG* add_cpg(size_t n, vector<uint> links, ActuationMap* actuation_map, uint period);
+      // `dims`: input (number of sensors), hidden and output sizes.
+      MLP* add_mlp(vector<size_t> dims, vector<uint> links, ActuationMap* actuation_map,
+                   uint period);
+      GrowthSchedule* add_growth_schedule(vector<uint> links, size_t n_keyframes, uint period);
+      Playback* add_playback(size_t n_samples, vector<uint> links, ActuationMap* actuation_map,
+                             uint period);
+      ActivationDynamics* add_activation_dynamics(vector<uint> links);
+      // takes ownership of the force field.
+      ForceField* add_force_field(ForceField* force_field);
+
+      // solve the links with the colored parallel solver, on `n_threads` threads (0 for one
+      // per core), or with the serial one (the default).
+      void set_colored_solver(bool colored, uint n_threads);
+      bool colored_solver();
+
       void step();
+      // run `n` steps in a row.
+      void step_n(uint n);
 
     protected:
       double _dt;
+      ThreadPool* _solver_pool;  // NULL for the serial solver.
       CollisionDetector* collision_detector;
       TriangleCollisionDetector* triangle_collision_detector;
+      SelfCollisionDetector* self_collision_detector;  // NULL when disabled.
+      // collisions and contacts of the current step: cleared, not freed, at each step, so that
+      // their capacity is reused across steps.
+      vector<Collision> _collisions;
+      vector<Contact> _contacts;
+      vector<SelfContact> _self_contacts;
   };
 }
 
@@ -1,24 +1,36 @@
 from libcpp cimport bool
 from libcpp.vector cimport vector
+from libcpp.memory cimport shared_ptr
 
 
-    # Nodes
+    # Threads
 
-cdef extern from "node.h" namespace "springs":
+cdef extern from "threads.cpp":
+    pass
 
-    cdef cppclass Node:
-        Node(double, double, double, double, double, bool) except +
-        double dt, x, y, v_x, v_y, friction
 
-        double mass()
-        void set_mass(double)
-        double inv_mass()
+    # Nodes
 
-        bool fixed()
-        void set_fixed(bool)
+cdef extern from "node.h" namespace "springs":
 
-        void update_position()
-        void translate(double, double)
+    cdef cppclass NodeArrays:
+        double *x
+        double *y
+        double *x_prev
+        double *y_prev
+        double *v_x
+        double *v_y
+        double *mass
+        double *inv_mass
+        double *friction
+        char   *fixed
+        char   *colliding
+        unsigned int *body
+
+        size_t size()
+        void reserve(size_t)
+        vector[shared_ptr[void]] storage()
+        void translate(unsigned int, double, double)
 
 cdef extern from "node.cpp":
     pass
@@ -27,33 +39,43 @@ cdef extern from "node.cpp":
     # Links
 
 cdef extern from "link.h" namespace "springs":
-    cdef cppclass Link:
-        Link(double, Node*, Node*, double, double, bool) except +
+    cdef cppclass LinkArrays:
+        double dt
 
-        bool   actuated
-        double relax_length
-        double expand_factor
-        double max_impulse
-        double max_length
+        unsigned int *node_a
+        unsigned int *node_b
 
-        double length()
+        char   *actuated
+        char   *active
+        double *expand_factor
+        double *relax_length
+        double *max_impulse
+        double *max_length
+        double *stiffness
+        double *damping_ratio
+        double *impulse
+        double *measured_length
+        double *measured_force
 
-        double dt()
-        void set_dt(double)
+        size_t size()
+        vector[shared_ptr[void]] storage()
+        double length(unsigned int)
 
-        double stiffness()
-        void set_stiffness(double)
+        void set_stiffness(unsigned int, double)
+        void set_damping_ratio(unsigned int, double)
 
-        double damping_ratio()
-        void set_damping_ratio(double)
+        double frequency(unsigned int)
+        void set_frequency(unsigned int, double)
 
-        double frequency()
-        void set_frequency(double)
+        void contract(unsigned int, double)
+        void contract(const unsigned int*, size_t, const double*, bool)
+        void relax(unsigned int)
 
-        void contract(double)
-        void relax()
+        size_t n_colors()
+        void color()
 
-        double force()
+        double force(unsigned int)
+        void measure()
 
 cdef extern from "link.cpp":
     pass
@@ -62,34 +84,23 @@ cdef extern from "link.cpp":
     # Springs
 
 cdef extern from "spring.h" namespace "springs":
-    cdef cppclass Spring:
-        Spring(double, Node*, Node*, double, double, bool) except +
-
-        bool   actuated
-        double relax_length
-        double expand_factor
-        double max_impulse
-        double max_length
-
-        double length()
+    cdef cppclass SpringArrays(LinkArrays):
+        void set_stiffness(unsigned int, double)
+        void set_damping_ratio(unsigned int, double)
+        void set_frequency(unsigned int, double)
 
-        double dt()
-        void set_dt(double)
-
-        double stiffness()
-        void set_stiffness(double)
-
-        double damping_ratio()
-        void set_damping_ratio(double)
+cdef extern from "spring.cpp":
+    pass
 
-        double frequency()
-        void set_frequency(double)
 
-        void contract(double)
-        void relax()
+    # Obstacles
 
-cdef extern from "spring.cpp":
-    pass
+cdef extern from "grid.h" namespace "springs":
+    cdef struct GridStats:
+        double size_x, size_y
+        size_t n_items, n_cells, n_entries, max_occupancy
+        double mean_occupancy
+        size_t n_tree
 
 
     # Rects
@@ -121,23 +132,140 @@ cdef extern from "sensors.h" namespace "springs":
         double update() except +
 
     cdef cppclass AngleSensor(Sensor):
-        AngleSensor(Node*, Node*) except +
+        AngleSensor(NodeArrays*, unsigned int, unsigned int) except +
         # double update() except +
 
     cdef cppclass TouchSensor(Sensor):
-        TouchSensor(vector[Node*]) except +
+        TouchSensor(NodeArrays*, vector[unsigned int]) except +
 
     cdef cppclass AngularVelocitySensor(Sensor):
         AngularVelocitySensor(AngularVelocitySensor*, double) except +
 
-    # cdef cppclass SensorHub:
-    #     void add_sensor(Sensor) except +
-    #     vector[double] sensor_values() except +
+    cdef cppclass SensorHub:
+        vector[Sensor*] sensors
+        vector[double] values
+
+        void update() except +
 
 cdef extern from "sensors.cpp":
     pass
 
 
+    # Self collisions
+
+cdef extern from "self_collision.cpp":
+    pass
+
+
+    # Actuation
+
+cdef extern from "actuation.h" namespace "springs":
+    cdef cppclass ActuationMap:
+        size_t n_inputs
+
+        size_t size()
+        void add(unsigned int, int, double, double, int, double, double)
+        void actuate(const double*)
+        void relax()
+
+    cdef cppclass Actuator:
+        unsigned int period
+
+    ctypedef void (*ControllerFunction)(double, size_t, const double*, const double*,
+                                        const double*, const double*, size_t, const double*,
+                                        size_t, double*, void*) noexcept nogil
+
+    cdef cppclass Controller(Actuator):
+        ControllerFunction function
+        void* user_data
+        ActuationMap* actuation_map
+
+cdef extern from "actuation.cpp":
+    pass
+
+cdef extern from "cpg.h" namespace "springs":
+    cdef cppclass OutputActuator(Actuator):
+        vector[double] outputs
+
+    cdef cppclass CPG(OutputActuator):
+        vector[double] amplitudes, frequencies, offsets, phase_offsets
+        vector[double] weights, phase_biases
+        vector[double] phases
+
+        size_t size()
+        void reset()
+
+cdef extern from "cpg.cpp":
+    pass
+
+cdef extern from "mlp.h" namespace "springs":
+    cdef cppclass MLP(OutputActuator):
+        vector[size_t] dims
+        vector[double] parameters, output_scales, output_offsets
+
+cdef extern from "mlp.cpp":
+    pass
+
+cdef extern from "growth.h" namespace "springs":
+    cdef cppclass GrowthSchedule(Actuator):
+        vector[double] times, relax_lengths
+
+        size_t n_keyframes()
+        bool finished()
+        void reset()
+
+cdef extern from "growth.cpp":
+    pass
+
+cdef extern from "playback.h" namespace "springs":
+    cdef enum Interpolation:
+        LINEAR, CUBIC
+
+    cdef cppclass Playback(OutputActuator):
+        vector[double] table
+        double sample_dt, rate, position
+        bool loop
+        Interpolation interpolation
+
+        size_t n_samples()
+        bool finished()
+        void reset()
+
+cdef extern from "playback.cpp":
+    pass
+
+cdef extern from "activation.h" namespace "springs":
+    cdef cppclass ActivationDynamics:
+        vector[unsigned int] links
+        vector[double] time_constants, rate_limits, targets, states
+
+        size_t size()
+        void reset(const double*)
+
+cdef extern from "activation.cpp":
+    pass
+
+cdef extern from "forces.h" namespace "springs":
+    cdef cppclass ForceField:
+        pass
+
+    cdef cppclass Drag(ForceField):
+        double linear, quadratic, flow_x, flow_y
+        Drag(double, double, double, double)
+
+    cdef cppclass PointAttractor(ForceField):
+        double x, y, strength, softening
+        PointAttractor(double, double, double, double)
+
+    cdef cppclass NodeForces(ForceField):
+        vector[double] forces
+        NodeForces(size_t)
+        size_t size()
+
+cdef extern from "forces.cpp":
+    pass
+
+
     # Space
 
 cdef extern from "space.h" namespace "springs":
@@ -148,25 +276,73 @@ cdef extern from "space.h" namespace "springs":
         double gravity_x, gravity_y, t, restitution_threshold
         int n_substep, ticks
 
+        NodeArrays nodes
+        LinkArrays links
+        SpringArrays springs
+
         double dt()
         void set_dt(double)
 
-        Node* add_node(double, double, double, double, double)
-        Link* add_link(Node*, Node*, double, double, bool, double)
-        Spring* add_spring(Node*, Node*, double, double, bool, double)
+        unsigned int add_node(double, double, double, double, double)
+        void set_node_mass(unsigned int, double)
+        void set_node_fixed(unsigned int, bool)
+        unsigned int add_link(unsigned int, unsigned int, double, double, bool, double)
+        unsigned int add_nodes(size_t, const double*, const double*, const double*,
+                               const double*, const char*)
+        unsigned int add_links(size_t, const unsigned int*, const unsigned int*, const double*,
+                               const double*, const char*, const double*)
+        unsigned int add_spring(unsigned int, unsigned int, double, double, bool, double)
         Rect* add_rect(double, double, double, double, double)
         Triangle* add_triangle(double, double, double, double, double, double, double)
-
-        # SensorHub* sensors
-        AngleSensor* add_angle_sensor(Node*, Node*)
-        AngleSensor* add_relative_angle_sensor(Node*, Node*, AngleSensor*)
-        TouchSensor* add_touch_sensor(vector[Node*])
+        void remove_rect(Rect*)
+        void remove_triangle(Triangle*)
+        void translate_rect(Rect*, double, double)
+        void translate_triangle(Triangle*, double, double)
+        void set_self_collision(bool, double, bool) except +
+        GridStats rect_stats()
+        GridStats triangle_stats()
+
+        SensorHub* sensors
+        AngleSensor* add_angle_sensor(unsigned int, unsigned int)
+        AngleSensor* add_relative_angle_sensor(unsigned int, unsigned int, AngleSensor*)
+        TouchSensor* add_touch_sensor(vector[unsigned int])
         AngularVelocitySensor* add_angular_velocity_sensor(AngleSensor*)
 
+        ActuationMap* add_actuation_map(size_t)
+        Controller* add_controller(ControllerFunction, void*, ActuationMap*, unsigned int)
+        CPG* add_cpg(size_t, vector[unsigned int], ActuationMap*, unsigned int)
+        MLP* add_mlp(vector[size_t], vector[unsigned int], ActuationMap*, unsigned int)
+        GrowthSchedule* add_growth_schedule(vector[unsigned int], size_t, unsigned int)
+        Playback* add_playback(size_t, vector[unsigned int], ActuationMap*, unsigned int)
+        ActivationDynamics* add_activation_dynamics(vector[unsigned int])
+        ForceField* add_force_field(ForceField*)
+
         # void add_sensor(Sensor*)
         # vector[double] sensor_values()
 
-        void step() except +
+        void set_colored_solver(bool, unsigned int) except +
+        bool colored_solver()
+
+        void step() except + nogil
+        void step_n(unsigned int) except + nogil
 
 cdef extern from "space.cpp":
     pass
+
+
+    # Batches
+
+cdef extern from "batch.h" namespace "springs":
+    cdef cppclass SpaceBatch:
+        SpaceBatch(unsigned int) except +
+
+        vector[Space*] spaces
+
+        unsigned int n_threads()
+        void add_space(Space*)
+
+        void step() except + nogil
+        void step_n(unsigned int) except + nogil
+
+cdef extern from "batch.cpp":
+    pass
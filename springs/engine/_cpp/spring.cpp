@@ -2,58 +2,97 @@
 #include <algorithm>
 #include <math.h>
 
-#include "link.h"
+#include "spring.h"
 
 namespace springs {
-  //TODO: make this inherit from Link
 
-  Spring::Spring() {}
+  enum { SPRING_DAMPING, SPRING_V_SUBSTEP, SPRING_N_VALUES };
 
-  Spring::Spring(double dt, Node* node_a, Node* node_b, double stiffness,
-             double damping_ratio, bool actuated, double max_impulse)
-  : Link(dt, node_a, node_b, stiffness, damping_ratio, actuated, max_impulse)
+  SpringArrays::SpringArrays(NodeArrays* nodes)
+  : LinkArrays(nodes), _spring_values(SPRING_N_VALUES)
   {
-      _update();
+    _bind();
+  }
+
+  void SpringArrays::_bind() {
+    LinkArrays::_bind();
+    damping   = _spring_values.column(SPRING_DAMPING);
+    v_substep = _spring_values.column(SPRING_V_SUBSTEP);
+  }
+
+  uint SpringArrays::add(uint node_a_, uint node_b_, double stiffness_, double damping_ratio_,
+                         bool actuated_, double max_impulse_) {
+    _spring_values.push_back();
+    uint i = _add_row(node_a_, node_b_, stiffness_, damping_ratio_, actuated_, max_impulse_);
+    _bind();
+    _update(i);
+    return i;
+  }
+
+  void SpringArrays::set_dt(double value) {
+    dt = value;
+    for (uint i = 0; i < size(); i++) { _update(i); }
+  }
+
+  void SpringArrays::set_stiffness(uint i, double value) {
+    stiffness[i] = value;
+    _update(i);
+  }
+
+  void SpringArrays::set_damping_ratio(uint i, double value) {
+    damping_ratio[i] = value;
+    _update(i);
+  }
+
+  void SpringArrays::set_frequency(uint i, double value) {
+    _update(i);
+  }
+
+  void SpringArrays::update_node(uint node) {
+    if (node >= node_links.size()) { return; }
+    for (auto& i: node_links[node]) { _update(i); }
   }
 
   // Physic updates
 
-  inline void Spring::_update() {
-    active = !(node_a->fixed() && node_b->fixed());
-    if (active) {
-      _inv_mass = node_a->inv_mass() + node_b->inv_mass();
-      _mass = 1 / _inv_mass;
+  inline void SpringArrays::_update(uint i) {
+    const uint a = node_a[i], b = node_b[i];
+    active[i] = !(nodes->fixed[a] && nodes->fixed[b]);
+    if (active[i]) {
+      double _inv_mass = nodes->inv_mass[a] + nodes->inv_mass[b];
+      mass[i] = 1 / _inv_mass;
 
-      double omega = sqrt(_stiffness * _inv_mass);
-      _frequency = omega / 6.28318530718;  // omega / 2π
-      _damping = 2 * _mass * _damping_ratio * omega;
-      _impulse = 0.0;
+      double omega = sqrt(stiffness[i] * _inv_mass);
+      damping[i] = 2 * mass[i] * damping_ratio[i] * omega;
+      impulse[i] = 0.0;
     }
   }
 
-  inline double Spring::prestep() {
-    _v_substep = 0;
-    double d = _distance_unit_vector();
-    if (d > 0.0) {
-      double diff_d = expand_factor * relax_length - d;
-      _bias = diff_d * _stiffness * _dt;
-      _impulse = _bias;
-      _update_velocities(_impulse);
-      return _impulse;
+  inline void SpringArrays::prestep() {
+    const size_t n = size();
+    for (uint i = 0; i < n; i++) {
+      v_substep[i] = 0;
+      double d = _distance_unit_vector(i);
+      if (d > 0.0) {
+        double diff_d = expand_factor[i] * relax_length[i] - d;
+        bias[i] = diff_d * stiffness[i] * dt;
+        impulse[i] = bias[i];
+        _update_velocities(i, impulse[i]);
+      }
     }
-    return 0.0;
-  }
-
-  inline double Spring::substep() {
-    if (active) {
-      double v_rn = _relative_velocity();
-      double v_drag = _dt * _damping * (_v_substep - v_rn);
-      _v_substep = v_rn + v_drag;
-      double impulse = v_drag;
-      _impulse += impulse;
-      _update_velocities(impulse);
-      return impulse;
+  }
+
+  inline void SpringArrays::substep() {
+    const size_t n = size();
+    for (uint i = 0; i < n; i++) {
+      if (active[i]) {
+        double v_rn = _relative_velocity(i);
+        double v_drag = dt * damping[i] * (v_substep[i] - v_rn);
+        v_substep[i] = v_rn + v_drag;
+        double impulse_i = v_drag;
+        impulse[i] += impulse_i;
+        _update_velocities(i, impulse_i);
+      }
     }
-    return 0.0;
   }
 }
@@ -6,19 +6,31 @@
 
 namespace springs {
 
-  class Spring: public Link {
+  /*  Spring table: explicit damped springs, sharing the layout of the link table. */
+  class SpringArrays: public LinkArrays {
 
     public:
-      Spring();
-      Spring(double dt, Node* node_a, Node* node_b,
-             double stiffness, double damping_ratio, bool actuated, double max_impulse);
+      SpringArrays(NodeArrays* nodes);
 
-      double prestep();
-      double substep();
-      void  _update();
+      double *damping, *v_substep;
+
+      uint add(uint node_a, uint node_b, double stiffness, double damping_ratio, bool actuated,
+               double max_impulse);
+
+      void set_dt(double);
+      void set_stiffness(uint i, double value);
+      void set_damping_ratio(uint i, double value);
+      void set_frequency(uint i, double value);
+
+      void prestep();
+      void substep();
+      void update_node(uint node);
+      void _update(uint i);
 
     protected:
-      double _damping;
+      Columns<double> _spring_values;
+
+      void _bind();
   };
 }
 
@@ -0,0 +1,66 @@
+#include "threads.h"
+
+
+namespace springs {
+
+  ThreadPool::ThreadPool(uint n_threads)
+    : _task(NULL), _n(0), _next(0), _pending(0), _generation(0), _stop(false) {
+    if (n_threads == 0) { n_threads = max(1u, thread::hardware_concurrency()); }
+    for (uint k = 1; k < n_threads; k++) {
+      _workers.emplace_back(&ThreadPool::_work, this);
+    }
+  }
+
+  ThreadPool::~ThreadPool() {
+    {
+      unique_lock<mutex> lock(_mutex);
+      _stop = true;
+    }
+    _start.notify_all();
+    for (auto& worker: _workers) { worker.join(); }
+  }
+
+  uint ThreadPool::size() {
+    return _workers.size() + 1;
+  }
+
+  inline void ThreadPool::_run_tasks() {
+    for (size_t i = _next++; i < _n; i = _next++) { (*_task)(i); }
+  }
+
+  void ThreadPool::_work() {
+    size_t generation = 0;
+    while (true) {
+      {
+        unique_lock<mutex> lock(_mutex);
+        _start.wait(lock, [&] { return _stop || _generation != generation; });
+        if (_stop) { return; }
+        generation = _generation;
+      }
+      _run_tasks();
+      {
+        unique_lock<mutex> lock(_mutex);
+        if (--_pending == 0) { _done.notify_one(); }
+      }
+    }
+  }
+
+  void ThreadPool::parallel_for(size_t n, const function<void(size_t)> &task) {
+    if (_workers.empty() || n <= 1) {
+      for (size_t i = 0; i < n; i++) { task(i); }
+      return;
+    }
+    {
+      unique_lock<mutex> lock(_mutex);
+      _task = &task;
+      _n = n;
+      _next = 0;
+      _pending = _workers.size();
+      _generation++;
+    }
+    _start.notify_all();
+    _run_tasks();
+    unique_lock<mutex> lock(_mutex);
+    _done.wait(lock, [&] { return _pending == 0; });
+  }
+}
@@ -0,0 +1,49 @@
+#ifndef THREADS_H
+#define THREADS_H
+
+#include <atomic>
+#include <condition_variable>
+#include <functional>
+#include <mutex>
+#include <thread>
+#include <vector>
+#include <sys/types.h>
+
+
+using namespace std;
+
+namespace springs {
+
+  /*  A fixed set of worker threads, to run the iterations of a loop in parallel.
+   *
+   *  The calling thread takes part in the work, so a pool of size n uses n - 1 workers.
+   */
+  class ThreadPool {
+    public:
+      // n_threads == 0 uses as many threads as hardware cores.
+      ThreadPool(uint n_threads);
+      ~ThreadPool();
+
+      uint size();
+
+      // Run `task(i)` for each i in [0, n), and return when all are done.
+      void parallel_for(size_t n, const function<void(size_t)> &task);
+
+    private:
+      vector<thread> _workers;
+      mutex _mutex;
+      condition_variable _start, _done;
+
+      const function<void(size_t)>* _task;
+      size_t _n;
+      atomic<size_t> _next;
+      size_t _pending;       // number of workers still running the current loop.
+      size_t _generation;    // incremented for each loop.
+      bool _stop;
+
+      void _work();
+      void _run_tasks();
+  };
+}
+
+#endif
@@ -1,3 +1,4 @@
+#include <algorithm>
 #include <numeric>
 #include <cmath>
 #include <sys/types.h>
@@ -31,8 +32,13 @@ namespace springs {
         tangent_y = - tangent_y;
     }
 
-    double Segment::dot_normal(Node* node) {
-        return (node->x - x1) * normal_x + (node->y - y1) * normal_y;
+    void Segment::translate(double dx, double dy) {
+        x1 += dx; y1 += dy;
+        x2 += dx; y2 += dy;
+    }
+
+    double Segment::dot_normal(double x, double y) {
+        return (x - x1) * normal_x + (y - y1) * normal_y;
     }
 
     /* Triangle */
@@ -58,15 +64,28 @@ namespace springs {
         }
     }
 
-    void Triangle::collides(Node* node, Contact &contact) {
+    void Triangle::translate(double dx, double dy) {
+        xA += dx; xB += dx; xC += dx; x_min += dx; x_max += dx;
+        yA += dy; yB += dy; yC += dy; y_min += dy; y_max += dy;
+        segment_AB.translate(dx, dy);
+        segment_BC.translate(dx, dy);
+        segment_CA.translate(dx, dy);
+    }
+
+    AABB Triangle::aabb() {
+        return AABB(x_min, x_max, y_min, y_max);
+    }
+
+    void Triangle::collides(NodeArrays* nodes, uint node, Contact &contact) {
         contact.active = false;
+        double &x = nodes->x[node], &y = nodes->y[node];
 
-        if (!(x_min < node->x && node->x <= x_max &&
-              y_min < node->y && node->y <= y_max   )) {
+        if (!(x_min < x && x <= x_max &&
+              y_min < y && y <= y_max   )) {
             return;
         }
 
-        const double dot_AB = segment_AB.dot_normal(node);
+        const double dot_AB = segment_AB.dot_normal(x, y);
         // std::cout << dot_AB << std::endl;
         if (dot_AB > 0) { return; }
         // else if (dot_AB == 0) {  // assumed on the segment, because in the AABB too.
@@ -76,22 +95,24 @@ namespace springs {
         //     contact.restitution = restitution;
         //     return;
         // }
-        const double dot_BC = segment_BC.dot_normal(node);
+        const double dot_BC = segment_BC.dot_normal(x, y);
         // std::cout << dot_BC << std::endl;
         if (dot_BC > 0) { return; }
         else if (dot_BC == 0) {  // assumed on the segment, because in the AABB too.
             contact.active  = true;
             contact.segment = &segment_BC;
+            contact.nodes = nodes;
             contact.node = node;
             contact.restitution = restitution;
             return;
         }
-        const double dot_CA = segment_CA.dot_normal(node);
+        const double dot_CA = segment_CA.dot_normal(x, y);
         // std::cout << dot_CA << std::endl;
         if (dot_CA > 0) { return; }
         else if (dot_CA == 0) {  // assumed on the segment, because in the AABB too.
             contact.active  = true;
             contact.segment = &segment_CA;
+            contact.nodes = nodes;
             contact.node = node;
             contact.restitution = restitution;
             return;
@@ -99,42 +120,71 @@ namespace springs {
 
         // If here, the point is inside the triangle
         contact.active  = true;
+        contact.nodes = nodes;
         contact.node = node;
         contact.restitution = restitution;
         if (dot_BC > dot_CA) {
-            node->x -= dot_BC * segment_BC.normal_x;
-            node->y -= dot_BC * segment_BC.normal_y;
+            x -= dot_BC * segment_BC.normal_x;
+            y -= dot_BC * segment_BC.normal_y;
             contact.segment = &segment_BC;
         } else {
-            node->x -= dot_CA * segment_CA.normal_x;
-            node->y -= dot_CA * segment_CA.normal_y;
+            x -= dot_CA * segment_CA.normal_x;
+            y -= dot_CA * segment_CA.normal_y;
             contact.segment = &segment_CA;
         }
 
         // if (dot_AB > dot_BC) {
         //     if (dot_AB > dot_CA) {
-        //         node->x -= dot_AB * segment_AB.normal_x;
-        //         node->y -= dot_AB * segment_AB.normal_y;
+        //         x -= dot_AB * segment_AB.normal_x;
+        //         y -= dot_AB * segment_AB.normal_y;
         //         contact.segment = &segment_AB;
         //     } else {
-        //         node->x -= dot_CA * segment_CA.normal_x;
-        //         node->y -= dot_CA * segment_CA.normal_y;
+        //         x -= dot_CA * segment_CA.normal_x;
+        //         y -= dot_CA * segment_CA.normal_y;
         //         contact.segment = &segment_CA;
         //     }
         // } else {
         //     if (dot_BC > dot_CA) {
-        //         node->x -= dot_BC * segment_BC.normal_x;
-        //         node->y -= dot_BC * segment_BC.normal_y;
+        //         x -= dot_BC * segment_BC.normal_x;
+        //         y -= dot_BC * segment_BC.normal_y;
         //         contact.segment = &segment_BC;
         //     } else {
-        //         node->x -= dot_CA * segment_CA.normal_x;
-        //         node->y -= dot_CA * segment_CA.normal_y;
+        //         x -= dot_CA * segment_CA.normal_x;
+        //         y -= dot_CA * segment_CA.normal_y;
         //         contact.segment = &segment_CA;
         //     }
         // }
     }
 
 
+    /* TriangleEdges */
+
+    TriangleEdges::TriangleEdges(Triangle* triangle)
+        : x_min(triangle->x_min), x_max(triangle->x_max),
+          y_min(triangle->y_min), y_max(triangle->y_max), triangle(triangle) {
+        int k = 0;
+        for (Segment* segment: {&triangle->segment_AB, &triangle->segment_BC, &triangle->segment_CA}) {
+            x1[k] = segment->x1;
+            y1[k] = segment->y1;
+            normal_x[k] = segment->normal_x;
+            normal_y[k] = segment->normal_y;
+            k++;
+        }
+    }
+
+    inline bool TriangleEdges::collides(double x, double y) {
+        if (!(x_min < x && x <= x_max &&
+              y_min < y && y <= y_max   )) {
+            return false;
+        }
+        if ((x - x1[0]) * normal_x[0] + (y - y1[0]) * normal_y[0] > 0) { return false; }
+        const double dot_BC = (x - x1[1]) * normal_x[1] + (y - y1[1]) * normal_y[1];
+        if (dot_BC > 0) { return false; }
+        if (dot_BC == 0) { return true; }
+        return (x - x1[2]) * normal_x[2] + (y - y1[2]) * normal_y[2] <= 0;
+    }
+
+
     /* Contact */
 
     Contact::Contact(double threshold)
@@ -149,120 +199,150 @@ namespace springs {
 
     inline void Contact::prepare() {
       // should only be done once per step
-      x = node->x;
-      y = node->y;
-      const double vn = node->v_x * segment->normal_x + node->v_y * segment->normal_y;
+      x = nodes->x[node];
+      y = nodes->y[node];
+      const double vn = nodes->v_x[node] * segment->normal_x + nodes->v_y[node] * segment->normal_y;
       bias = vn * restitution;
     }
 
     inline void Contact::substep() {
         if (!active) { return; }
+        double &v_x = nodes->v_x[node], &v_y = nodes->v_y[node];
 
         // tangent: friction
-        const double vt = node->v_x * segment->tangent_x + node->v_y * segment->tangent_y;
-        double max_friction = node->friction * fabs(diff_vn);
+        const double vt = v_x * segment->tangent_x + v_y * segment->tangent_y;
+        double max_friction = nodes->friction[node] * fabs(diff_vn);
         // std::cout << "friction " << max_friction << std::endl;
         if (fabs(vt) > 1) { max_friction /= 2; }  // moving: dynamic friction
         double new_diff_vt = clamp(-max_friction, diff_vt - vt, max_friction);
-        node->v_x += (new_diff_vt - diff_vt) * segment->tangent_x;
-        node->v_y += (new_diff_vt - diff_vt) * segment->tangent_y;
+        v_x += (new_diff_vt - diff_vt) * segment->tangent_x;
+        v_y += (new_diff_vt - diff_vt) * segment->tangent_y;
         diff_vt = new_diff_vt;
         // normal: restitution
-        const double vn = node->v_x * segment->normal_x + node->v_y * segment->normal_y;
+        const double vn = v_x * segment->normal_x + v_y * segment->normal_y;
         const double new_diff_vn = diff_vn - vn - bias;
-        node->v_x += (new_diff_vn - diff_vn) * segment->normal_x;
-        node->v_y += (new_diff_vn - diff_vn) * segment->normal_y;
+        v_x += (new_diff_vn - diff_vn) * segment->normal_x;
+        v_y += (new_diff_vn - diff_vn) * segment->normal_y;
         diff_vn = new_diff_vn;
     }
 
 
     TriangleCollisionDetector::TriangleCollisionDetector(double size_x, double size_y)
-        : size_x(size_x), size_y(size_y)
+        : size_x(size_x), size_y(size_y), _prepared(false)
     {
         _autosize_x = size_x <= 0;
         _autosize_y = size_y <= 0;
     }
 
     inline void TriangleCollisionDetector::add_triangle(Triangle* triangle) {
-        triangles.push_back(triangle);
-        _bins.clear();
+        if (!_prepared) { triangles.push_back(triangle); }
+        else            { _add_to_tree(triangle); }
+    }
+
+    inline void TriangleCollisionDetector::remove_triangle(Triangle* triangle) {
+        auto proxy = _proxies.find(triangle);
+        if (proxy != _proxies.end()) {
+            _tree.remove(proxy->second);
+            _proxies.erase(proxy);
+        } else {
+            _remove_from_grid(triangle);
+        }
     }
 
-    inline int TriangleCollisionDetector::_bin_x(double x) {
-        return floor((x - _min_x_bin) / size_x);
+    inline void TriangleCollisionDetector::translate_triangle(Triangle* triangle,
+                                                              double dx, double dy) {
+        auto proxy = _proxies.find(triangle);
+        if (proxy != _proxies.end()) {
+            triangle->translate(dx, dy);
+            _tree.data(proxy->second) = TriangleEdges(triangle);
+            _tree.move(proxy->second, triangle->aabb());
+        } else if (!_prepared) {  // the grid is not built yet
+            triangle->translate(dx, dy);
+        } else {
+            _remove_from_grid(triangle);
+            triangle->translate(dx, dy);
+            _add_to_tree(triangle);
+        }
     }
-    inline int TriangleCollisionDetector::_bin_y(double y) {
-        return floor((y - _min_y_bin) / size_y);
+
+    inline void TriangleCollisionDetector::_add_to_tree(Triangle* triangle) {
+        _proxies[triangle] = _tree.insert(triangle->aabb(), TriangleEdges(triangle));
+    }
+
+    inline void TriangleCollisionDetector::_remove_from_grid(Triangle* triangle) {
+        triangles.erase(remove(triangles.begin(), triangles.end(), triangle), triangles.end());
+        if (!_prepared) { return; }
+        _grid.remove(triangle->aabb(),
+                     [&](TriangleEdges &edges) { return edges.triangle == triangle; });
     }
 
     inline void TriangleCollisionDetector::_autosize() {
         if (_autosize_x) {
             vector<double> widths;
             for (auto& triangle: triangles) { widths.push_back(triangle->x_max - triangle->x_min); }
-            double mean_width = accumulate(widths.begin(), widths.end(), 0.0) / widths.size();
-            size_x = 3 * mean_width; // heuristic. TODO: refine.
+            size_x = cell_size(widths);
         }
         if (_autosize_y) {
             vector<double> heights;
             for (auto& triangle: triangles) { heights.push_back(triangle->y_max - triangle->y_min); }
-            double mean_height = accumulate(heights.begin(), heights.end(), 0.0) / heights.size();
-            size_y = 3 * mean_height; // heuristic. TODO: refine.
+            size_y = cell_size(heights);
         }
     }
 
     inline void TriangleCollisionDetector::_prepare() {
         _autosize();
+        _grid.size_x = size_x;
+        _grid.size_y = size_y;
 
-        vector<double> x_maxs, x_mins, y_maxs, y_mins;
+        vector<Triangle*> grid_triangles;
         for (auto& triangle: triangles) {
-            x_mins.push_back(triangle->x_min); x_maxs.push_back(triangle->x_max);
-            y_mins.push_back(triangle->y_min); y_maxs.push_back(triangle->y_max);
-        }
-        double min_x = *min_element(x_mins.begin(), x_mins.end());
-        double max_x = *max_element(x_maxs.begin(), x_maxs.end());
-        double min_y = *min_element(y_mins.begin(), y_mins.end());
-        double max_y = *max_element(y_maxs.begin(), y_maxs.end());
-
-        _min_x_bin = size_x * floor(min_x / size_x);
-        _min_y_bin = size_y * floor(min_y / size_y);
-        n_bins_x = floor(max_x / size_x) - floor(min_x / size_x) + 1;
-        n_bins_y = floor(max_y / size_y) - floor(min_y / size_y) + 1;
-        n_bins = n_bins_x * n_bins_y;
-
-        for (int i = 0; i < n_bins_x; i++) {
-            _bins.push_back(vector<vector<Triangle*>>());
-            for (int j = 0; j < n_bins_y; j++) {
-                _bins[i].push_back(vector<Triangle*>());
+            if (_grid.n_cells(triangle->aabb()) > MAX_CELLS_PER_ITEM) {
+                _add_to_tree(triangle);
+            } else {
+                _grid.insert(triangle->aabb(), TriangleEdges(triangle));
+                grid_triangles.push_back(triangle);
             }
         }
+        triangles = grid_triangles;
+        _prepared = true;
+    }
 
-        for (auto& triangle: triangles) {
-            for (int i = _bin_x(triangle->x_min); i <= _bin_x(triangle->x_max); i++) {
-                for (int j = _bin_y(triangle->y_min); j <= _bin_y(triangle->y_max); j++) {
-                    _bins[i][j].push_back(triangle);
-                }
-            }
-        }
+    GridStats TriangleCollisionDetector::stats() {
+        GridStats stats = _grid.stats();
+        stats.n_tree = _tree.size();
+        return stats;
     }
 
-    inline void TriangleCollisionDetector::detect_collisions(vector<Node*> &nodes,
+    inline void TriangleCollisionDetector::detect_collisions(NodeArrays &nodes,
                                                              double restitution_threshold,
                                                              vector<Contact> &contacts) {
-        if (triangles.size() == 0 || nodes.size() == 0) { return; }
-        if (_bins.size() == 0) { _prepare(); }
-
-        Contact contact = Contact(restitution_threshold);
-        for (Node* node: nodes) {
-            int bin_x = _bin_x(node->x);
-            int bin_y = _bin_y(node->y);
-            if (0 <= bin_y && bin_y < n_bins_y && 0 <= bin_x && bin_x < n_bins_x) {
-                for (Triangle* triangle: triangles) {
-                    triangle->collides(node, contact);
-                    if (contact.active) { node->colliding = true;
-                                          contact.prepare(); contacts.push_back(contact);
-                                          contact.reset(); }
+        if (nodes.size() == 0) { return; }
+        if (!_prepared) {
+            if (triangles.size() == 0) { return; }
+            _prepare();
+        }
+
+        const size_t n = nodes.size();
+        for (uint node = 0; node < n; node++) {
+            vector<TriangleEdges>* cell = _grid.cell(nodes.x[node], nodes.y[node]);
+            if (cell != NULL) {
+                for (auto& edges: *cell) {
+                    _add_contact(nodes, node, edges, restitution_threshold, contacts);
                 }
             }
+            _tree.query(nodes.x[node], nodes.y[node], [&](TriangleEdges &edges) {
+                _add_contact(nodes, node, edges, restitution_threshold, contacts);
+            });
+        }
+    }
+
+    inline void TriangleCollisionDetector::_add_contact(NodeArrays &nodes, uint node,
+            TriangleEdges &edges, double restitution_threshold, vector<Contact> &contacts) {
+        if (edges.collides(nodes.x[node], nodes.y[node])) {
+            Contact &contact = contacts.emplace_back(restitution_threshold);
+            edges.triangle->collides(&nodes, node, contact);
+            nodes.colliding[node] = true;
+            contact.prepare();
         }
     }
 }
@@ -1,7 +1,11 @@
 #ifndef TRIANGLE_H
 #define TRIANGLE_H
 
+#include <unordered_map>
+
 #include "node.h"
+#include "aabb_tree.h"
+#include "grid.h"
 
 
 using namespace std;
@@ -22,7 +26,8 @@ namespace springs {
 
       Segment(const double x1, const double y1, const double x2, const double y2);
       void rotate();
-      double dot_normal(Node* node);
+      void translate(double dx, double dy);
+      double dot_normal(double x, double y);
   };
 
   class Contact {
@@ -30,7 +35,8 @@ namespace springs {
       double x, y;
       double restitution, threshold, diff_vn, diff_vt, bias;
 
-      Node* node;
+      NodeArrays* nodes;
+      uint node;
       Segment* segment;
       bool active;
 
@@ -46,34 +52,60 @@ namespace springs {
       Segment segment_AB, segment_BC, segment_CA;
 
       Triangle(double xA, double yA, double xB, double yB, double xC, double yC, double restitution);
-      void collides(Node* node, Contact &contact);
+      void collides(NodeArrays* nodes, uint node, Contact &contact);
+      void translate(double dx, double dy);
+      AABB aabb();
 
       double x_min, x_max, y_min, y_max;
   };
 
+  /*  Copy of the bounding box, edges and outward normals of a triangle, packed together so that
+   *  the triangles of a bin can be tested against a point without chasing pointers.
+   */
+  class TriangleEdges {
+    public:
+      double x_min, x_max, y_min, y_max;
+      double x1[3], y1[3];              // origin of the edges AB, BC and CA
+      double normal_x[3], normal_y[3];  // their outward normals
+      Triangle* triangle;
+
+      TriangleEdges() : triangle(NULL) {}
+      TriangleEdges(Triangle* triangle);
+      // same outcome as `triangle->collides()`, without modifying anything.
+      bool collides(double x, double y);
+  };
+
+  /*  Same structure as the CollisionDetector: a sparse grid, built at the first detection, and a
+   *  dynamic AABB tree for the triangles added afterwards, moved, or too large for the grid.
+   */
   class TriangleCollisionDetector {
     public:
       // vector<Nodes*> nodes;
-      vector<Triangle*> triangles;
-      int n_bins, n_bins_x, n_bins_y;
+      vector<Triangle*> triangles;  // triangles in the grid.
       double size_x, size_y;
 
       TriangleCollisionDetector(double size_x, double size_y);
-      void add_node(Node* node);
       void add_triangle(Triangle* trig);
-      void detect_collisions(vector<Node*> &nodes, double restitution_threshold,
+      void remove_triangle(Triangle* trig);
+      void translate_triangle(Triangle* trig, double dx, double dy);
+      void detect_collisions(NodeArrays &nodes, double restitution_threshold,
                              vector<Contact> &contacts);
+      GridStats stats();
 
     protected:
-      vector<vector<vector<Triangle*>>> _bins;
-      double _min_x_bin, _min_y_bin;
+      bool _prepared;
+      SparseGrid<TriangleEdges> _grid;
+      AABBTree<TriangleEdges> _tree;
+      unordered_map<Triangle*, int> _proxies;  // tree leaves of the triangles in the tree.
       bool _autosize_x, _autosize_y;
 
       void _prepare();
-      // automatically chooses size_x and size_y based on the rectangles dimensions.
+      void _add_to_tree(Triangle* trig);
+      void _remove_from_grid(Triangle* trig);
+      void _add_contact(NodeArrays &nodes, uint node, TriangleEdges &edges,
+                        double restitution_threshold, vector<Contact> &contacts);
+      // automatically chooses size_x and size_y based on the triangles dimensions.
       void _autosize();
-      int _bin_x(double x);
-      int _bin_y(double x);
   };
 }
 
@@ -3,6 +3,8 @@
 
 import copy
 
+from springs.engine._common import broadcast, check_pairs, hook_periods
+
 from libcpp cimport bool
 from libc.math cimport floor, sqrt, hypot
 
@@ -439,6 +441,7 @@ cdef class Space:
     cdef readonly double t
     cdef readonly object nodes, links, rects, triangles, entities, update_functions
     cdef readonly CollisionDetector collision_detector
+    cdef list _update_hooks, _entity_hooks  # (hook, period) registrations.
 
     def __cinit__(self, dt, n_substep=5, gravity=(0.0, 0.0), restitution_threshold=1.0):
         """
@@ -457,6 +460,7 @@ cdef class Space:
         self.t, self.ticks = 0, 0
         self.nodes, self.links, self.rects, self.triangles = [], [], [], []
         self.entities, self.update_functions = [], []
+        self._update_hooks, self._entity_hooks = [], []
 
     @property
     def dt(self):
@@ -489,6 +493,39 @@ cdef class Space:
         self.links.append(link)
         return link
 
+    def add_nodes(self, xy, mass=1.0, friction=0.5, fixed=False):
+        """Add nodes in bulk, from a sequence of (x, y) positions. `mass`, `friction` and `fixed`
+        are scalars or sequences. Return the range of indices of the new nodes in `nodes`."""
+        check_pairs(xy, 'positions')
+        xy = list(xy)
+        first, n = len(self.nodes), len(xy)
+        for (x, y), m, f, fx in zip(xy, broadcast(mass, n), broadcast(friction, n),
+                                    broadcast(fixed, n)):
+            self.add_node(x, y, mass=m, friction=f, fixed=fx)
+        return range(first, first + n)
+
+    def add_links(self, pairs, stiffness=10000.0, damping_ratio=1.0, actuated=False,
+                  max_impulse=100):
+        """Add links in bulk, between pairs of node indices or of Nodes. The other parameters
+        are scalars or sequences. Return the range of indices of the new links in `links`."""
+        check_pairs(pairs, 'node indices')
+        pairs = [(self.nodes[a] if not isinstance(a, Node) else a,
+                  self.nodes[b] if not isinstance(b, Node) else b) for a, b in pairs]
+        first, n = len(self.links), len(pairs)
+        for (a, b), k, d, act, imp in zip(pairs, broadcast(stiffness, n),
+                                          broadcast(damping_ratio, n), broadcast(actuated, n),
+                                          broadcast(max_impulse, n)):
+            self.add_link(a, b, stiffness=k, damping_ratio=d, actuated=act, max_impulse=imp)
+        return range(first, first + n)
+
+    def link_positions(self, indices):
+        """Positions in `links` of the links of `indices`: the same, as there are no springs."""
+        positions = list(indices)
+        for i in positions:
+            if not 0 <= i < len(self.links):
+                raise IndexError('link index out of range')
+        return positions
+
     cpdef void add_rect(self, double xL, double xR, double yB, double yT, double restitution):
         rect = Rect(xL, xR, yB, yT, restitution)
         self.rects.append(rect)
@@ -497,15 +534,19 @@ cdef class Space:
 
     # specialized functions
 
-    def add_entity(self, entity):
+    def add_entity(self, entity, period=1):
+        """Add an entity, whose `update(t)` method is run after every `period`-th step."""
+        self._entity_hooks.append((entity, max(period, 1)))
         self.entities.append(entity)
 
 
     # engine loop
 
     cpdef void step(self):
-        for update_function in self.update_functions:
-            update_function(self)
+        for update_function, period in zip(list(self.update_functions),
+                                           hook_periods(self.update_functions, self._update_hooks)):
+            if self.ticks % period == 0:
+                update_function(self)
 
         # gravity
         for node in self.nodes:
@@ -530,9 +571,11 @@ cdef class Space:
         self.t += self.dt
         self.ticks += 1
 
-        for entity in self.entities:
-            entity.update(self.t)
+        for entity, period in zip(list(self.entities), hook_periods(self.entities, self._entity_hooks)):
+            if self.ticks % period == 0:
+                entity.update(self.t)
 
-    def add_update_function(self, update_function):
-        """Add a function to be run before each step. Take the space as argument."""
+    def add_update_function(self, update_function, period=1):
+        """Add a function to be run before every `period`-th step. Take the space as argument."""
+        self._update_hooks.append((update_function, max(period, 1)))
         self.update_functions.append(update_function)
@@ -0,0 +1,97 @@
+import numpy as np
+
+import springs
+from springs.engine.cpp import SpaceBatch
+
+
+def create_pendulum(mass):
+    space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+    space.add_rect(-1000, 1000, -100, 0, restitution=0.5)
+    a = space.add_node(100, 200, mass=1.0, fixed=True)
+    b = space.add_node(150, 100, mass=mass)
+    c = space.add_node(200, 50, mass=mass)
+    space.add_link(a, b, stiffness=1000.0, damping_ratio=0.5)
+    space.add_link(b, c, stiffness=1000.0, damping_ratio=0.5)
+    return space
+
+
+def test_batch_step_n():
+    """Stepping a batch must give the same result as stepping each space serially."""
+    masses = [0.5, 1.0, 2.0, 4.0, 8.0]
+    serial = [create_pendulum(mass) for mass in masses]
+    for space in serial:
+        space.step_n(500)
+
+    batch = SpaceBatch([create_pendulum(mass) for mass in masses], n_threads=3)
+    batch.step_n(200)
+    batch.step_n(300)
+
+    positions = batch.positions()
+    assert positions.shape == (len(masses), 3, 2)
+    assert batch.velocities().shape == (len(masses), 3, 2)
+    for i, space in enumerate(serial):
+        assert batch.spaces[i].ticks == 500
+        for k, node in enumerate(space.nodes):
+            assert tuple(positions[i, k]) == node.position
+
+
+def test_batch_hooks():
+    """Update functions, sensors and entities still run with each step."""
+    spaces = [create_pendulum(1.0) for _ in range(4)]
+    calls = []
+    for space in spaces:
+        space.add_angle_sensor(space.nodes[0], space.nodes[1])
+        space.add_update_function(lambda space: calls.append(space.ticks))
+
+    batch = SpaceBatch(spaces)
+    batch.step_n(10)
+    assert len(calls) == 40
+    values = batch.sensor_values()
+    assert values.shape == (4, 1)
+    assert np.all(values == [space.sensor_values() for space in spaces])
+
+    # decimated hooks: the batch only returns to Python when one of them is due.
+    ticks = []
+    spaces[0].add_update_function(lambda space: ticks.append(space.ticks), period=4)
+    spaces[1].update_functions.clear()
+    batch.step_n(10)
+    assert len(calls) == 40 + 30 and ticks == [12, 16]
+
+
+def test_batch_mismatch():
+    space = create_pendulum(1.0)
+    space.add_node(0, 0)
+    batch = SpaceBatch([create_pendulum(1.0), space])
+    try:
+        batch.positions()
+        assert False
+    except ValueError:
+        pass
+
+
+def test_batch_errors():
+    """Native errors in a worker thread are raised on the calling thread, and a space can only be
+    stepped by one thread."""
+    space = create_pendulum(1.0)
+    mlp = space.add_mlp([(np.zeros((1, 0)), np.zeros(1))], links=space.links[:1])
+    space.controllers.remove(mlp)  # hides the MLP from the checks of add_angle_sensor
+    space.add_angle_sensor(space.nodes[0], space.nodes[1])  # input size mismatch
+    batch = SpaceBatch([create_pendulum(1.0), space], n_threads=2)
+    try:
+        batch.step_n(1)
+        assert False
+    except RuntimeError:
+        pass
+
+    try:
+        SpaceBatch([space, space])
+        assert False
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    test_batch_step_n()
+    test_batch_hooks()
+    test_batch_mismatch()
+    test_batch_errors()
@@ -1,3 +1,7 @@
+import random
+
+import numpy as np
+
 import springs
 
 
@@ -27,6 +31,91 @@ def test_starfish_creation():
     for dt in range(100):
         space.step()
 
+
+def test_compiled_muscle_interface():
+    """A compiled muscle interface sets the same expand factors as the Python hierarchy."""
+    arm_dims = 6 * [[(50, 30), (45, 30), (40, 30), (40, 25)] + 2 * [(35, 20)] + [(30, 0)]]
+    for muscle_cls in [springs.creatures.SectionOneMuscle, springs.creatures.SectionTwoMuscles]:
+        spaces, interfaces = [], []
+        for compile in [False, True]:
+            space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+            starfish = springs.creatures.Starfish(space, arm_dims, (720, 500), 40)
+            interfaces.append(starfish.create_muscle_interface(n_group=4, muscle_cls=muscle_cls,
+                                                               compile=compile))
+            spaces.append(space)
+        assert interfaces[1].actuation_map is not None
+        assert len(interfaces[1].actuation_map) == len(interfaces[0])
+
+        random.seed(0)
+        for _ in range(10):
+            m_signal = [random.uniform(0.5, 1.5) for _ in range(len(interfaces[0]))]
+            for interface, space in zip(interfaces, spaces):
+                interface.actuate(m_signal)
+                space.step()
+            assert spaces[0].link_expand_factors.tolist() == spaces[1].link_expand_factors.tolist()
+            assert spaces[0].positions.tolist() == spaces[1].positions.tolist()
+        interfaces[1].relax()
+        assert all(spaces[1].link_expand_factors == 1.0)
+
+
+def test_growth_schedule():
+    """A compiled growth schedule interpolates the relax lengths set by the dev factors."""
+    arm_dims = 5 * [[(40, 30) for i in range(4)] + [(40, 0)]]
+    starfishes = []
+    for _ in range(2):
+        space = springs.create_space(dt=0.01, gravity=0.0, engine='cpp')
+        starfishes.append(springs.creatures.DevStarfish(space, arm_dims, (1000, 500), 30,
+                                                        height_dev_factor=0.5))
+    starfish, reference = starfishes
+    def dimensions():
+        return [([(s.height, s.width) for s in t.sections], t.tip.height) for t in starfish.tentacles]
+    relax_lengths, sizes = [link.relax_length for link in starfish.space.links], dimensions()
+    schedule = starfish.compile_growth([0.0, 1.0], [0.5, 1.0], [1.0, 0.8])
+    assert [link.relax_length for link in starfish.space.links] == relax_lengths
+    assert starfish.tentacles[0].height_dev_factor == 5 * [0.5]
+    assert dimensions() == sizes and starfish.tentacles[0].sections[0].height == 20.0
+    assert 0 < schedule.relax_lengths.shape[1] < len(starfish.space.links)
+
+    starfish.space.step_n(51)  # the last step actuates at t = 0.5
+    midpoint = (schedule.relax_lengths[0] + schedule.relax_lengths[1]) / 2
+    assert np.allclose(starfish.space.link_relax_lengths[schedule.links], midpoint)
+
+    starfish.space.step_n(60)
+    assert schedule.finished
+    reference.change_height_dev_factor(1.0)
+    reference.change_width_dev_factor(0.8)
+    assert starfish.space.link_relax_lengths.tolist() == reference.space.link_relax_lengths.tolist()
+
+
+def test_creature_bodies():
+    """Creatures built with `body=` collide with each other when self-collisions are enabled."""
+    arm_dims = 4 * [[(20, 15) for i in range(3)] + [(20, 0)]]
+    def drop(bodies):
+        space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+        space.add_rect(-1000, 1000, -100, 0, restitution=0.0)
+        lower = springs.creatures.Starfish(space, arm_dims, (0, 80), 15, body=bodies[0])
+        upper = springs.creatures.DevStarfish(space, arm_dims, (0, 250), 15, body=bodies[1])
+        squares = springs.creatures.FusedSquares(space, [[20.0, 20.0]], [[0.5, 0.5]],
+                                                 origin=(500, 0), body=bodies[2])
+        for creature, body in zip([lower, upper], bodies):
+            assert all(node.body == (body or 0) for node in creature.nodes)
+        assert np.all(space.node_bodies[-6:] == (bodies[2] or 0))
+        space.set_self_collision(radius=2.0)
+        space.step_n(3000)
+        return min(node.y for node in upper.nodes)
+
+    assert drop((None, None, None)) < 1.0  # a single body: the upper starfish falls through
+    assert drop((1, 2, 3)) > 50.0
+
+    space = springs.create_space(dt=0.001, gravity=-100.0, engine='cython')
+    springs.creatures.Starfish(space, arm_dims, (0, 80), 15)  # no body: fine without node bodies
+    try:
+        springs.creatures.Starfish(space, arm_dims, (0, 250), 15, body=1)
+        assert False
+    except ValueError:
+        pass
+
+
 # def test_centipede_creation():
 #     pass
 
@@ -34,3 +123,6 @@ def test_starfish_creation():
 
 if __name__ == '__main__':
     test_starfish_creation()
+    test_compiled_muscle_interface()
+    test_growth_schedule()
+    test_creature_bodies()
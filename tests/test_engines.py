@@ -1,5 +1,10 @@
+import ctypes
+import gc
 import math
 import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 import springs
 
@@ -83,7 +88,651 @@ def test_restitution():
             check_restitution(speed, restitution, dt=0.01, threshold=speed+1)
 
 
+def test_node_views():
+    """Node handles must remain valid when the node arrays of the space grow."""
+    space = springs.create_space(dt=0.01, gravity=0.0, engine='cpp')
+    nodes = [space.add_node(i, 2 * i, mass=1.0 + i, friction=0.1 * i) for i in range(1000)]
+    nodes[0].v_x = 3.0
+    nodes[0].fixed = True
+    for i, node in enumerate(nodes):
+        assert node.index == i
+        assert node.position == (i, 2 * i)
+        assert node.mass == 1.0 + i
+        assert node.friction == 0.1 * i
+    assert nodes[0].v_x == 3.0 and nodes[0].fixed and not nodes[1].fixed
+
+
+def test_link_views():
+    """Link and spring handles must remain valid when the link tables of the space grow."""
+    space = springs.create_space(dt=0.001, gravity=0.0, engine='cpp')
+    nodes = [space.add_node(10 * i, 0.0) for i in range(500)]
+    links = [space.add_link(a, b, actuated=True) for a, b in zip(nodes[:-1], nodes[1:])]
+    spring = space.add_spring(nodes[0], nodes[-1], stiffness=100.0)
+    links[0].contract(0.5)
+    for i, link in enumerate(links):
+        assert link.index == i
+        assert link.node_a is nodes[i] and link.node_b is nodes[i+1]
+        assert abs(link.relax_length - 10.0) < 1e-9
+        assert link.expand_factor == (0.5 if i == 0 else 1.0)
+    assert spring.index == 0 and abs(spring.length() - 4990.0) < 1e-9
+
+    for _ in range(1000):
+        space.step()
+    assert abs(links[0].length() - 5.0) < 0.1
+
+
+def test_numpy_views():
+    """NumPy views alias the node arrays and the link table, across steps and growth."""
+    space = springs.create_space(dt=0.001, gravity=-10.0, engine='cpp')
+    nodes = [space.add_node(10 * i, 0.0, fixed=(i == 0)) for i in range(5)]
+    links = [space.add_link(a, b, actuated=True) for a, b in zip(nodes[:-1], nodes[1:])]
+    space.add_spring(nodes[0], nodes[-1])
+
+    positions, velocities = space.positions, space.velocities
+    assert positions.shape == (5, 2) and not positions.flags.writeable
+    assert space.link_nodes.tolist() == [[i, i + 1] for i in range(4)]
+    space.link_expand_factors[0] = 0.5
+    assert links[0].expand_factor == 0.5
+    velocities[1] = (1.0, 2.0)
+    assert (nodes[1].v_x, nodes[1].v_y) == (1.0, 2.0)
+
+    for _ in range(100):
+        space.step()
+    assert space.positions is positions
+    assert positions.tolist() == [list(node.position) for node in nodes]
+    assert velocities.tolist() == [[node.v_x, node.v_y] for node in nodes]
+    assert space.link_lengths.tolist() == [link.length() for link in links]
+    assert space.link_forces.tolist() == [link.force for link in links]
+
+    before, sensor_buffer = positions.copy(), space.sensor_buffer
+    for i in range(100):  # reallocates the node arrays and the link table
+        space.add_link(nodes[-1], space.add_node(50 + i, 0.0))
+        space.add_angle_sensor(nodes[0], nodes[1])
+    assert space.positions is not positions
+    assert np.array_equal(space.positions[:5], [node.position for node in nodes])
+    assert space.link_nodes.shape == (104, 2) and space.link_lengths.shape == (104,)
+
+    # stale views stay readable, on memory kept alive, and can no longer be written
+    assert np.array_equal(positions, before) and sensor_buffer.shape == (0,)
+    try:
+        velocities[1] = (0.0, 0.0)
+        assert False
+    except ValueError:
+        pass
+    velocities, sensor_buffer, node = space.velocities, space.sensor_buffer, nodes[-1]
+    position = node.position
+    del space, nodes, links  # views and handles keep the native space alive
+    gc.collect()
+    assert velocities.shape == (105, 2) and sensor_buffer.shape == (100,)
+    velocities[:] = 0.0
+    assert node.position == position and node.v_x == 0.0
+
+
+def test_contract_links():
+    """Bulk contraction, from indices, handles or named groups, with per-link or one factor."""
+    space = springs.create_space(dt=0.001, gravity=0.0, engine='cpp')
+    nodes = [space.add_node(10 * i, 0.0) for i in range(11)]
+    links = [space.add_link(a, b, actuated=True) for a, b in zip(nodes[:-1], nodes[1:])]
+    spring = space.add_spring(nodes[0], nodes[-1])
+
+    space.contract_links(np.arange(0, 10, 2), np.linspace(0.5, 0.9, 5))
+    assert [link.expand_factor for link in links[::2]] == list(np.linspace(0.5, 0.9, 5))
+    assert all(link.expand_factor == 1.0 for link in links[1::2])
+
+    space.add_link_group('odd', links[1::2])
+    space.contract_links('odd', 1.2)
+    assert space.link_groups['odd'].tolist() == [1, 3, 5, 7, 9]
+    assert all(link.expand_factor == 1.2 for link in links[1::2])
+    space.relax_links(range(10))
+    assert np.all(space.link_expand_factors == 1.0)
+
+    for links_, factors, error in [('even', 1.0, KeyError), ([10], 1.0, IndexError),
+                                   ([-1], 1.0, IndexError), ([spring], 1.0, TypeError),
+                                   ('odd', [1.0, 1.0], ValueError)]:
+        try:
+            space.contract_links(links_, factors)
+            assert False
+        except error:
+            pass
+
+
+def test_native_controller():
+    """Compiled controllers run inside the native step, every `period` steps."""
+    from springs.engine.cpp import CONTROLLER_FUNCTYPE
+
+    space = springs.create_space(dt=0.01, gravity=0.0, engine='cpp')
+    nodes = [space.add_node(10 * i, 0.0) for i in range(4)]
+    links = [space.add_link(a, b, actuated=True) for a, b in zip(nodes[:-1], nodes[1:])]
+    sensor = space.add_angle_sensor(nodes[0], nodes[1])
+
+    calls = []
+    @CONTROLLER_FUNCTYPE
+    def direct(t, n_nodes, x, y, v_x, v_y, n_sensors, sensors, n_outputs, outputs, user_data):
+        calls.append((t, n_nodes, x[1], n_sensors, sensors[0], n_outputs))
+        for i in range(n_outputs):
+            outputs[i] = 0.5 + 0.1 * i
+    space.add_controller(direct, period=2)
+    space.step_n(4)
+    x, sensor_value = nodes[1].x, sensor.value
+    space.step_n(2)
+    assert [call[0] for call in calls] == [0.0, 0.02, 0.04]
+    assert calls[-1][1:] == (4, x, 1, sensor_value, 3)
+    assert space.link_expand_factors.tolist() == [0.5, 0.6, 0.7]
+
+    # outputs routed through an actuation map, parameters passed as user data.
+    actuation_map = space.add_actuation_map(1, [1, 2], [(0, -1), (0, -1)],
+                                            [(1.0, 0.0), (1.0, 0.0)], [(1.0, 1.0), (-1.0, 1.0)])
+    gains = np.array([0.25])
+    @CONTROLLER_FUNCTYPE
+    def mapped(t, n_nodes, x, y, v_x, v_y, n_sensors, sensors, n_outputs, outputs, user_data):
+        outputs[0] = ctypes.cast(user_data, ctypes.POINTER(ctypes.c_double))[0]
+    controller = space.add_controller(mapped, actuation_map=actuation_map, user_data=gains)
+    assert controller.period == 1 and space.controllers[-1] is controller
+    space.step()
+    assert space.link_expand_factors.tolist() == [0.5, 1.25, 0.75]
+
+
+def test_cpg():
+    """CPG oscillators drive links natively; coupling locks their phase differences."""
+    space = springs.create_space(dt=0.001, gravity=0.0, engine='cpp')
+    nodes = [space.add_node(10 * i, 0.0) for i in range(4)]
+    links = [space.add_link(a, b, actuated=True) for a, b in zip(nodes[:-1], nodes[1:])]
+
+    cpg = space.add_cpg(amplitudes=[0.1, 0.2], frequencies=2.0, phase_offsets=[0.0, 1.0],
+                        links=links[:2], period=2)
+    for tick in range(10):
+        space.step()
+        t = 2 * (tick // 2) * space.dt  # time of the last actuation
+        assert abs(links[0].expand_factor - (1 + 0.1 * math.sin(4 * math.pi * t))) < 1e-12
+        assert abs(links[1].expand_factor - (1 + 0.2 * math.sin(4 * math.pi * t + 1.0))) < 1e-12
+    assert links[2].expand_factor == 1.0
+
+    cpg.amplitudes[:] = 0.0  # parameters are live views
+    cpg.offsets[0] = 0.8
+    space.step_n(2)
+    assert links[0].expand_factor == 0.8 and links[1].expand_factor == 1.0
+
+    # coupled oscillators of different frequencies, through an actuation map.
+    actuation_map = space.add_actuation_map(2, [2], [(0, -1)], [(1.0, 0.0)], [(1.0, 1.0)])
+    coupled = space.add_cpg(amplitudes=1.0, frequencies=[1.0, 1.2], actuation_map=actuation_map,
+                            weights=[[0.0, 20.0], [20.0, 0.0]],
+                            phase_biases=[[0.0, 0.5], [-0.5, 0.0]])
+    assert space.controllers == [cpg, coupled]
+    space.step_n(5000)
+    difference = (coupled.phases[1] - coupled.phases[0]) % (2 * math.pi)
+    assert abs(difference - 0.5) < 0.05
+    assert links[2].expand_factor == 1.0 + coupled.outputs[0]
+
+    coupled.reset()
+    assert coupled.phases.tolist() == [0.0, 0.0]
+
+
+def test_playback():
+    """A table of expand factors is played natively, interpolated between samples."""
+    space = springs.create_space(dt=0.001, gravity=0.0, engine='cpp')
+    nodes = [space.add_node(10 * i, 0.0) for i in range(4)]
+    links = [space.add_link(a, b, actuated=True) for a, b in zip(nodes[:-1], nodes[1:])]
+
+    table = np.array([[1.0, 0.8], [1.2, 0.9], [1.1, 1.0], [0.9, 1.1]])
+    playback = space.add_playback(table, links=links[:2], sample_dt=0.002)
+    expected = [table[0], (table[0] + table[1]) / 2, table[1]]
+    for row in expected:
+        space.step()
+        assert np.allclose([links[0].expand_factor, links[1].expand_factor], row)
+    assert links[2].expand_factor == 1.0
+
+    space.step_n(5)  # position 3.5: wraps around, halfway between the last and first rows
+    assert np.allclose(playback.outputs, (table[3] + table[0]) / 2)
+
+    # cubic spline through the samples, played twice faster.
+    playback.interpolation, playback.rate = 'cubic', 2.0
+    playback.reset()
+    for k in range(4):
+        space.step()
+        assert np.allclose(playback.outputs, table[k])
+
+    # without loop, the playback holds the last row.
+    playback.loop = False
+    playback.reset()
+    space.step_n(10)
+    assert playback.finished and playback.outputs.tolist() == table[-1].tolist()
+    assert space.controllers == [playback]
+
+    try:
+        space.add_playback(table[:, :1], links=links[:2])
+        assert False
+    except ValueError:
+        pass
+
+
+def test_activation_dynamics():
+    """Expand factors follow the last written ones with a time constant and a rate limit."""
+    space = springs.create_space(dt=0.001, gravity=0.0, engine='cpp')
+    nodes = [space.add_node(10 * i, 0.0) for i in range(4)]
+    links = [space.add_link(a, b, actuated=True) for a, b in zip(nodes[:-1], nodes[1:])]
+    activation = space.add_activation_dynamics(links[:2], time_constants=[0.01, 0.0],
+                                               rate_limits=[np.inf, 10.0])
+    assert space.activations == [activation] and activation.targets.tolist() == [1.0, 1.0]
+
+    links[0].contract(0.8)
+    links[1].contract(0.9)
+    links[2].contract(0.9)
+    space.step_n(5)
+    states = activation.states
+    assert abs(states[0] - (1.0 - 0.2 * (1 - math.exp(-0.5)))) < 1e-12
+    assert abs(states[1] - 0.95) < 1e-12  # 0.01 per step
+    assert links[2].expand_factor == 0.9
+    assert activation.targets.tolist() == [0.8, 0.9]
+    assert [link.expand_factor for link in links[:2]] == [0.8, 0.9]  # targets, between steps
+
+    activation.targets[1] = 1.0  # targets are writeable
+    space.step_n(2)
+    assert abs(states[1] - 0.97) < 1e-12
+    space.step_n(1000)
+    assert abs(states[0] - 0.8) < 1e-12 and states[1] == 1.0
+
+    activation.time_constants[0] = 0.0
+    links[0].contract(1.1)
+    space.step()
+    assert states[0] == 1.1
+
+    # holding the current state, while moving towards another target, is a new target too.
+    links[1].contract(0.5)
+    space.step_n(3)
+    held = states[1]
+    links[1].contract(held)
+    space.step_n(10)
+    assert states[1] == held and activation.targets[1] == held
+
+
+def test_force_fields():
+    """Drag, flow, attractors and per-node forces change the node velocities natively."""
+    space = springs.create_space(dt=0.001, gravity=0.0, engine='cpp')
+    nodes = [space.add_node(10.0, 0.0, mass=2.0), space.add_node(0.0, 10.0, fixed=True)]
+    space.velocities[0] = (10.0, 0.0)
+
+    drag = space.add_drag(linear=4.0)
+    space.step()
+    assert abs(space.velocities[0, 0] - 10.0 / (1 + 0.001 * 4.0 / 2.0)) < 1e-12
+    drag.linear, drag.quadratic, drag.flow = 1e6, 1.0, (5.0, -1.0)
+    space.step()  # a strong drag matches the flow, without overshoot
+    assert np.allclose(space.velocities[0], (5.0, -1.0), atol=0.02)
+    assert space.velocities[0, 0] > 5.0 and space.velocities[0, 1] > -1.0
+
+    drag.linear, drag.quadratic = 0.0, 0.0
+    space.velocities[0] = (0.0, 0.0)
+    attractor = space.add_point_attractor(0.0, 0.0, strength=100.0, softening=0.0)
+    x, y = nodes[0].position
+    space.step()
+    acceleration = -100.0 * np.array([x, y]) / (x**2 + y**2)**1.5
+    assert np.allclose(space.velocities[0], acceleration * 0.001, rtol=1e-12, atol=0.0)
+    attractor.strength = 0.0
+
+    space.velocities[0] = (0.0, 0.0)
+    node_forces = space.add_node_forces([(0.0, 4.0), (1.0, 1.0)])
+    space.step()
+    assert np.allclose(space.velocities[0], (0.0, 4.0 / 2.0 * 0.001))
+    assert nodes[1].position == (0.0, 10.0) and space.velocities[1].tolist() == [0.0, 0.0]
+    assert space.force_fields == [drag, attractor, node_forces]
+
+
+def test_bulk_construction():
+    """add_nodes and add_links build the same nodes and links as add_node and add_link."""
+    xy = np.array([(0.0, 0.0), (3.0, 0.0), (0.0, 4.0), (5.0, 5.0)])
+    pairs = [(0, 1), (0, 2), (1, 2), (2, 3)]
+    stiffness = [100.0, 200.0, 300.0, 400.0]
+
+    space_a = springs.create_space(dt=0.001, engine='cpp')
+    nodes = [space_a.add_node(x, y, mass=2.0, fixed=(k == 3)) for k, (x, y) in enumerate(xy)]
+    for (a, b), k in zip(pairs, stiffness):
+        space_a.add_link(nodes[a], nodes[b], k, damping_ratio=0.5, actuated=(k > 250))
+
+    space_b = springs.create_space(dt=0.001, engine='cpp')
+    space_b.add_node(-1.0, -1.0)
+    assert space_b.add_nodes(xy, mass=2.0, fixed=[False, False, False, True]) == range(1, 5)
+    assert space_b.add_links(np.array(pairs) + 1, stiffness=np.array(stiffness), damping_ratio=0.5,
+                             actuated=[False, False, True, True]) == range(0, 4)
+    assert len(space_b.nodes) == 5 and len(space_b.links) == 4
+    for node_a, node_b in zip(space_a.nodes, space_b.nodes[1:]):
+        assert node_b.index == node_a.index + 1
+        assert (node_a.position, node_a.mass, node_a.fixed) == (node_b.position, node_b.mass, node_b.fixed)
+    for link_a, link_b in zip(space_a.links, space_b.links):
+        assert link_b.node_a is space_b.nodes[link_a.node_a.index + 1]
+        assert (link_a.relax_length, link_a.stiffness, link_a.damping_ratio, link_a.actuated) == \
+               (link_b.relax_length, link_b.stiffness, link_b.damping_ratio, link_b.actuated)
+    space_a.step_n(10), space_b.step_n(10)
+    assert np.array_equal(space_a.positions, space_b.positions[1:])
+
+    # Node handles, and empty inputs
+    assert space_b.add_links([(space_b.nodes[0], space_b.nodes[4])]) == range(4, 5)
+    assert space_b.add_nodes(np.zeros((0, 2))) == range(5, 5)
+    try:
+        space_b.add_links([(0, 5)])
+        assert False
+    except IndexError:
+        pass
+    try:
+        space_b.add_links(np.array([(0.0, 1.0)]))
+        assert False
+    except TypeError:
+        pass
+    try:
+        space_b.add_nodes(xy, mass=[1.0, 2.0])
+        assert False
+    except ValueError:
+        pass
+    for xy_bad in (np.zeros((4, 3)), np.zeros(8), np.zeros((2, 2, 2))):
+        try:
+            space_b.add_nodes(xy_bad)
+            assert False
+        except ValueError:
+            pass
+    try:
+        space_b.add_links(np.array([0, 1, 1, 2]))
+        assert False
+    except ValueError:
+        pass
+    assert len(space_b.nodes) == 5 and len(space_b.links) == 5
+
+    # Handles are created on access. The returned range indexes the link table, while springs
+    # are in `links` too: `link_positions` maps one to the other.
+    space_c = springs.create_space(dt=0.001, engine='cpp')
+    a, b = space_c.add_node(0.0, 0.0), space_c.add_node(1.0, 0.0)
+    space_c.add_spring(a, b, 10.0)
+    indices = space_c.add_nodes(np.array([(0.0, 1.0), (1.0, 1.0)]), body=[1, 2])
+    assert space_c.node_bodies.tolist() == [0, 0, 1, 2]
+    try:
+        space_c.add_nodes([(0.0, 2.0)], body=-1)
+        assert False
+    except ValueError:
+        pass
+    links = space_c.add_links(np.array([(0, 2), (1, 3), (2, 3)]))
+    assert links == range(0, 3) and space_c.link_positions(links) == [1, 2, 3]
+    assert [(space_c.links[k].node_a.index, space_c.links[k].node_b.index)
+            for k in space_c.link_positions(links)] == [(0, 2), (1, 3), (2, 3)]
+    assert [space_c.nodes[i].index for i in indices] == [2, 3]
+    assert space_c.nodes[2] is space_c.nodes[2] and space_c.links[3].node_b is space_c.nodes[3]
+    link = space_c.add_link(a, b, 10.0)
+    assert link is space_c.links[4] and link.index == 3 and space_c.link_positions([3]) == [4]
+    space_c.contract_links(links, 0.5)
+    assert space_c.link_expand_factors.tolist() == [0.5, 0.5, 0.5, 1.0]
+    try:
+        space_c.link_positions([4])
+        assert False
+    except IndexError:
+        pass
+
+def test_step_n():
+    """`step_n()` and `run()` must be equivalent to repeated `step()` calls."""
+    def create_space():
+        space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+        space.add_rect(-1000, 1000, -100, 0, restitution=0.5)
+        a, b, c = space.add_node(0, 10), space.add_node(10, 10), space.add_node(5, 20)
+        for node_a, node_b in [(a, b), (b, c), (c, a)]:
+            space.add_link(node_a, node_b, stiffness=1000.0)
+        return space
+
+    space_a, space_b, space_c = create_space(), create_space(), create_space()
+    for _ in range(500):
+        space_a.step()
+    space_b.step_n(500)
+    calls = []
+    space_c.add_update_function(lambda space: calls.append(space.ticks))  # a hook every step
+    assert space_c.run(0.5) == 500 and len(calls) == 500
+
+    assert space_a.ticks == space_b.ticks == space_c.ticks == 500
+    for node_a, node_b, node_c in zip(space_a.nodes, space_b.nodes, space_c.nodes):
+        assert node_a.position == node_b.position == node_c.position
+    assert space_b.run(0.5) == 0
+
+
+def test_decimated_hooks():
+    """Update functions and entities run every `period` steps, with `step()` as with `step_n()`."""
+    class Entity:
+        def __init__(self):
+            self.ticks = []
+        def update(self, t):
+            self.ticks.append(round(t / 0.001))
+
+    runs = []
+    for engine, stepped in [('cython', False), ('cpp', False), ('cpp', True)]:
+        space = springs.create_space(dt=0.001, gravity=-100.0, engine=engine)
+        a, b = space.add_node(0, 10), space.add_node(10, 10)
+        link = space.add_link(a, b, stiffness=1000.0, actuated=True)
+        calls, entity = [], Entity()
+        space.add_update_function(lambda space: calls.append(space.ticks), period=3)
+        space.add_update_function(lambda space: link.contract(1.0 + space.ticks % 7 / 100), period=5)
+        space.add_entity(entity, period=4)
+        if stepped:
+            space.step_n(12)
+            space.step_n(8)
+        else:
+            for _ in range(20):
+                space.step()
+        assert calls == [0, 3, 6, 9, 12, 15, 18]
+        assert entity.ticks == [4, 8, 12, 16, 20]
+        runs.append([node.position for node in space.nodes])
+
+        # the same hook registered twice keeps both periods, and the public lists can be edited.
+        space.update_functions.clear()
+        count = []
+        def counter(space):
+            count.append(space.ticks)
+        space.add_update_function(counter)
+        space.add_update_function(counter, period=5)
+        space.update_functions.append(lambda space: None)
+        if stepped:
+            space.step_n(10)
+        else:
+            for _ in range(10):
+                space.step()
+        assert len(count) == 10 + 2 and entity.ticks[-2:] == [24, 28]
+    assert runs[1] == runs[2]
+
+
+def test_threaded_step():
+    """Spaces stepped concurrently from Python threads must match serially stepped ones."""
+    def create_space(mass):
+        space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+        space.add_rect(-1000, 1000, -100, 0, restitution=0.5)
+        a, b = space.add_node(0, 100, fixed=True), space.add_node(50, 50, mass=mass)
+        space.add_link(a, b, stiffness=1000.0)
+        return space
+
+    def run(space):
+        for _ in range(500):
+            space.step()
+        return space
+
+    masses = [0.5, 1.0, 2.0, 4.0]
+    serial = [run(create_space(mass)) for mass in masses]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        threaded = list(executor.map(run, [create_space(mass) for mass in masses]))
+
+    for space_a, space_b in zip(serial, threaded):
+        for node_a, node_b in zip(space_a.nodes, space_b.nodes):
+            assert node_a.position == node_b.position
+
+
+def test_colored_solver():
+    """The colored solver must not depend on the number of threads, and stay close to the
+    serial one."""
+    def create_space(solver, n_threads=0):
+        space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+        space.add_rect(-1000, 1000, -100, 100, restitution=0.5)
+        if solver is not None:
+            space.set_solver(solver, n_threads=n_threads)
+        square_size = [[10.0 for j in range(10)] for i in range(10)]
+        square_stiffness = [[1.0 for j in range(10)] for i in range(10)]
+        springs.creatures.FusedSquares(space, square_size, square_stiffness, origin=(0, 110))
+        for link in space.links[::3]:
+            link.contract(0.8)
+        space.step_n(200)
+        return space
+
+    serial, colored_1, colored_3 = create_space(None), create_space('colored', 1), create_space('colored', 3)
+    assert serial.solver == 'serial' and colored_1.solver == 'colored'
+    for node_s, node_1, node_3 in zip(serial.nodes, colored_1.nodes, colored_3.nodes):
+        assert node_1.position == node_3.position
+        assert abs(node_s.x - node_1.x) < 0.5 and abs(node_s.y - node_1.y) < 0.5
+
+
+def test_triangle_terrain():
+    """Nodes must land on a terrain made of many triangles."""
+    space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+    for i in range(-500, 500):  # flat-topped terrain, at y = 10
+        space.add_triangle(10*i, -10, 10*(i+1), 10, 10*i, 10, 0.0)
+        space.add_triangle(10*i, -10, 10*(i+1), -10, 10*(i+1), 10, 0.0)
+    nodes = [space.add_node(x + 0.5, 50) for x in range(-4000, 4000, 400)]
+    space.step_n(2000)
+    for node in nodes:
+        assert 9.0 < node.y < 11.0
+
+
+def test_collision_buffers():
+    """The collision and contact buffers are reused across steps: only the rect collisions and
+    triangle contacts of the current step act on the nodes."""
+    def free_fall(x, y, n_steps):
+        space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+        node = space.add_node(x, y)
+        space.step_n(n_steps)
+        return node.position
+
+    space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+    space.add_rect(-100, -50, -10, 0, restitution=0.0)
+    space.add_triangle(0, -10, 100, 10, 0, 10, 0.0)  # flat top, at y = 10
+    space.add_triangle(0, -10, 100, -10, 100, 10, 0.0)
+    on_rect, on_triangle = space.add_node(-75, 20), space.add_node(50, 30)
+    free = space.add_node(200, 30)
+    space.step_n(1000)
+    assert abs(on_rect.y) < 0.1 and abs(on_triangle.y - 10.0) < 0.1
+    assert free.position == free_fall(200, 30, 1000)
+
+    # out of the obstacles: the collisions and contacts of the previous steps must not act.
+    for node in (on_rect, on_triangle):
+        node.translate(0, 50)
+        node.v_x, node.v_y = 0.0, 0.0
+    starts = on_rect.position, on_triangle.position
+    space.step_n(300)
+    for node, start in zip((on_rect, on_triangle), starts):
+        assert np.allclose(node.position, free_fall(*start, 300), atol=1e-9)
+
+
+def test_dynamic_obstacles():
+    """Obstacles added after the first step, moved or removed, are handled without rebuild."""
+    def create_space(late):
+        random.seed(1)
+        space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+        nodes = [space.add_node(random.uniform(-900, 900), random.uniform(200, 300))
+                 for _ in range(100)]
+        if late:  # the collision grid is built with a single, far away, rect
+            space.add_rect(100000, 100001, 0, 1, restitution=0.0)
+            space.step()
+        random.seed(2)
+        for i in range(-50, 50):
+            space.add_rect(20*i, 20*(i+1), -100, random.uniform(50, 150), restitution=0.5)
+            space.add_triangle(20*i, 160, 20*(i+1), 160, 20*i + 10, 170, restitution=0.5)
+        if not late:
+            space.step()
+        space.step_n(1000)
+        return space
+
+    grid_space, tree_space = create_space(False), create_space(True)
+    for node_a, node_b in zip(grid_space.nodes, tree_space.nodes):
+        assert node_a.position == node_b.position
+
+    # removing the floor under a node, and moving a platform under another one.
+    space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+    floor = space.add_rect(-100, 100, -100, 0, restitution=0.0)
+    platform = space.add_rect(200, 300, -100, 0, restitution=0.0)
+    a, b = space.add_node(0, 10), space.add_node(250, 10)
+    space.step_n(500)
+    assert abs(a.y) < 1.0 and abs(b.y) < 1.0
+    space.remove_rect(floor)
+    assert floor not in space.rects
+    for _ in range(500):
+        platform.translate(0, 0.1)
+        space.step()
+    assert a.y < -10
+    assert abs(platform.yT - 50) < 1e-6 and abs(b.y - 50) < 1.0
+
+
+def test_collision_stats():
+    """A long floor and tall outliers must not blow up the collision grid."""
+    random.seed(0)
+    space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+    space.add_rect(-10000, 10000, -100, 0, restitution=0.5)  # 20 km floor
+    for _ in range(500):
+        x = random.uniform(-10000, 10000)
+        space.add_rect(x, x + 5, 0, random.uniform(1, 5), restitution=0.5)
+    space.add_rect(0, 10, 0, 5000, restitution=0.5)  # tall outlier
+    node = space.add_node(20, 10)
+    space.step_n(100)
+
+    stats = space.collision_stats()['rects']
+    assert stats['n_items'] == 500 and stats['n_tree'] == 2
+    assert stats['size_x'] == 10.0
+    assert stats['n_cells'] <= stats['n_entries'] <= 4 * stats['n_items']
+    assert 1.0 <= stats['mean_occupancy'] <= stats['max_occupancy']
+    assert node.y > -1.0  # landed on the floor, held by the tree
+
+
+def test_self_collision():
+    """A node must be stopped by the link of another body, and only by those if `same_body`
+    is False."""
+    def drop(body, self_collision=True, same_body=False):
+        space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+        a, b = space.add_node(-50, 0, fixed=True), space.add_node(50, 0, fixed=True)
+        space.add_link(a, b)
+        a.body = b.body = 1
+        node = space.add_node(10, 30)
+        node.body = body
+        if self_collision:
+            space.set_self_collision(radius=2.0, same_body=same_body)
+        space.step_n(2000)
+        return node
+
+    assert drop(2, self_collision=False).y < -100
+    assert abs(drop(2).y - 2.0) < 0.1
+    assert drop(1).y < -100
+    assert abs(drop(1, same_body=True).y - 2.0) < 0.1
+
+    # a link much longer than the others, which size the grid cells: its nodes are tested
+    # directly. Far away nodes must not break the grid.
+    space = springs.create_space(dt=0.001, gravity=-100.0, engine='cpp')
+    nodes = [space.add_node(x, 1000, fixed=True) for x in range(200)]
+    for node_a, node_b in zip(nodes[:-1], nodes[1:]):
+        space.add_link(node_a, node_b)
+    a, b = space.add_node(-1e5, -1e3, fixed=True), space.add_node(1e5, 1e3, fixed=True)
+    space.add_link(a, b)
+    space.add_node(1e300, -1e300, fixed=True)
+    node = space.add_node(0, 30)
+    node.body = 2
+    space.set_self_collision(radius=2.0)
+    space.step_n(2000)
+    assert abs(node.y - 0.01 * node.x - 2.0) < 0.1
+
+
 if __name__ == '__main__':
     test_spring()
     test_stiffness()
     test_restitution()
+    test_node_views()
+    test_link_views()
+    test_numpy_views()
+    test_contract_links()
+    test_native_controller()
+    test_cpg()
+    test_playback()
+    test_activation_dynamics()
+    test_force_fields()
+    test_bulk_construction()
+    test_step_n()
+    test_decimated_hooks()
+    test_threaded_step()
+    test_colored_solver()
+    test_triangle_terrain()
+    test_collision_buffers()
+    test_dynamic_obstacles()
+    test_collision_stats()
+    test_self_collision()
@@ -1,6 +1,8 @@
 import math
 import random
 
+import numpy as np
+
 import springs
 
 
@@ -82,8 +84,97 @@ def test_touch_sensor2():
         assert space.sensor_values() == [sensor.value for sensor in sensors]
     assert all(sensor.value == 0.0 for sensor in sensors)
 
+def test_sensor_buffer():
+    """`sensor_buffer` is a read-only view updated in place by each step."""
+    space = springs.create_space(dt=0.01, gravity=-100.0, engine='cpp')
+    assert len(space.sensor_buffer) == 0
+    origin = space.add_node(500, 300, fixed=True)
+    satellite = space.add_node(700, 300)
+    space.add_link(origin, satellite, 100000.0)
+    angle_sensor = space.add_angle_sensor(origin, satellite)
+    touch_sensor = space.add_touch_sensor([satellite])
+
+    buffer = space.sensor_buffer
+    assert buffer.shape == (2,) and not buffer.flags.writeable
+    for t in range(100):
+        space.step()
+        assert space.sensor_buffer is buffer
+        assert list(buffer) == [angle_sensor.value, touch_sensor.value]
+    assert buffer[0] < 0.0
+
+    space.add_touch_sensor([origin])
+    assert list(space.sensor_buffer) == [angle_sensor.value, touch_sensor.value, 1.0]
+
+def test_native_sensor_updates():
+    """Sensors are updated by the native step, also within `step_n`, dependencies first."""
+    def create_space():
+        space = springs.create_space(dt=0.01, gravity=-100.0, engine='cpp')
+        origin = space.add_node(500, 300, fixed=True)
+        satellite = space.add_node(700, 300)
+        tip = space.add_node(800, 300)
+        space.add_link(origin, satellite, 100000.0)
+        space.add_link(satellite, tip, 100000.0)
+        angle = space.add_angle_sensor(origin, satellite)
+        relative_angle = space.add_angle_sensor(satellite, tip, angle)
+        space.add_angular_velocity_sensor(relative_angle)
+        space.add_angular_velocity_sensor(angle)
+        return space
+
+    space_a, space_b = create_space(), create_space()
+    for t in range(200):
+        space_a.step()
+    space_b.step_n(200)
+    assert space_a.sensor_values() == space_b.sensor_values()
+    assert space_b.sensor_values() == [sensor.value for sensor in space_b.sensors]
+    assert space_b.sensors[3].value < 0.0
+
+def test_mlp_controller():
+    """The native MLP reads the sensor buffer at the start of the step, like its NumPy twin."""
+    space = springs.create_space(dt=0.01, gravity=-100.0, engine='cpp')
+    nodes = [space.add_node(100 * i, 300, fixed=(i == 0)) for i in range(4)]
+    links = [space.add_link(a, b, 100000.0, actuated=True) for a, b in zip(nodes[:-1], nodes[1:])]
+    for a, b in zip(nodes[:-1], nodes[1:]):
+        space.add_angle_sensor(a, b)
+
+    rng = np.random.default_rng(0)
+    layers = [(rng.normal(size=(5, 3)), rng.normal(size=5)), (rng.normal(size=(2, 5)), rng.normal(size=2))]
+    mlp = space.add_mlp(layers, links=links[1:], output_scales=0.1, period=3)
+    assert mlp.dims == (3, 5, 2) and len(mlp.parameters) == 32
+
+    def forward(x):
+        for W, b in layers:
+            x = np.tanh(W @ x + b)
+        return 1.0 + 0.1 * x
+
+    for tick in range(9):
+        sensors = space.sensor_buffer.copy()
+        space.step()
+        if tick % 3 == 0:
+            assert np.allclose([link.expand_factor for link in links[1:]], forward(sensors))
+    assert links[0].expand_factor == 1.0
+
+    mlp.parameters[:] = 0.0  # e.g. a new genome
+    mlp.biases[-1][:] = [0.0, 1e6]
+    space.step_n(3)
+    assert [link.expand_factor for link in links[1:]] == [1.0, 1.1]
+
+    try:
+        space.add_mlp(layers[1:], links=links[1:])
+        assert False
+    except ValueError:
+        pass
+    try:  # would not match the input size of the MLP
+        space.add_angle_sensor(nodes[0], nodes[1])
+        assert False
+    except ValueError:
+        pass
+    assert len(space.sensors) == 3
+
 
 if __name__ == '__main__':
     test_angle_sensor()
     test_touch_sensor1()
     test_touch_sensor2()
+    test_sensor_buffer()
+    test_native_sensor_updates()
+    test_mlp_controller()